@@ -0,0 +1,22 @@
+"""
+ASGI config for config project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Run under uvicorn workers, e.g.::
+
+    gunicorn -k uvicorn.workers.UvicornWorker config.asgi:application
+
+ASGI 部署默认开启 ASYNC_VIEWS，profile / login / logout 使用异步视图。
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("ASYNC_VIEWS", "True")
+
+application = get_asgi_application()
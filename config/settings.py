@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import copy
 import os
+import sys
 from pathlib import Path
 from django.core.exceptions import ImproperlyConfigured
 from datetime import timedelta
@@ -40,6 +42,9 @@ DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "*").split(",")
 
+# API 文档（/swagger/、/redoc/），关闭时不加载 drf_yasg
+SWAGGER_ENABLED = os.getenv("SWAGGER_ENABLED", "True") == "True"
+
 # Application definition
 INSTALLED_APPS = [
     "django.contrib.auth",
@@ -48,15 +53,17 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
-    "drf_yasg",
     "corsheaders",
     "core",
     "users",
 ]
+if SWAGGER_ENABLED:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index("corsheaders"), "drf_yasg")
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # 添加白噪声静态文件中间件
+    "core.middleware.StaticFilesMiddleware",  # 白噪声静态文件中间件（支持 ASGI）
+    "core.middleware.ReplicaRoutingMiddleware",  # 读写分离（未配置只读副本时不生效）
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -113,10 +120,44 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        # 请求日志由 libs.request_log 在后台线程写入
+        "request": {
+            "handlers": ["file", "console"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
+
+def parse_rates(value):
+    """解析 "/api/users/profile/=0.1,/health=0" 形式的路由采样率"""
+    rates = {}
+    for item in filter(None, value.split(",")):
+        prefix, rate = item.rsplit("=", 1)
+        rates[prefix.strip()] = float(rate)
+    return rates
+
+
+# 请求日志设置
+REQUEST_LOG = {
+    "ENABLED": os.getenv("REQUEST_LOG_ENABLED", "True") == "True",
+    "SAMPLE_RATE": float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0")),  # 默认采样率
+    "ROUTE_SAMPLE_RATES": parse_rates(os.getenv("REQUEST_LOG_ROUTE_SAMPLE_RATES", "")),  # 按路径前缀覆盖
+    "ALWAYS_LOG_STATUS": int(os.getenv("REQUEST_LOG_ALWAYS_LOG_STATUS", "400")),  # 不低于该状态码的响应始终记录
+    "SLOW_THRESHOLD": float(os.getenv("REQUEST_LOG_SLOW_THRESHOLD", "1.0")),  # 慢请求始终记录（秒）
+    "MAX_BODY_BYTES": int(os.getenv("REQUEST_LOG_MAX_BODY_BYTES", "4096")),
+    "BODY_METHODS": ["POST", "PUT", "PATCH"],
+    "HEADERS": ["User-Agent", "Referer", "X-Request-Id"],
+    "REDACT_FIELDS": ["password", "token", "secret", "authorization", "cookie", "credential"],
+    "QUEUE_SIZE": int(os.getenv("REQUEST_LOG_QUEUE_SIZE", "10000")),
+}
+
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+
+# ASGI 部署（config/asgi.py 默认开启）时 profile / login / logout 使用 users/async_views.py 中的异步视图
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False") == "True"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -136,42 +177,209 @@ CORS_ALLOW_METHODS = [
 ]
 
 # Database
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("DB_NAME"),
-        "USER": os.getenv("DB_USER"),
-        "PASSWORD": os.getenv("DB_PASSWORD"),
-        "HOST": os.getenv("DB_HOST"),
-        "PORT": os.getenv("DB_PORT"),
-        "CONN_MAX_AGE": 60,
-        "OPTIONS": {
-            "client_encoding": "UTF8",
-        },
+# DB_ENGINE=sqlite 时使用本地 SQLite 文件（DB_NAME 为文件路径），便于本地开发与基准测试
+# DB_POOL_ENABLED=True 时 PostgreSQL 使用带连接池的后端（libs/db_pool），请求结束时连接归还到池中
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "False") == "True"
+if os.getenv("DB_ENGINE", "postgresql") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("DB_NAME") or str(BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                "timeout": 20,
+            },
+        }
     }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "libs.db_pool" if DB_POOL_ENABLED else "django.db.backends.postgresql",
+            "NAME": os.getenv("DB_NAME"),
+            "USER": os.getenv("DB_USER"),
+            "PASSWORD": os.getenv("DB_PASSWORD"),
+            "HOST": os.getenv("DB_HOST"),
+            "PORT": os.getenv("DB_PORT"),
+            # ASGI 下异步 ORM 的查询在线程池中执行，持久连接无法按请求回收，因此不保留；
+            # 连接池模式下请求结束即归还到池中
+            "CONN_MAX_AGE": 0 if ASYNC_VIEWS or DB_POOL_ENABLED else 60,
+            "OPTIONS": {
+                "client_encoding": "UTF8",
+            },
+        }
+    }
+    if DB_POOL_ENABLED:
+        # 每个 worker 进程一个池，max_size 默认与线程数一致
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE") or os.getenv("GUNICORN_THREADS") or "4"),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "check_idle": float(os.getenv("DB_POOL_CHECK_IDLE", "10")),
+        }
+
+# 只读副本（core.db_router）：DB_REPLICA_HOSTS 为逗号分隔的 host[:port]，其余连接参数与主库相同；
+# DB_REPLICA_SIMULATE=True 时增加一个与主库连接参数相同的 replica 别名，用于本地模拟
+DB_REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+DB_REPLICAS = {
+    f"replica{index}": {
+        "HOST": host.partition(":")[0],
+        "PORT": host.partition(":")[2] or DATABASES["default"].get("PORT"),
+    }
+    for index, host in enumerate(DB_REPLICA_HOSTS, 1)
+}
+if os.getenv("DB_REPLICA_SIMULATE", "False") == "True":
+    DB_REPLICAS["replica"] = {}
+DATABASES.update(
+    {
+        alias: {**copy.deepcopy(DATABASES["default"]), **overrides, "TEST": {"MIRROR": "default"}}
+        for alias, overrides in DB_REPLICAS.items()
+    }
+)
+DB_REPLICATION = {
+    "REPLICAS": list(DB_REPLICAS),
+    "STICKY_SECONDS": int(os.getenv("DB_REPLICA_STICKY_SECONDS", "15")),  # 写入后固定读主库的时长
+    "HEALTH_CHECK_INTERVAL": float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5")),
+    "MAX_LAG": float(os.getenv("DB_REPLICA_MAX_LAG", "5")),  # 复制延迟超过该秒数的副本暂不使用
+    "PIN_CACHE": "shared",
 }
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"] if DB_REPLICAS else []
 
 # Cache settings
+# default：进程内 L1 + 共享 L2 的多级缓存；shared：多个 worker 共享的 L2（Redis）
+# 未设置 CACHE_REDIS_URL 时 shared 为进程内缓存，仅适用于开发与测试（单进程），多 worker 时 gunicorn 拒绝启动
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
-        "TIMEOUT": 300,  # 5 minutes default
+        "BACKEND": "libs.cache.TieredCache",
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "300")),  # 5 minutes default
         "OPTIONS": {
-            "MAX_ENTRIES": 1000,  # 最大缓存条目数
-            "CULL_FREQUENCY": 3,  # 当达到最大条目数时，清除比例为 1/CULL_FREQUENCY
+            "L2": "shared",
+            "SERIALIZER": os.getenv("CACHE_SERIALIZER", "pickle"),  # pickle / msgpack
+            "L1_TIMEOUT": int(os.getenv("CACHE_L1_TIMEOUT", "30")),  # L1 最长保留时间（秒）
+            "L1_MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+            "L1_MAX_BYTES": int(os.getenv("CACHE_L1_MAX_BYTES", str(64 * 1024 * 1024))),
         },
-    }
+    },
+    "shared": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_REDIS_URL"),
+            "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "300")),
+        }
+        if os.getenv("CACHE_REDIS_URL")
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "shared",
+            "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "300")),
+            "OPTIONS": {
+                "MAX_ENTRIES": int(os.getenv("CACHE_L2_MAX_ENTRIES", "100000")),
+            },
+        }
+    ),
+}
+
+# JSON 渲染（libs.fastjson）
+JSON_RENDERER = {
+    "BACKEND": os.getenv("JSON_RENDERER_BACKEND", "auto"),  # auto / orjson / json
+    "STREAM_CHUNK_SIZE": int(os.getenv("JSON_RENDERER_STREAM_CHUNK_SIZE", "200")),  # 流式输出每个分块的元素数
+}
+
+# 查询预算与 N+1 检测（libs.query_budget），测试环境默认超出即报错
+TESTING = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+QUERY_BUDGET = {
+    "MODE": os.getenv("QUERY_BUDGET_MODE", "raise" if TESTING else "log"),  # raise / log / off
+    "SAMPLE_RATE": float(os.getenv("QUERY_BUDGET_SAMPLE_RATE", "0.05")),  # log 模式下的采样率
+    "N_PLUS_ONE_THRESHOLD": int(os.getenv("QUERY_BUDGET_N_PLUS_ONE_THRESHOLD", "5")),
+}
+
+# 请求耗时统计（libs.metrics）
+METRICS = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "True") == "True",
+    # Server-Timing 响应头包含查询次数等内部信息：默认只在 DEBUG 下返回给所有客户端，
+    # 其余情况只返回给 SERVER_TIMING_IPS 中的地址
+    "SERVER_TIMING": (os.getenv("METRICS_SERVER_TIMING") or str(DEBUG)) == "True",
+    "SERVER_TIMING_IPS": [ip for ip in os.getenv("METRICS_SERVER_TIMING_IPS", "").split(",") if ip],
+    "TOKEN": os.getenv("METRICS_TOKEN", ""),  # /metrics 访问令牌，留空则不校验
+    "SHM_PATH": os.getenv("METRICS_SHM_PATH"),  # 文件名前缀，默认 /dev/shm/django-metrics（实际文件名附带布局版本）
+    "SHM_SLOTS": int(os.getenv("METRICS_SHM_SLOTS", "4096")),
+    "BUCKETS": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+}
+
+# 视图响应缓存（libs.response_cache）
+RESPONSE_CACHE = {
+    "ENABLED": os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True",
+    "ALIAS": os.getenv("RESPONSE_CACHE_ALIAS", "default"),
+    "LOCK_TIMEOUT": int(os.getenv("RESPONSE_CACHE_LOCK_TIMEOUT", "10")),  # single-flight 锁最长持有时间（秒）
+    "WAIT_TIMEOUT": float(os.getenv("RESPONSE_CACHE_WAIT_TIMEOUT", "5")),  # 等待其他请求计算结果的最长时间（秒）
+    "POLL_INTERVAL": float(os.getenv("RESPONSE_CACHE_POLL_INTERVAL", "0.02")),
+}
+
+# 限流设置
+RATE_LIMIT = {
+    "BACKEND": os.getenv("RATE_LIMIT_BACKEND", "shm"),  # shm / redis / memory
+    "SHM_PATH": os.getenv("RATE_LIMIT_SHM_PATH"),  # 文件名前缀，默认 /dev/shm/django-ratelimit（实际文件名附带布局版本）
+    "SHM_SLOTS": int(os.getenv("RATE_LIMIT_SHM_SLOTS", "65536")),
+    "REDIS_URL": os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"),
 }
 
 # JWT settings
 JWT_AUTH = {
-    "JWT_EXPIRATION_DELTA": timedelta(days=int(os.getenv("JWT_EXPIRATION_DELTA", "7"))),
+    # 访问令牌（分钟）：无状态校验，已校验的令牌在进程内缓存到过期，吊销对其他进程的延迟不超过该有效期；
+    # 会话吊销状态保存在数据库（UserSession），刷新时检查
+    "JWT_EXPIRATION_DELTA": timedelta(minutes=int(os.getenv("JWT_EXPIRATION_MINUTES", "15"))),
+    # 刷新令牌（天）：每次刷新轮换，有效期从刷新时重新计算
     "JWT_REFRESH_EXPIRATION_DELTA": timedelta(
         days=int(os.getenv("JWT_REFRESH_EXPIRATION_DELTA", "30"))
     ),
-    "JWT_ALLOW_REFRESH": True,
+    "JWT_ALLOW_REFRESH": os.getenv("JWT_ALLOW_REFRESH", "True").lower() == "true",
     "JWT_AUTH_HEADER_PREFIX": "Bearer",
+    # 签名算法：HS256（使用 SECRET_KEY）/ RS256 / EdDSA
+    "JWT_ALGORITHM": os.getenv("JWT_ALGORITHM", "HS256"),
+    "JWT_KEYS_DIR": Path(os.getenv("JWT_KEYS_DIR", BASE_DIR / "keys")),
+    "JWT_KEY_ROTATION_INTERVAL": timedelta(
+        days=int(os.getenv("JWT_KEY_ROTATION_INTERVAL", "30"))
+    ),
+    # 新密钥在启用前提前发布到 JWKS 的时间
+    "JWT_KEY_PUBLISH_AHEAD": timedelta(
+        hours=int(os.getenv("JWT_KEY_PUBLISH_AHEAD", "24"))
+    ),
+    "JWT_KEY_AUTO_ROTATE": os.getenv("JWT_KEY_AUTO_ROTATE", "False").lower() == "true",
+    # 访问令牌校验缓存：进程内 L1（到令牌 exp）+ 共享缓存中的会话状态与用户对象（数据库的副本），
+    # 关闭后每次认证查询数据库
+    "TOKEN_CACHE_ENABLED": os.getenv("JWT_TOKEN_CACHE_ENABLED", "True").lower() == "true",
+    "TOKEN_CACHE_ALIAS": "shared",  # token 缓存自带进程内层，直接使用共享缓存
+    "TOKEN_CACHE_TIMEOUT": int(os.getenv("JWT_TOKEN_CACHE_TIMEOUT", "300")),  # 共享缓存（秒）
+    "TOKEN_CACHE_LOCAL_MAX_ENTRIES": 10000,  # 进程内缓存的令牌数（已吊销会话的负缓存同样大小）
+}
+
+# UserToken / UserSession 生命周期
+TOKEN_LIFECYCLE = {
+    "PURGE_GRACE_DAYS": int(os.getenv("TOKEN_PURGE_GRACE_DAYS", "7")),  # 过期/失效多少天后清理
+    "BATCH_SIZE": int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "1000")),
+    "PARTITION_MONTHS_AHEAD": 3,  # 预先创建的未来分区数（仅 PostgreSQL 分区模式）
+}
+
+# 软删除归档（manage.py archive_deleted）
+SOFT_DELETE = {
+    "ARCHIVE_AFTER_DAYS": int(os.getenv("SOFT_DELETE_ARCHIVE_DAYS", "90")),  # 软删除多少天后归档
+    "ARCHIVE_BATCH_SIZE": int(os.getenv("SOFT_DELETE_ARCHIVE_BATCH_SIZE", "1000")),
+}
+
+# 用户批量接口
+BULK_USERS = {
+    "MAX_ITEMS": int(os.getenv("BULK_USERS_MAX_ITEMS", "10000")),  # 单次请求最多的项数
+    "MAX_BYTES": int(os.getenv("BULK_USERS_MAX_BYTES", str(10 * 1024 * 1024))),  # 请求体上限
+    "CHUNK_SIZE": int(os.getenv("BULK_USERS_CHUNK_SIZE", "500")),  # 每块校验并在一个事务内写入的项数
+    "BATCH_SIZE": 500,  # bulk_create / bulk_update 每条 SQL 的行数
+}
+
+# 密码哈希执行器
+PASSWORD_HASHING = {
+    "EXECUTOR": os.getenv("PASSWORD_HASHING_EXECUTOR", "process"),  # process / thread / inline
+    "MAX_WORKERS": int(os.getenv("PASSWORD_HASHING_WORKERS", "2")),  # 每个 worker 的并发上限
+    "QUEUE_SIZE": int(os.getenv("PASSWORD_HASHING_QUEUE_SIZE", "4")),  # 允许排队的任务数
+    "QUEUE_TIMEOUT": float(os.getenv("PASSWORD_HASHING_QUEUE_TIMEOUT", "0.1")),  # 排队等待（秒）
+    "TIMEOUT": float(os.getenv("PASSWORD_HASHING_TIMEOUT", "5")),  # 单次哈希超时（秒）
 }
 
 # Password validation
@@ -255,12 +463,17 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.getenv("THROTTLE_ANON_RATE", "100/day"),
+        "user": os.getenv("THROTTLE_USER_RATE", "1000/day"),
+    },
     "EXCEPTION_HANDLER": "core.exceptions.custom_exception_handler",
 }
 
 # Swagger settings
 SWAGGER_SETTINGS = {
+    # 使用预生成的 schema（core/openapi.py），页面不再触发 schema 生成
+    "SPEC_URL": "openapi-schema-json",
     "USE_SESSION_AUTH": False,
     "SECURITY_DEFINITIONS": {
         "Bearer": {"type": "apiKey", "name": "Authorization", "in": "header"}
@@ -286,5 +499,17 @@ SWAGGER_SETTINGS = {
     },
 }
 
+REDOC_SETTINGS = {
+    "SPEC_URL": "openapi-schema-json",
+}
+
+# 预生成的 OpenAPI schema（manage.py build_openapi，缺失时首次请求生成）
+# 代码版本：构建时可设置为提交号，留空时使用项目源码的内容哈希
+CODE_VERSION = os.getenv("CODE_VERSION", "")
+OPENAPI_SCHEMA = {
+    "DIR": os.getenv("OPENAPI_SCHEMA_DIR") or str(BASE_DIR / "staticfiles" / "openapi"),
+    "MAX_AGE": int(os.getenv("OPENAPI_SCHEMA_MAX_AGE", "300")),  # 不带 ?v= 时的缓存时间（秒）
+}
+
 # 自定义用户模型
 AUTH_USER_MODEL = "users.User"
@@ -16,32 +16,36 @@ Including another URLconf
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-# Swagger文档视图
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Django Template API",
-        default_version="v1",
-        description="这是一个Django模板项目的API文档",
-        terms_of_service="",
-        contact=openapi.Contact(email="evan@liukersun.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from users.views import jwks
+from core.views import metrics, openapi_schema
 
 urlpatterns = [
     path("api/users/", include("users.urls")),
-    
-    # API文档
-    path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    path(".well-known/jwks.json", jwks, name="jwks"),
+    path("metrics", metrics, name="metrics"),
 ]
 
+# API文档：schema 预生成后按代码版本缓存，页面只渲染模板
+if settings.SWAGGER_ENABLED:
+    from rest_framework import permissions
+    from drf_yasg.views import get_schema_view
+    from core.openapi import get_info
+
+    # patterns=[]：页面渲染时不遍历接口，schema 由 openapi_schema 提供
+    schema_view = get_schema_view(
+        get_info(),
+        patterns=[],
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+    urlpatterns += [
+        path("swagger.json", openapi_schema, {"fmt": "json"}, name="openapi-schema-json"),
+        path("swagger.yaml", openapi_schema, {"fmt": "yaml"}, name="openapi-schema-yaml"),
+        path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
+        path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    ]
+
 # 在开发环境中提供静态文件服务
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
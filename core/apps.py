@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # 尽早注册 connection_created 接收器，保证所有数据库连接都安装了查询记录
+        from libs import metrics, query_budget  # noqa: F401
@@ -0,0 +1,113 @@
+"""
+条件请求（ETag / Last-Modified），基于 BaseModel.updated_at
+
+- 详情：ETag 由模型、主键与 updated_at 生成，同时返回 Last-Modified
+- 列表：分页查询之后，由当前页各行的主键与 updated_at、分页状态（总数、页码、是否有前后页等）、
+  请求地址与用户生成 ETag，响应体完全由这些值决定。不额外查询：总数仍按分页器的 count 模式计算
+  （游标分页 count=none 时没有 COUNT）。列表不返回 Last-Modified（删除不会改变 MAX(updated_at)）
+- If-None-Match（优先）或 If-Modified-Since 匹配时返回 304，不执行序列化与渲染
+  （ApiResponseRenderer 对 304 输出空响应体）
+- 响应带 Cache-Control: private, no-cache，客户端每次使用缓存前重新校验
+- ETag 包含代码版本（core.openapi.code_version），序列化格式随代码变更后旧的 ETag 失效
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import warmup
+from .openapi import code_version
+
+FIELD = "updated_at"
+DEFAULT_MEDIA_TYPE = "application/json"
+
+# 未设置 CODE_VERSION 时需读取源码计算哈希，启动时预先完成
+warmup.register(code_version)
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime = None
+
+
+def make_etag(*parts):
+    """弱 ETag：响应体由这些值决定，但不保证逐字节相同"""
+    source = "|".join(str(part) for part in (code_version(), *parts))
+    return f'W/"{hashlib.blake2b(source.encode(), digest_size=16).hexdigest()}"'
+
+
+def supports(model):
+    return any(field.name == FIELD for field in model._meta.concrete_fields)
+
+
+def for_object(instance, media_type=DEFAULT_MEDIA_TYPE):
+    """单个对象的校验值，模型没有 updated_at 时返回 None"""
+    if not supports(type(instance)):
+        return None
+    updated_at = getattr(instance, FIELD)
+    etag = make_etag(instance._meta.label_lower, instance.pk, updated_at.isoformat(), media_type)
+    return Validators(etag, updated_at)
+
+
+def for_page(request, model, rows, state, media_type=DEFAULT_MEDIA_TYPE):
+    """
+    列表一页的校验值，模型没有 updated_at 时返回 None
+    :param rows: 当前页的模型实例或具名元组（包含主键与 updated_at）
+    :param state: 分页状态，见 CustomPageNumberPagination.get_page_state
+    """
+    if not supports(model):
+        return None
+    pk = model._meta.pk.attname
+    source = ",".join(f"{getattr(row, pk)}@{getattr(row, FIELD).isoformat()}" for row in rows)
+    etag = make_etag(
+        model._meta.label_lower,
+        request.build_absolute_uri(),
+        getattr(request.user, "pk", None),
+        state,
+        hashlib.blake2b(source.encode(), digest_size=16).hexdigest(),
+        media_type,
+    )
+    return Validators(etag)
+
+
+def is_not_modified(request, validators):
+    """按 RFC 9110 判断 GET / HEAD 请求的缓存是否仍然有效：有 If-None-Match 时忽略 If-Modified-Since"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if "*" in etags:
+            return True
+        opaque = validators.etag.removeprefix("W/")
+        return any(etag.removeprefix("W/") == opaque for etag in etags)
+    if validators.last_modified is not None:
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        return since is not None and int(validators.last_modified.timestamp()) <= since
+    return False
+
+
+def set_headers(response, validators):
+    response["ETag"] = validators.etag
+    if validators.last_modified is not None:
+        response["Last-Modified"] = http_date(validators.last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def respond(request, validators, build):
+    """校验通过时返回 304，否则调用 build() 生成响应；成功响应附带校验头"""
+    if validators is None:
+        return build()
+    if is_not_modified(request, validators):
+        return set_headers(Response(status=status.HTTP_304_NOT_MODIFIED), validators)
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        set_headers(response, validators)
+    return response
@@ -0,0 +1,210 @@
+"""
+读写分离：只读副本路由与读己之写
+
+- ReplicaRoutingMiddleware 为每个请求建立路由状态：GET / HEAD / OPTIONS 请求的读查询发往副本，其余请求读主库
+- JWT 认证中的用户查询（auth_reads）不论请求方法都走副本
+- 请求中发生写入后，本请求剩余的读查询改读主库；请求结束时该用户（JWT 中的 user_id，或登录接口设置的用户）
+  在 STICKY_SECONDS 内被固定到主库，之后的请求不会读到副本上的旧数据。固定标记保存在共享缓存中，多个 worker 可见
+- 副本按轮询选择；每个进程的后台线程定期检查副本（连接、复制延迟），不可用或延迟超过 MAX_LAG 的副本暂不使用，
+  全部不可用时读主库
+- 事务（atomic）中的读查询与会话等 PRIMARY_APPS 的模型始终读主库；副本不执行迁移
+
+未配置副本时不安装路由，见 settings.DB_REPLICATION。
+"""
+
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from libs.logging import logger
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PRIMARY_APPS = {"sessions"}
+PIN_KEY = "db_router:pin:{}"
+# PostgreSQL 副本的复制延迟（秒）；WAL 已全部回放时为 0，主库上为 0
+LAG_SQL = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class RoutingState:
+    """单个请求的路由状态；ContextVar 中保存同一个对象，sync_to_async 切换线程后的修改同样可见"""
+
+    __slots__ = ("read_replica", "auth_lookup", "user_id", "pinned", "wrote")
+
+    def __init__(self, read_replica):
+        self.read_replica = read_replica
+        self.auth_lookup = False
+        self.user_id = None
+        self.pinned = None
+        self.wrote = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+class ReplicaSet:
+    """副本别名的健康感知轮询"""
+
+    def __init__(self, aliases, check_interval, max_lag):
+        self.aliases = tuple(aliases)
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._healthy = self.aliases
+        self._counter = itertools.count()
+        self._monitor_pid = None
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """轮询选择一个可用的副本，没有可用副本时返回 None"""
+        if self._monitor_pid != os.getpid():
+            self._start_monitor()
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    @property
+    def healthy(self):
+        return self._healthy
+
+    def _start_monitor(self):
+        # 每个 worker 进程一个检查线程（fork 后线程不会被继承）
+        with self._lock:
+            if self._monitor_pid == os.getpid():
+                return
+            self._monitor_pid = os.getpid()
+            threading.Thread(target=self._monitor, name="db-replica-monitor", daemon=True).start()
+
+    def _monitor(self):
+        while True:
+            self.check()
+            time.sleep(self.check_interval)
+
+    def check(self):
+        """检查所有副本并更新可用列表"""
+        healthy = []
+        for alias in self.aliases:
+            try:
+                lag = self.replication_lag(alias)
+            except Exception as exc:
+                if alias in self._healthy:
+                    logger.warning(f"数据库副本 {alias} 不可用: {exc}")
+                continue
+            if lag > self.max_lag:
+                if alias in self._healthy:
+                    logger.warning(f"数据库副本 {alias} 复制延迟 {lag:.1f}s，超过 {self.max_lag}s，暂不使用")
+                continue
+            if alias not in self._healthy:
+                logger.info(f"数据库副本 {alias} 已恢复")
+            healthy.append(alias)
+        self._healthy = tuple(healthy)
+        return self._healthy
+
+    @staticmethod
+    def replication_lag(alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_SQL if connection.vendor == "postgresql" else "SELECT 0")
+                return float(cursor.fetchone()[0] or 0)
+        finally:
+            connection.close()
+
+
+_replicas = None
+
+
+def get_replicas():
+    global _replicas
+    if _replicas is None:
+        conf = settings.DB_REPLICATION
+        _replicas = ReplicaSet(conf["REPLICAS"], conf["HEALTH_CHECK_INTERVAL"], conf["MAX_LAG"])
+    return _replicas
+
+
+def get_pin_cache():
+    return caches[settings.DB_REPLICATION["PIN_CACHE"]]
+
+
+def is_pinned(user_id):
+    return get_pin_cache().get(PIN_KEY.format(user_id)) is not None
+
+
+def pin_primary(user_id):
+    """将用户固定到主库 STICKY_SECONDS 秒"""
+    get_pin_cache().set(PIN_KEY.format(user_id), 1, settings.DB_REPLICATION["STICKY_SECONDS"])
+
+
+def begin_request(method):
+    """开始一个请求的路由，返回 (state, token)，结束时调用 finish_request(token)"""
+    state = RoutingState(read_replica=method in SAFE_METHODS)
+    return state, _state.set(state)
+
+
+def finish_request(token):
+    _state.reset(token)
+
+
+def set_request_user(user_id):
+    """记录当前请求的用户，请求中有写入时结束后固定到主库（登录等未经认证的接口调用）"""
+    state = _state.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+@contextmanager
+def auth_reads(user_id):
+    """JWT 认证：记录请求用户，代码块中的读查询走副本（用户已固定到主库时除外）"""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    state.user_id = user_id
+    state.auth_lookup = True
+    try:
+        yield
+    finally:
+        state.auth_lookup = False
+
+
+class ReplicaRouter:
+    """读查询按请求状态发往副本，写入与迁移只在主库"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not (state.read_replica or state.auth_lookup):
+            return None
+        if model._meta.app_label in PRIMARY_APPS or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if state.pinned is None and state.user_id is not None:
+            state.pinned = is_pinned(state.user_id)
+        if state.pinned:
+            return None
+        return get_replicas().choose()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # 读己之写：本请求之后的读查询改读主库
+            state.wrote = True
+            state.read_replica = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与主库数据相同
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DB_REPLICATION["REPLICAS"]:
+            return False
+        return None
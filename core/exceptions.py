@@ -78,8 +78,29 @@ class ValidationError(BusinessException):
     default_code = 'validation_error'
 
 
+class AuthenticationError(BusinessException):
+    """认证异常"""
+    status_code = status.HTTP_401_UNAUTHORIZED
+    default_detail = '认证失败'
+    default_code = 'authentication_failed'
+
+
 class PermissionError(BusinessException):
     """权限异常"""
     status_code = status.HTTP_403_FORBIDDEN
     default_detail = '权限不足'
     default_code = 'permission_denied'
+
+
+class ServiceUnavailableError(BusinessException):
+    """服务繁忙异常"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = '服务繁忙，请稍后再试'
+    default_code = 'service_unavailable'
+
+
+class PayloadTooLargeError(BusinessException):
+    """请求体过大异常"""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = '请求数据过大'
+    default_code = 'payload_too_large'
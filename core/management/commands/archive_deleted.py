@@ -0,0 +1,38 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.archive import archive_deleted, soft_delete_models
+
+
+class Command(BaseCommand):
+    help = "将软删除超过保留期的记录分批移入归档表（core.ArchivedRecord）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models", nargs="*", help="模型，如 users.User，默认所有继承 BaseModel 的模型"
+        )
+        parser.add_argument("--days", type=int, help="软删除超过多少天的记录才归档")
+        parser.add_argument("--batch-size", type=int, help="每批归档的行数")
+        parser.add_argument("--max-batches", type=int, help="单次运行最多执行的批次数")
+
+    def handle(self, *args, **options):
+        models = []
+        for label in options["models"]:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError):
+                raise CommandError(f"未知模型: {label}")
+            if model not in soft_delete_models():
+                raise CommandError(f"{label} 不支持软删除")
+            models.append(model)
+
+        stats = archive_deleted(
+            models=models or None,
+            days=options["days"],
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        details = "，".join(f"{label} {count} 行" for label, count in stats.models.items()) or "无"
+        self.stdout.write(
+            f"归档 {stats.rows_archived} 行（{stats.batches} 批）：{details}，耗时 {stats.duration:.3f}s"
+        )
@@ -0,0 +1,112 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from libs import db_pool
+from libs.benchmark import summarize
+
+MODES = ("direct", "persistent", "pool")
+
+
+class Command(BaseCommand):
+    help = (
+        "PostgreSQL 连接方式对比：每请求新建连接（direct）、CONN_MAX_AGE 持久连接（persistent）、连接池（pool）。"
+        "多个线程模拟请求（取连接 -> SELECT 1 -> 请求结束），测量吞吐量与延迟，并输出连接池统计"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default=",".join(MODES), help=f"逗号分隔，可选 {', '.join(MODES)}")
+        parser.add_argument("--threads", type=int, default=8, help="并发线程数")
+        parser.add_argument("--duration", type=float, default=5, help="每种方式的测试时长（秒）")
+        parser.add_argument("--min-size", type=int, default=2)
+        parser.add_argument("--max-size", type=int, default=4, help="连接池上限，小于线程数时可观察等待")
+        parser.add_argument("--max-lifetime", type=float, default=1800)
+
+    def handle(self, *args, **options):
+        modes = [name.strip() for name in options["modes"].split(",") if name.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"未知方式: {', '.join(sorted(unknown))}")
+        base = settings.DATABASES["default"]
+        if base["ENGINE"] not in ("django.db.backends.postgresql", db_pool.ENGINE):
+            raise CommandError("需要 PostgreSQL（DB_ENGINE=postgresql）")
+
+        self.stdout.write(f"{options['threads']} 线程，每种方式 {options['duration']}s")
+        for mode in modes:
+            alias = f"bench_{mode}"
+            self.configure(alias, mode, base, options)
+            try:
+                result = self.run(alias, options)
+                self.stdout.write(
+                    f"{mode:<10} {result['throughput']:>9.1f} req/s  p50 {result['p50_ms']:>7.3f}ms  "
+                    f"p99 {result['p99_ms']:>8.3f}ms  errors {result['errors']}"
+                )
+                if mode == "pool":
+                    stats, _ = connections[alias].pool.stats()
+                    checkouts = stats["checkouts"] or 1
+                    self.stdout.write(
+                        f"{'':<10} 连接 {stats['size']}（空闲 {stats['idle']}）  取出 {stats['checkouts']} 次，"
+                        f"平均 {stats['checkout_seconds'] / checkouts * 1000:.3f}ms  "
+                        f"超时 {stats['timeouts']}  新建 {stats['opened']}  关闭 {stats['closed']}"
+                    )
+            finally:
+                connections[alias].close()
+                del connections[alias]
+                del connections.settings[alias]
+        db_pool.close_pools()
+
+    def configure(self, alias, mode, base, options):
+        conf = {
+            **base,
+            "ENGINE": "django.db.backends.postgresql",
+            "CONN_MAX_AGE": 60 if mode == "persistent" else 0,
+            "OPTIONS": {key: value for key, value in base["OPTIONS"].items() if key != "pool"},
+        }
+        if mode == "pool":
+            conf["ENGINE"] = db_pool.ENGINE
+            conf["OPTIONS"]["pool"] = {
+                "min_size": options["min_size"],
+                "max_size": options["max_size"],
+                "max_lifetime": options["max_lifetime"],
+            }
+        # configure_settings 要求包含 default，借用该键补全默认配置
+        connections.settings[alias] = connections.configure_settings({"default": conf})["default"]
+
+    def run(self, alias, options):
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options["duration"]
+
+        def worker():
+            nonlocal errors
+            connection = connections[alias]
+            local = []
+            failed = 0
+            while time.perf_counter() < deadline:
+                began = time.perf_counter()
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                        cursor.fetchone()
+                    local.append(time.perf_counter() - began)
+                except Exception:
+                    failed += 1
+                finally:
+                    # 与 request_finished 信号相同的处理
+                    connection.close_if_unusable_or_obsolete()
+            connection.close()
+            with lock:
+                latencies.extend(local)
+                errors += failed
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summarize(latencies, time.perf_counter() - began, errors)
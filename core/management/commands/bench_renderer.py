@@ -0,0 +1,108 @@
+import datetime
+import decimal
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from core.renderers import ApiResponseRenderer, iter_envelope
+from libs import fastjson
+
+
+class LegacyRenderer(JSONRenderer):
+    """改造前的 ApiResponseRenderer：每次检查统一格式后重新包装，交给 DRF 的标准库 json 编码"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if renderer_context is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        response = renderer_context.get("response")
+        if isinstance(data, dict) and {"status", "message", "data"}.issubset(data.keys()):
+            return super().render(data, accepted_media_type, renderer_context)
+        status_code = getattr(response, "status_code", 200)
+        status_label = "success" if status_code < 400 else "error"
+        unified_data = {
+            "status": status_label,
+            "message": "操作成功" if status_label == "success" else "请求错误",
+            "data": data if status_label == "success" else None,
+        }
+        return super().render(unified_data, accepted_media_type, renderer_context)
+
+
+def build_page(size, typed):
+    """typed 为 True 时包含 datetime / UUID / Decimal，否则与 UserSerializer 的输出相同"""
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+    results = []
+    for i in range(size):
+        row = {
+            "id": i,
+            "username": f"user_{i}",
+            "email": f"user_{i}@example.com",
+            "phone": None,
+            "is_active": True,
+            "created_at": "2024-01-01 12:00:00",
+            "updated_at": "2024-01-01 12:00:00",
+        }
+        if typed:
+            row.update(
+                uuid=uuid.UUID(int=i),
+                balance=decimal.Decimal("12.50"),
+                date_joined=now,
+                introduction="简介\u2028第二行",
+            )
+        results.append(row)
+    return {
+        "total": size * 10,
+        "total_pages": 10,
+        "current_page": 1,
+        "page_size": size,
+        "results": results,
+        "links": {"next": "http://testserver/api/users/?page=2", "previous": None},
+    }
+
+
+class Command(BaseCommand):
+    help = "渲染器基准测试：对比改造前的 ApiResponseRenderer 与当前实现"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000", help="逗号分隔的列表长度")
+        parser.add_argument("--seconds", type=float, default=1.0, help="每项测试的时长（秒）")
+
+    def measure(self, func):
+        func()
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < self.seconds:
+            func()
+            count += 1
+        return (time.perf_counter() - started) / count * 1e6
+
+    def handle(self, *args, **options):
+        self.seconds = options["seconds"]
+        legacy = LegacyRenderer()
+        current = ApiResponseRenderer()
+        self.stdout.write(f"JSON 后端: {fastjson.get_backend().name}")
+
+        cases = [
+            (kind, int(size))
+            for kind in ("plain", "typed")
+            for size in options["sizes"].split(",")
+        ]
+        for kind, size in cases:
+            page = build_page(size, kind == "typed")
+            context = {"response": Response(status=200)}
+            expected = legacy.render(page, "application/json", context)
+            actual = current.render(page, "application/json", context)
+            if expected != actual:
+                raise CommandError(f"{kind} size={size} 时渲染结果与改造前不一致")
+            streamed = b"".join(iter_envelope(page["results"]))
+            if streamed != legacy.render(page["results"], "application/json", context):
+                raise CommandError(f"{kind} size={size} 时流式输出与改造前不一致")
+
+            before = self.measure(lambda: legacy.render(page, "application/json", context))
+            after = self.measure(lambda: current.render(page, "application/json", context))
+            self.stdout.write(
+                f"{kind:<6} size={size:<6} 改造前 {before:>10.1f}us  当前 {after:>10.1f}us  "
+                f"加速 {before / after:>5.2f}x  ({len(actual)} bytes)"
+            )
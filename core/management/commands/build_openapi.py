@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import openapi
+
+
+class Command(BaseCommand):
+    help = "生成当前代码版本的 OpenAPI schema（JSON / YAML 及 gzip），构建镜像时在 collectstatic 之后执行"
+
+    def handle(self, *args, **options):
+        if not settings.SWAGGER_ENABLED:
+            raise CommandError("SWAGGER_ENABLED=False，未启用 API 文档")
+        artifacts = openapi.build()
+        for fmt, artifact in artifacts.items():
+            self.stdout.write(
+                f"{openapi.artifact_path(artifact.version, fmt)}  {len(artifact.content)} bytes, "
+                f"gzip {len(artifact.compressed)} bytes, ETag {artifact.etag}"
+            )
@@ -1,67 +1,171 @@
 import time
-import json
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+from libs import metrics
+from . import db_router
+from libs.request_log import request_log
 
 logger = logging.getLogger('django')
 
-class RequestLogMiddleware:
-    """请求日志中间件"""
-    
+
+class AsyncCapableMiddleware:
+    """同时支持 WSGI 与 ASGI：get_response 为协程时 __call__ 返回协程，不经过线程切换"""
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-        
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+class StaticFilesMiddleware(AsyncCapableMiddleware, WhiteNoiseMiddleware):
+    """
+    支持 ASGI 的 WhiteNoise 中间件
+    WhiteNoiseMiddleware 只支持同步调用，ASGI 下会让其后的整条中间件链多两次线程切换；
+    这里只在命中静态文件时切换线程读取文件，其余请求直接 await 下游
+    """
+
+    def __init__(self, get_response):
+        WhiteNoiseMiddleware.__init__(self, get_response)
+        AsyncCapableMiddleware.__init__(self, get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return WhiteNoiseMiddleware.__call__(self, request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """
+    读写分离中间件（见 core.db_router）
+    为请求建立路由状态；请求中有写入且已知用户时，返回响应前将该用户固定到主库
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = db_router.begin_request(request.method)
+        try:
+            return self.get_response(request)
+        finally:
+            db_router.finish_request(token)
+            if state.wrote and state.user_id is not None:
+                db_router.pin_primary(state.user_id)
+
+    async def __acall__(self, request):
+        state, token = db_router.begin_request(request.method)
+        try:
+            return await self.get_response(request)
+        finally:
+            db_router.finish_request(token)
+            if state.wrote and state.user_id is not None:
+                await sync_to_async(db_router.pin_primary)(state.user_id)
+
+
+class RequestLogMiddleware(AsyncCapableMiddleware):
+    """
+    请求日志中间件
+    每个请求生成一条包含请求与响应的记录，交给后台线程写入（见 libs.request_log）
+    """
+
     def __call__(self, request):
-        # 记录请求信息
-        request_data = {
-            'path': request.path,
-            'method': request.method,
-            'query_params': request.GET.dict(),
-            'client_ip': request.META.get('REMOTE_ADDR'),
-            'user_agent': request.META.get('HTTP_USER_AGENT'),
-        }
-        
-        # 如果是POST/PUT/PATCH请求，记录请求体
-        if request.method in ['POST', 'PUT', 'PATCH']:
-            try:
-                request_data['body'] = json.loads(request.body) if request.body else None
-            except json.JSONDecodeError:
-                request_data['body'] = 'Invalid JSON'
-                
-        logger.info(f'Request: {json.dumps(request_data)}')
-        
+        if self.is_async:
+            return self.__acall__(request)
+        body, note = request_log.capture_body(request)
+        start_time = time.perf_counter()
         response = self.get_response(request)
-        
-        # 记录响应信息
-        response_data = {
-            'status_code': response.status_code,
-            'path': request.path,
-            'method': request.method,
-        }
-        
-        logger.info(f'Response: {json.dumps(response_data)}')
-        
+        self.log(request, response, time.perf_counter() - start_time, body, note)
+        return response
+
+    async def __acall__(self, request):
+        # ASGI 请求体在进入中间件前已读入，capture_body 不会阻塞
+        body, note = request_log.capture_body(request)
+        start_time = time.perf_counter()
+        response = await self.get_response(request)
+        self.log(request, response, time.perf_counter() - start_time, body, note)
         return response
 
+    def log(self, request, response, duration, body, note):
+        if request_log.should_log(request.path, response.status_code, duration):
+            request_log.submit(request_log.build_record(request, response, duration, body, note))
+
+
+class ResponseTimeMiddleware(AsyncCapableMiddleware):
+    """
+    响应时间中间件
+    记录分段耗时并写入 Server-Timing 响应头，同时计入跨 worker 的耗时直方图（见 libs.metrics）
+    """
 
-class ResponseTimeMiddleware:
-    """响应时间中间件"""
-    
     def __init__(self, get_response):
-        self.get_response = get_response
-        
+        super().__init__(get_response)
+        conf = settings.METRICS
+        self.enabled = conf["ENABLED"]
+        self.server_timing = conf["SERVER_TIMING"]
+        self.server_timing_ips = frozenset(conf["SERVER_TIMING_IPS"])
+
     def __call__(self, request):
-        start_time = time.time()
-        
-        response = self.get_response(request)
-        
-        duration = time.time() - start_time
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            start_time = time.perf_counter()
+            response = self.get_response(request)
+            return self.finish(request, response, time.perf_counter() - start_time)
+
+        timings, token = metrics.start_request()
+        start_time = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start_time
+            metrics.finish_request(token)
+        return self.finish(request, response, duration, timings)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            start_time = time.perf_counter()
+            response = await self.get_response(request)
+            return self.finish(request, response, time.perf_counter() - start_time)
+
+        # ContextVar 随协程传递，sync_to_async 执行的 ORM 查询同样计入本请求
+        timings, token = metrics.start_request()
+        start_time = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start_time
+            metrics.finish_request(token)
+        return self.finish(request, response, duration, timings)
+
+    def finish(self, request, response, duration, timings=None):
+        if timings is not None:
+            if self.server_timing or request.META.get("REMOTE_ADDR") in self.server_timing_ips:
+                response["Server-Timing"] = timings.server_timing(duration)
+            match = getattr(request, "resolver_match", None)
+            route = match.route if match is not None else "unmatched"
+            metrics.get_registry().observe(
+                request.method, route, response.status_code, duration, timings
+            )
+
         response['X-Response-Time'] = f'{duration:.3f}s'
-        
+
         # 如果响应时间超过1秒，记录警告日志
         if duration > 1:
             logger.warning(
                 f'Slow response detected: {request.path} - {duration:.3f}s'
             )
-            
-        return response 
\ No newline at end of file
+
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-18 19:29
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='模型')),
+                ('object_pk', models.CharField(max_length=64, verbose_name='原主键')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='数据')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='删除时间')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '归档记录',
+                'verbose_name_plural': '归档记录',
+                'indexes': [models.Index(fields=['model', 'object_pk'], name='archived_model_pk_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,48 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.dispatch import Signal
 from django.utils import timezone
 
+# 批量软删除 / 恢复后发送（单条 UPDATE，不会触发 post_save），参数：sender=模型类, count=影响行数
+soft_deleted = Signal()
+restored = Signal()
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """支持批量软删除 / 恢复的 QuerySet"""
+
+    def soft_delete(self):
+        """单条 UPDATE 软删除，返回影响行数"""
+        now = timezone.now()
+        count = self.filter(is_deleted=False).update(is_deleted=True, deleted_at=now, updated_at=now)
+        if count:
+            soft_deleted.send(sender=self.model, count=count)
+        return count
+
+    def restore(self):
+        """单条 UPDATE 恢复软删除的记录，返回影响行数"""
+        count = self.filter(is_deleted=True).update(
+            is_deleted=False, deleted_at=None, updated_at=timezone.now()
+        )
+        if count:
+            restored.send(sender=self.model, count=count)
+        return count
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """默认管理器：排除已软删除的记录"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+    def all_with_deleted(self):
+        """包含已软删除记录的 QuerySet"""
+        return super().get_queryset()
+
+    def deleted_only(self):
+        """仅包含已软删除记录的 QuerySet"""
+        return super().get_queryset().filter(is_deleted=True)
+
 
 class BaseModel(models.Model):
     """基础模型类"""
@@ -10,6 +52,8 @@ class BaseModel(models.Model):
     is_deleted = models.BooleanField(default=False, verbose_name="是否删除")
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="删除时间")
 
+    objects = SoftDeleteManager()
+
     class Meta:
         abstract = True
         ordering = ["-created_at"]
@@ -18,8 +62,34 @@ class BaseModel(models.Model):
         """软删除"""
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save(using=using)
+        self.save(using=using, update_fields=["is_deleted", "deleted_at", "updated_at"])
+
+    def restore(self, using=None):
+        """恢复软删除"""
+        self.is_deleted = False
+        self.deleted_at = None
+        self.save(using=using, update_fields=["is_deleted", "deleted_at", "updated_at"])
 
     def hard_delete(self, using=None, keep_parents=False):
         """硬删除"""
         super().delete(using=using, keep_parents=keep_parents)
+
+
+class ArchivedRecord(models.Model):
+    """软删除超过保留期后归档的记录，见 core.archive"""
+
+    model = models.CharField(max_length=100, verbose_name="模型")
+    object_pk = models.CharField(max_length=64, verbose_name="原主键")
+    data = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="数据")
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="删除时间")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="归档时间")
+
+    class Meta:
+        verbose_name = "归档记录"
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=["model", "object_pk"], name="archived_model_pk_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} - {self.object_pk}"
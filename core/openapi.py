@@ -0,0 +1,170 @@
+"""
+预生成的 OpenAPI 文档
+
+drf_yasg 每次请求都会遍历所有视图集与序列化器生成 schema。这里按代码版本只生成一次：
+- 构建时执行 manage.py build_openapi（Dockerfile 中紧跟 collectstatic），或在首次请求时生成
+- JSON / YAML 及其 gzip 预压缩版本写入 OPENAPI_SCHEMA["DIR"]，文件名带代码版本，进程内缓存
+- 代码版本为 CODE_VERSION 环境变量，未设置时为项目源码的内容哈希，代码变更后自动重新生成
+- 响应带 ETag 与缓存头；?v=<版本> 的地址内容不变，可长期缓存
+
+drf_yasg 只在生成时导入，SWAGGER_ENABLED=False 时不会加载。
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+
+from libs.logging import logger
+from . import warmup
+
+FORMATS = {
+    "json": "application/json",
+    "yaml": "application/yaml",
+}
+
+
+@dataclass(frozen=True)
+class SchemaArtifact:
+    """某个代码版本、某种格式的 schema"""
+
+    version: str
+    content: bytes
+    compressed: bytes
+    etag: str
+
+    @classmethod
+    def from_content(cls, version, content, compressed=None):
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        if compressed is None:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        return cls(version, content, compressed, f'"{digest}"')
+
+    @property
+    def gzip_etag(self):
+        return f'{self.etag[:-1]}-gzip"'
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """CODE_VERSION 环境变量，未设置时取项目内各应用与配置模块 .py 文件的内容哈希"""
+    if settings.CODE_VERSION:
+        return settings.CODE_VERSION
+    base_dir = Path(settings.BASE_DIR).resolve()
+    roots = {Path(config.path).resolve() for config in apps.get_app_configs()}
+    roots.add((base_dir / settings.ROOT_URLCONF.split(".")[0]).resolve())
+    digest = hashlib.sha256()
+    for root in sorted(root for root in roots if root.is_relative_to(base_dir)):
+        for path in sorted(root.rglob("*.py")):
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def get_schema_dir():
+    return Path(settings.OPENAPI_SCHEMA["DIR"])
+
+
+def artifact_path(version, fmt):
+    return get_schema_dir() / f"openapi-{version}.{fmt}"
+
+
+def get_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Django Template API",
+        default_version="v1",
+        description="这是一个Django模板项目的API文档",
+        terms_of_service="",
+        contact=openapi.Contact(email="evan@liukersun.com"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+def generate():
+    """用 drf_yasg 生成 schema（不依赖请求，host 由客户端按当前地址补全），返回 {格式: 内容}"""
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(get_info()).get_schema(request=None, public=True)
+    return {
+        "json": OpenAPICodecJson(validators=[]).encode(schema),
+        "yaml": OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def write_atomic(path, data):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def build(version=None):
+    """生成并写入当前版本的 schema，清理旧版本的文件；返回 {格式: SchemaArtifact}"""
+    version = version or code_version()
+    artifacts = {
+        fmt: SchemaArtifact.from_content(version, content) for fmt, content in generate().items()
+    }
+    schema_dir = get_schema_dir()
+    try:
+        schema_dir.mkdir(parents=True, exist_ok=True)
+        for fmt, artifact in artifacts.items():
+            path = artifact_path(version, fmt)
+            write_atomic(path, artifact.content)
+            write_atomic(path.with_name(f"{path.name}.gz"), artifact.compressed)
+        current = {artifact_path(version, fmt).name for fmt in FORMATS}
+        for path in schema_dir.glob("openapi-*"):
+            if path.suffix != ".tmp" and path.name.removesuffix(".gz") not in current:
+                path.unlink(missing_ok=True)
+    except OSError as exc:
+        # 目录不可写时只保留在进程内
+        logger.warning(f"OpenAPI schema 写入 {schema_dir} 失败: {exc}")
+    return artifacts
+
+
+def load(version, fmt):
+    """读取已生成的文件，不存在时返回 None"""
+    path = artifact_path(version, fmt)
+    try:
+        content = path.read_bytes()
+        compressed = path.with_name(f"{path.name}.gz").read_bytes()
+    except OSError:
+        return None
+    return SchemaArtifact.from_content(version, content, compressed)
+
+
+_artifacts = {}
+_lock = threading.Lock()
+
+
+def get_artifact(fmt):
+    """当前版本的 schema：进程内缓存 -> 构建产物 -> 现场生成"""
+    version = code_version()
+    artifact = _artifacts.get(fmt)
+    if artifact is not None and artifact.version == version:
+        return artifact
+    with _lock:
+        artifact = _artifacts.get(fmt)
+        if artifact is None or artifact.version != version:
+            artifact = load(version, fmt)
+            if artifact is None:
+                logger.info(f"OpenAPI schema {version} 不存在，开始生成")
+                _artifacts.update(build(version))
+                artifact = _artifacts[fmt]
+            _artifacts[fmt] = artifact
+    return artifact
+
+
+@warmup.register
+def preload():
+    """启动预热时载入（或生成）schema，preload_app 下由各 worker 共享"""
+    if settings.SWAGGER_ENABLED:
+        for fmt in FORMATS:
+            get_artifact(fmt)
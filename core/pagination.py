@@ -1,14 +1,231 @@
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from core.exceptions import BusinessException
+
+# 表行数超过该值时使用 PostgreSQL 的 reltuples 估算
+APPROX_COUNT_THRESHOLD = 10000
+COUNT_CACHE_TIMEOUT = 60
+
+
+def is_unfiltered(queryset):
+    """除默认管理器自带的条件（如排除软删除记录）外没有其他过滤"""
+    where = queryset.query.where
+    return not where or where == queryset.model._default_manager.all().query.where
+
+
+def approximate_count(queryset):
+    """
+    近似总数
+    - PostgreSQL 上未过滤的查询使用 pg_class.reltuples（需要定期 ANALYZE），行数较少时仍使用精确值。
+      软删除模型的估算包含尚未归档的已删除记录
+    - 其他情况使用缓存的 COUNT(*)
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql" and is_unfiltered(queryset):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= APPROX_COUNT_THRESHOLD:
+            return row[0]
+
+    sql, params = queryset.query.sql_with_params()
+    key = "pagination:count:" + hashlib.sha256(f"{sql}{params}".encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class ApproximateCountPaginator(Paginator):
+    """总数使用 approximate_count 的分页器"""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+class CursorPagination:
+    """
+    键集（游标）分页
+    按 (排序字段, id) 定位，不使用 OFFSET，深翻页的耗时与第一页相同。
+    排序取视图的 cursor_ordering，默认使用模型 Meta.ordering 的第一个字段，例如 -date_joined / -created_at。
+    """
+
+    cursor_query_param = "cursor"
+
+    def __init__(self, page_size, count_mode):
+        self.page_size = page_size
+        self.count_mode = count_mode
+
+    def get_ordering(self, queryset, view):
+        ordering = getattr(view, "cursor_ordering", None)
+        if ordering:
+            return ordering
+        model_ordering = queryset.model._meta.ordering or ["-pk"]
+        field = model_ordering[0]
+        pk = queryset.model._meta.pk.name
+        if field.lstrip("-") in ("pk", pk):
+            return (field.replace("pk", pk),)
+        return (field, ("-" if field.startswith("-") else "") + pk)
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            self.fields[name].value_to_string(obj) for name in self.names
+        ]
+        data = json.dumps({"v": values, "d": direction}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = [
+                self.fields[name].to_python(value) for name, value in zip(self.names, data["v"])
+            ]
+            if len(values) != len(self.names) or data["d"] not in ("next", "prev"):
+                raise ValueError
+            return values, data["d"]
+        except Exception:
+            raise BusinessException("无效的游标", "invalid_cursor")
+
+    def position_filter(self, values, descending):
+        """(f1, f2) 在给定位置之后的条件"""
+        condition = Q()
+        for i, name in enumerate(self.names):
+            lookup = "lt" if descending[i] else "gt"
+            term = Q(**{f"{name}__{lookup}": values[i]})
+            for prior in range(i):
+                term &= Q(**{self.names[prior]: values[prior]})
+            condition |= term
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_queryset = queryset
+        ordering = self.get_ordering(queryset, view)
+        meta = queryset.model._meta
+        self.names = [meta.pk.name if name.lstrip("-") == "pk" else name.lstrip("-") for name in ordering]
+        self.fields = {name: meta.get_field(name) for name in self.names}
+        descending = [name.startswith("-") for name in ordering]
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        direction = "next"
+        if cursor:
+            values, direction = self.decode_cursor(cursor)
+            if direction == "prev":
+                # 向前翻页：反转比较方向与排序，取出后再反转结果
+                reverse = [not d for d in descending]
+                queryset = queryset.filter(self.position_filter(values, reverse))
+                queryset = queryset.order_by(*[("" if d else "-") + n for n, d in zip(self.names, descending)])
+            else:
+                queryset = queryset.filter(self.position_filter(values, descending))
+                queryset = queryset.order_by(*ordering)
+        else:
+            queryset = queryset.order_by(*ordering)
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if direction == "prev":
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(cursor)
+        self.rows = rows
+        return rows
+
+    @cached_property
+    def total(self):
+        if self.count_mode == "none":
+            return None
+        if self.count_mode == "exact":
+            return self.base_queryset.count()
+        return approximate_count(self.base_queryset)
+
+    def get_page_state(self):
+        """决定响应中除 results 外各项的状态，用于生成 ETag"""
+        return (self.total, self.count_mode, self.page_size, self.has_next, self.has_previous)
+
+    def get_link(self, obj, direction):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(obj, direction))
+
+    def get_paginated_response(self, data):
+        next_link = self.get_link(self.rows[-1], "next") if self.has_next and self.rows else None
+        previous_link = None
+        if self.has_previous:
+            if self.rows:
+                previous_link = self.get_link(self.rows[0], "prev")
+            else:
+                previous_link = remove_query_param(
+                    self.request.build_absolute_uri(), self.cursor_query_param
+                )
+        return Response({
+            'total': self.total,
+            'total_is_approximate': self.count_mode == "approx",
+            'page_size': self.page_size,
+            'results': data,
+            'links': {
+                'next': next_link,
+                'previous': previous_link,
+            }
+        })
 
 
 class CustomPageNumberPagination(PageNumberPagination):
-    """自定义分页类"""
+    """
+    自定义分页类
+    ?pagination=cursor 切换为游标分页；?count=exact|approx|none 控制总数的计算方式
+    （页码分页默认 exact，游标分页默认 approx，none 仅对游标分页有效）
+    """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 1000
-    
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode not in (None, "exact", "approx", "none"):
+            raise BusinessException("count 参数只能是 exact、approx 或 none", "invalid_parameter")
+
+        self.cursor = None
+        if request.query_params.get(self.mode_query_param) == "cursor":
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            self.cursor = CursorPagination(page_size, count_mode or "approx")
+            return self.cursor.paginate_queryset(queryset, request, view)
+
+        # 页码分页需要总数计算页数，none 按 exact 处理
+        if count_mode == "approx":
+            self.django_paginator_class = ApproximateCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_state(self):
+        """决定响应中除 results 外各项的状态（总数、页码等），用于生成 ETag"""
+        if self.cursor is not None:
+            return self.cursor.get_page_state()
+        paginator = self.page.paginator
+        return (paginator.count, paginator.per_page, self.page.number, self.page_size)
+
     def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
         return Response({
             'total': self.page.paginator.count,
             'total_pages': self.page.paginator.num_pages,
@@ -19,4 +236,4 @@ class CustomPageNumberPagination(PageNumberPagination):
                 'next': self.get_next_link(),
                 'previous': self.get_previous_link()
             }
-        }) 
\ No newline at end of file
+        })
@@ -1,4 +1,20 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework.renderers import JSONRenderer
+from libs import fastjson
+from libs.metrics import timed
+
+SUCCESS_MESSAGE = "操作成功"
+ERROR_MESSAGE = "请求错误"
+
+# 预先编码的统一格式前后缀，成功响应只需编码 data 本身
+SUCCESS_PREFIX = fastjson.dumps({"status": "success", "message": SUCCESS_MESSAGE})[:-1] + b',"data":'
+ENVELOPE_SUFFIX = b"}"
+ERROR_BODY = fastjson.dumps({"status": "error", "message": ERROR_MESSAGE, "data": None})
+
+
+def is_envelope(data):
+    return isinstance(data, dict) and "status" in data and "message" in data and "data" in data
 
 
 class ApiResponseRenderer(JSONRenderer):
@@ -10,32 +26,84 @@ class ApiResponseRenderer(JSONRenderer):
         "message": "提示信息",
         "data": 任意数据或 None
     }
+
+    默认配置（紧凑、非 ASCII 转义）下使用 libs.fastjson 编码，输出与 DRF JSONRenderer 一致；
+    需要缩进（如可浏览 API）或修改了 DRF JSON 配置时使用 DRF 的实现。
     """
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed("render"):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
         # 如果没有 renderer_context，直接使用父类渲染
         if renderer_context is None:
             return super().render(data, accepted_media_type, renderer_context)
 
         response = renderer_context.get("response")
+        # 304 Not Modified 没有响应体（见 core.conditional）
+        if getattr(response, "status_code", None) == 304:
+            return b""
+
+        fast = (
+            self.compact
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
 
         # 若 data 已经符合统一格式，则直接返回
-        if isinstance(data, dict) and {
-            "status",
-            "message",
-            "data",
-        }.issubset(data.keys()):
+        if is_envelope(data):
+            if fast:
+                return fastjson.dumps(data)
             return super().render(data, accepted_media_type, renderer_context)
 
         status_code = getattr(response, "status_code", 200)
         # 根据状态码判定成功或失败
-        status_label = "success" if status_code < 400 else "error"
-        # 默认 message
-        default_message = "操作成功" if status_label == "success" else "请求错误"
+        if fast:
+            if status_code < 400:
+                return SUCCESS_PREFIX + fastjson.dumps(data) + ENVELOPE_SUFFIX
+            return ERROR_BODY
 
+        status_label = "success" if status_code < 400 else "error"
         unified_data = {
             "status": status_label,
-            "message": default_message,
+            "message": SUCCESS_MESSAGE if status_label == "success" else ERROR_MESSAGE,
             "data": data if status_label == "success" else None,
         }
-        return super().render(unified_data, accepted_media_type, renderer_context) 
\ No newline at end of file
+        return super().render(unified_data, accepted_media_type, renderer_context)
+
+
+def iter_envelope(items, message=SUCCESS_MESSAGE, chunk_size=None):
+    """
+    以统一格式流式输出列表：{"status": "success", "message": ..., "data": [...]}
+    每 chunk_size 个元素编码为一个分块，避免在内存中拼出完整的响应体
+    """
+    chunk_size = chunk_size or settings.JSON_RENDERER["STREAM_CHUNK_SIZE"]
+    if message == SUCCESS_MESSAGE:
+        yield SUCCESS_PREFIX + b"["
+    else:
+        yield fastjson.dumps({"status": "success", "message": message})[:-1] + b',"data":['
+
+    batch = []
+    first = True
+    for item in items:
+        batch.append(fastjson.dumps(item))
+        if len(batch) >= chunk_size:
+            yield (b"" if first else b",") + b",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b"" if first else b",") + b",".join(batch)
+    yield b"]" + ENVELOPE_SUFFIX
+
+
+class StreamingEnvelopeResponse(StreamingHttpResponse):
+    """
+    流式返回大列表，items 为可迭代的已序列化数据，例如：
+        rows = (serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=500))
+        return StreamingEnvelopeResponse(rows)
+    """
+
+    def __init__(self, items, message=SUCCESS_MESSAGE, chunk_size=None, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(iter_envelope(items, message, chunk_size), **kwargs)
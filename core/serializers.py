@@ -1,13 +1,173 @@
+import datetime
+import time
+from collections.abc import Mapping
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+from libs.metrics import current_timings
+
+# 这些字段对数据库返回的值调用 to_representation 结果不变，可以直接使用原值
+PASSTHROUGH_FIELDS = {
+    serializers.CharField: {"CharField", "TextField", "SlugField"},
+    serializers.EmailField: {"CharField"},
+    serializers.SlugField: {"SlugField", "CharField"},
+    serializers.IntegerField: {
+        "AutoField", "BigAutoField", "SmallAutoField", "IntegerField", "BigIntegerField",
+        "SmallIntegerField", "PositiveIntegerField", "PositiveBigIntegerField", "PositiveSmallIntegerField",
+    },
+    serializers.BooleanField: {"BooleanField"},
+}
+DATETIME_CACHE_SIZE = 4096
+
+
+class DateTimeFormatter:
+    """
+    带缓存的 DateTimeField.to_representation
+    输出格式不含 %f 时按秒缓存（同一行的 created_at / updated_at、批量写入的数据通常落在同一秒），
+    缓存键包含当前时区，结果与 DRF 完全一致。
+    """
+
+    def __init__(self, field):
+        self.field = field
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        self.truncate = (
+            isinstance(output_format, str)
+            and output_format.lower() != ISO_8601
+            and "%f" not in output_format
+        )
+        self.cache = {}
+
+    def __call__(self, value):
+        field = self.field
+        if not isinstance(value, datetime.datetime):
+            return field.to_representation(value)
+        field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        key = (value.replace(microsecond=0) if self.truncate else value, field_timezone)
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+        if len(self.cache) >= DATETIME_CACHE_SIZE:
+            self.cache.clear()
+        result = self.cache[key] = field.to_representation(value)
+        return result
+
+
+class ReadPlan:
+    """
+    只读序列化计划：输出字段名、对应的模型列（attname）以及需要转换的字段
+    每个序列化器类只构建一次，行数据可以是 values_list() 的元组或模型实例
+    """
+
+    def __init__(self, names, columns, converters):
+        self.names = tuple(names)
+        self.columns = tuple(columns)
+        # [(下标, 转换函数)]，只包含需要转换的字段
+        self.converters = [(i, convert) for i, convert in enumerate(converters) if convert is not None]
+
+    @classmethod
+    def build(cls, serializer):
+        """无法编译（方法字段、嵌套序列化器、跨表 source 等）时返回 None"""
+        meta = serializer.Meta.model._meta
+        names, columns, converters = [], [], []
+        for field in serializer._readable_fields:
+            column, convert = cls.compile_field(field, meta)
+            if column is None:
+                return None
+            names.append(field.field_name)
+            columns.append(column)
+            converters.append(convert)
+        return cls(names, columns, converters)
+
+    @staticmethod
+    def compile_field(field, meta):
+        if field.source == "*" or len(field.source_attrs) != 1:
+            return None, None
+        source = field.source
+        try:
+            model_field = meta.pk if source == "pk" else meta.get_field(source)
+        except FieldDoesNotExist:
+            return None, None
+        if not model_field.concrete or model_field.many_to_many:
+            return None, None
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if model_field.many_to_one and field.pk_field is None:
+                return model_field.attname, None
+            return None, None
+        if model_field.is_relation or isinstance(field, serializers.Serializer):
+            return None, None
+        if model_field.get_internal_type() in PASSTHROUGH_FIELDS.get(type(field), ()):
+            return model_field.attname, None
+        if isinstance(field, serializers.DateTimeField):
+            return model_field.attname, DateTimeFormatter(field)
+        return model_field.attname, field.to_representation
+
+    def render_row(self, values):
+        """values_list() 的行，列顺序与 columns 一致，之后可以有额外的列（如分页排序字段）"""
+        data = dict(zip(self.names, values))
+        names = self.names
+        for i, convert in self.converters:
+            value = values[i]
+            if value is not None:
+                data[names[i]] = convert(value)
+        return data
+
+    def render_instance(self, instance):
+        return self.render_row([getattr(instance, column) for column in self.columns])
+
+
+_plans = {}
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
     """
     基础模型序列化器
     提供通用的序列化功能
+
+    compiled_read = True 时读路径使用编译后的 ReadPlan：字段计划按类缓存，
+    列表接口从 values_list() 元组直接生成数据（见 BaseViewSet.list），输出与默认实现一致。
+    仅适用于字段固定（不在运行时增删字段）的序列化器；重写了 to_representation 或包含无法编译的字段时自动回退。
     """
     created_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", read_only=True)
 
+    compiled_read = False
+
     class Meta:
         abstract = True
+
+    @classmethod
+    def get_read_plan(cls):
+        """返回该类的 ReadPlan，未启用或无法编译时返回 None"""
+        if not cls.compiled_read or cls.to_representation is not BaseModelSerializer.to_representation:
+            return None
+        try:
+            return _plans[cls]
+        except KeyError:
+            plan = _plans[cls] = ReadPlan.build(cls())
+            return plan
+
+    def to_representation(self, instance):
+        # 只统计最外层序列化器的耗时，嵌套的序列化器计入外层
+        timings = current_timings()
+        if timings is None or timings.serializing:
+            return self._to_representation(instance)
+        timings.serializing = True
+        start = time.perf_counter()
+        try:
+            return self._to_representation(instance)
+        finally:
+            timings.serializing = False
+            timings.add("serialize", time.perf_counter() - start)
+
+    def _to_representation(self, instance):
+        plan = self.get_read_plan() if self.compiled_read else None
+        # validated_data 等字典仍走默认实现
+        if plan is None or isinstance(instance, Mapping):
+            if isinstance(instance, tuple):
+                raise TypeError(f"{self.__class__.__name__} 无法从 values_list() 的行生成数据")
+            return super().to_representation(instance)
+        if isinstance(instance, tuple):
+            return plan.render_row(instance)
+        return plan.render_instance(instance)
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from libs.response_cache import invalidate_model, is_cached_tag
+from .models import BaseModel, restored, soft_deleted
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(soft_deleted)
+@receiver(restored)
+def invalidate_cached_responses(sender, **kwargs):
+    """
+    BaseModel 子类变更（含批量软删除 / 恢复）后使对应标签的响应缓存失效
+    事务提交后才执行：提交前失效，并发请求会用未提交前的数据重新填充缓存
+    """
+    if issubclass(sender, BaseModel) and is_cached_tag(sender):
+        transaction.on_commit(lambda: invalidate_model(sender), using=kwargs.get("using"))
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+import uuid
+
+from django.test import SimpleTestCase
+
+from libs.ratelimit import (
+    SLIDING_WINDOW_SCRIPT,
+    TOKEN_BUCKET_SCRIPT,
+    MemoryBackend,
+    RedisBackend,
+    SharedMemoryBackend,
+    sliding_window,
+    token_bucket,
+)
+
+# 设置后运行 Redis 后端与 Lua 脚本的测试，如 redis://localhost:6379/15（会写入 rl:test:* 键）
+REDIS_URL = os.getenv("RATE_LIMIT_TEST_REDIS_URL")
+
+
+def run(algorithm, limit, period, times):
+    """依次在给定时刻访问，返回每次的结果"""
+    state, results = None, []
+    for now in times:
+        state, _, result = algorithm(state, limit, period, now)
+        results.append(result)
+    return results
+
+
+class SlidingWindowTests(SimpleTestCase):
+    def test_allows_up_to_limit(self):
+        results = run(sliding_window, 3, 10, [100, 101, 102, 103])
+        self.assertEqual([result.allowed for result in results], [True, True, True, False])
+        self.assertEqual([result.remaining for result in results], [2, 1, 0, 0])
+        self.assertEqual(results[-1].retry_after, 7)
+
+    def test_previous_window_is_weighted(self):
+        # 上一窗口 3 次，新窗口过去 50% 时估计值为 1.5，还可以再访问 1 次
+        results = run(sliding_window, 3, 10, [100, 101, 102, 115, 115.5])
+        self.assertEqual([result.allowed for result in results], [True, True, True, True, False])
+        self.assertAlmostEqual(results[-1].retry_after, 1.1666666, places=5)
+
+    def test_idle_window_resets(self):
+        results = run(sliding_window, 1, 10, [100, 125])
+        self.assertEqual([result.allowed for result in results], [True, True])
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_refill(self):
+        results = run(token_bucket, 2, 10, [100, 100, 100, 105])
+        self.assertEqual([result.allowed for result in results], [True, True, False, True])
+        self.assertEqual(results[2].retry_after, 5)
+
+    def test_capacity_is_capped(self):
+        results = run(token_bucket, 2, 10, [100, 1000, 1000, 1000])
+        self.assertEqual([result.allowed for result in results], [True, True, True, False])
+
+
+class BackendTestsMixin:
+    """各后端对同一 key 的计数与算法一致"""
+
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.backend = self.make_backend()
+        self.key = f"rl:test:{uuid.uuid4().hex}"
+
+    def test_sliding_window(self):
+        allowed = [self.backend.hit(self.key, "sliding_window", 3, 60).allowed for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+    def test_token_bucket(self):
+        results = [self.backend.hit(self.key, "token_bucket", 2, 60) for _ in range(3)]
+        self.assertEqual([result.allowed for result in results], [True, True, False])
+        self.assertGreater(results[-1].retry_after, 0)
+
+    def test_keys_are_independent(self):
+        self.backend.hit(self.key, "sliding_window", 1, 60)
+        self.assertTrue(self.backend.hit(f"{self.key}:other", "sliding_window", 1, 60).allowed)
+
+
+class MemoryBackendTests(BackendTestsMixin, SimpleTestCase):
+    def make_backend(self):
+        return MemoryBackend()
+
+
+class SharedMemoryBackendTests(BackendTestsMixin, SimpleTestCase):
+    def make_backend(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.shm_path = os.path.join(directory.name, "ratelimit")
+        return SharedMemoryBackend(SHM_PATH=self.shm_path, SHM_SLOTS=256)
+
+    def test_shared_between_instances(self):
+        other = SharedMemoryBackend(SHM_PATH=self.shm_path, SHM_SLOTS=256)
+        self.backend.hit(self.key, "sliding_window", 1, 60)
+        self.assertFalse(other.hit(self.key, "sliding_window", 1, 60).allowed)
+
+
+@unittest.skipUnless(REDIS_URL, "未设置 RATE_LIMIT_TEST_REDIS_URL")
+class RedisBackendTests(BackendTestsMixin, SimpleTestCase):
+    def make_backend(self):
+        backend = RedisBackend(REDIS_URL=REDIS_URL)
+        self.addCleanup(lambda: backend.client.delete(self.key, f"{self.key}:other"))
+        return backend
+
+    def assertScriptMatches(self, script, algorithm, limit, period, times):
+        """Lua 脚本与 Python 实现在相同时刻序列下的结果一致"""
+        script = self.backend.client.register_script(script)
+        for now, expected in zip(times, run(algorithm, limit, period, times)):
+            allowed, remaining, reset, retry_after = script(keys=[self.key], args=[limit, period, now])
+            self.assertEqual(bool(allowed), expected.allowed, now)
+            self.assertEqual(int(remaining), expected.remaining, now)
+            self.assertAlmostEqual(float(reset), expected.reset, places=6)
+            self.assertAlmostEqual(float(retry_after), expected.retry_after, places=6)
+
+    def test_sliding_window_script(self):
+        self.assertScriptMatches(SLIDING_WINDOW_SCRIPT, sliding_window, 3, 10, [100, 101, 102, 103, 115, 115.5])
+
+    def test_token_bucket_script(self):
+        self.assertScriptMatches(TOKEN_BUCKET_SCRIPT, token_bucket, 2, 10, [100, 100, 100, 102.5, 105])
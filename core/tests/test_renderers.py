@@ -0,0 +1,94 @@
+import datetime
+import decimal
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from core.renderers import ApiResponseRenderer, iter_envelope
+from libs import fastjson
+
+DATA = {
+    "id": 1,
+    "name": "测试 用户",
+    "when": timezone.make_aware(datetime.datetime(2024, 5, 1, 8, 30, 15, 123456), datetime.timezone.utc),
+    "date": datetime.date(2024, 5, 1),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "price": decimal.Decimal("12.50"),
+    "tags": ["a", None, True, 1.5],
+    "nested": {"empty": {}, "items": []},
+}
+
+
+def render(data, status_code=200):
+    response = Response(data, status=status_code)
+    return ApiResponseRenderer().render(data, "application/json", {"response": response})
+
+
+def reference(data, status_code=200):
+    """改造前的实现：包装为统一格式后交给 DRF JSONRenderer"""
+    if status_code < 400:
+        envelope = {"status": "success", "message": "操作成功", "data": data}
+    else:
+        envelope = {"status": "error", "message": "请求错误", "data": None}
+    return JSONRenderer().render(envelope, "application/json", {})
+
+
+class RendererBackendTests(SimpleTestCase):
+    """orjson 与标准库后端的输出与 DRF JSONRenderer 一致"""
+
+    def setUp(self):
+        self.addCleanup(setattr, fastjson, "_backend", None)
+
+    def use(self, backend):
+        fastjson._backend = backend
+
+    def test_backends_match_drf(self):
+        for backend in (fastjson.OrjsonBackend(), fastjson.StdlibBackend()):
+            with self.subTest(backend=backend.name):
+                self.use(backend)
+                self.assertEqual(render(DATA), reference(DATA))
+                self.assertEqual(render([DATA, DATA]), reference([DATA, DATA]))
+                self.assertEqual(render(DATA, 400), reference(DATA, 400))
+
+    def test_existing_envelope_is_not_wrapped(self):
+        envelope = {"status": "error", "message": "失败", "data": {"field": ["必填"]}}
+        for backend in (fastjson.OrjsonBackend(), fastjson.StdlibBackend()):
+            with self.subTest(backend=backend.name):
+                self.use(backend)
+                self.assertEqual(render(envelope, 400), JSONRenderer().render(envelope))
+
+    def test_not_modified_has_no_body(self):
+        self.assertEqual(render(DATA, 304), b"")
+
+    def test_stdlib_fallback_without_orjson(self):
+        with mock.patch.object(fastjson, "orjson", None), self.settings(JSON_RENDERER={"BACKEND": "auto"}):
+            fastjson._backend = None
+            self.assertEqual(fastjson.get_backend().name, "json")
+            self.assertEqual(render(DATA), reference(DATA))
+
+
+class StreamingEnvelopeTests(SimpleTestCase):
+    def test_chunks_join_to_envelope(self):
+        for count in (0, 1, 5, 6, 13):
+            items = [dict(DATA, id=index) for index in range(count)]
+            with self.subTest(count=count):
+                body = b"".join(iter_envelope(iter(items), chunk_size=5))
+                self.assertEqual(body, reference(items))
+
+    def test_items_are_encoded_lazily(self):
+        consumed = []
+
+        def items():
+            for index in range(10):
+                consumed.append(index)
+                yield {"id": index}
+
+        chunks = iter_envelope(items(), chunk_size=4)
+        next(chunks)
+        self.assertEqual(consumed, [])
+        next(chunks)
+        self.assertEqual(consumed, [0, 1, 2, 3])
@@ -0,0 +1,132 @@
+import threading
+import time
+import uuid
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from libs import response_cache
+from libs.response_cache import LOCK_KEY, TAG_KEY, cache_response, get_cache, get_stats, invalidate_tags
+from users.models import User
+
+
+def make_view(key_prefix, delay=0.0, **options):
+    """返回 (视图对象, 调用记录)，视图每次执行耗时 delay 秒"""
+    calls = []
+
+    class View:
+        @cache_response(key_prefix=key_prefix, vary_on_user=False, **options)
+        def get(self, request):
+            calls.append(time.time())
+            time.sleep(delay)
+            response = Response({"calls": len(calls)})
+            response["ETag"] = f'W/"{len(calls)}"'
+            return response
+
+    return View(), calls
+
+
+def get(view, **headers):
+    return view.get(Request(APIRequestFactory().get("/cached/", **headers)))
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.prefix = f"test_{uuid.uuid4().hex[:8]}"
+
+    def test_hit_after_miss(self):
+        view, calls = make_view(self.prefix, timeout=60)
+        self.assertEqual(get(view)["X-Cache"], "MISS")
+        response = get(view)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data, {"calls": 1})
+        self.assertEqual(len(calls), 1)
+
+    def test_single_flight(self):
+        view, calls = make_view(self.prefix, delay=0.3, timeout=60)
+        states = []
+        threads = [threading.Thread(target=lambda: states.append(get(view)["X-Cache"])) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 并发未命中只执行一次视图，其余请求等待其结果
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(states), ["HIT"] * 7 + ["MISS"])
+        stats = get_stats()[self.prefix]
+        self.assertEqual((stats["misses"], stats["waits"]), (1, 7))
+
+    def test_stale_while_revalidate(self):
+        view, calls = make_view(self.prefix, timeout=1, stale_ttl=30)
+        get(view)
+        time.sleep(1.1)
+        cache = get_cache()
+        # 其他请求正在重新计算时返回旧数据
+        cache.add(LOCK_KEY.format(response_cache.build_cache_key(
+            Request(APIRequestFactory().get("/cached/")), self.prefix, False
+        )), 1, 10)
+        response = get(view)
+        self.assertEqual(response["X-Cache"], "STALE")
+        self.assertEqual(len(calls), 1)
+
+    def test_lock_released_only_by_holder(self):
+        cache = get_cache()
+        key = LOCK_KEY.format(self.prefix)
+        token = response_cache._acquire(cache, key, 10)
+        self.assertIsNotNone(token)
+        self.assertIsNone(response_cache._acquire(cache, key, 10))
+        # 锁超时后被其他请求获得，原持有者不能删除
+        cache.delete(key)
+        other = response_cache._acquire(cache, key, 10)
+        response_cache._release(cache, key, token)
+        self.assertEqual(cache.get(key), other)
+        response_cache._release(cache, key, other)
+        self.assertIsNone(cache.get(key))
+
+    def test_cached_etag_answers_conditional_request(self):
+        view, calls = make_view(self.prefix, timeout=60)
+        etag = get(view)["ETag"]
+        response = get(view, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_invalidate_tags(self):
+        view, calls = make_view(self.prefix, timeout=60, tags=["test-tag"])
+        get(view)
+        invalidate_tags("test-tag")
+        self.assertEqual(get(view)["X-Cache"], "MISS")
+        self.assertEqual(len(calls), 2)
+
+    def test_only_declared_tags_are_invalidated(self):
+        make_view(self.prefix, tags=["declared-tag"])
+        self.assertTrue(response_cache.is_cached_tag("declared-tag"))
+        self.assertFalse(response_cache.is_cached_tag("users.usertoken"))
+
+
+class ModelInvalidationTests(TestCase):
+    """模型变更在事务提交后才使响应缓存失效"""
+
+    def version(self):
+        return get_cache().get(TAG_KEY.format(response_cache.tag_for_model(User)), 0)
+
+    def test_invalidated_on_commit(self):
+        user = User.objects.create_user("bob", "bob@example.com", "S3cure-pass-x")
+        before = self.version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user.introduction = "hi"
+            user.save()
+            self.assertEqual(self.version(), before)
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(self.version(), before)
+
+    def test_bulk_soft_delete_invalidated_on_commit(self):
+        User.objects.create_user("bob", "bob@example.com", "S3cure-pass-x")
+        before = self.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(username="bob").soft_delete()
+            self.assertEqual(self.version(), before)
+        self.assertGreater(self.version(), before)
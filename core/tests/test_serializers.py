@@ -0,0 +1,76 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from users.models import User, UserToken
+from users.serializers import TokenSerializer, UserSerializer
+
+
+class PlainUserSerializer(UserSerializer):
+    compiled_read = False
+
+
+class PlainTokenSerializer(TokenSerializer):
+    compiled_read = False
+
+
+def aware(*args, tz=datetime.timezone.utc):
+    return datetime.datetime(*args, tzinfo=tz)
+
+
+class CompiledReadTests(TestCase):
+    """compiled_read 的输出与 ModelSerializer 默认实现完全一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        shanghai = datetime.timezone(datetime.timedelta(hours=8))
+        cls.users = [
+            User.objects.create(username="full", email="full@example.com", phone="13800000000"),
+            User.objects.create(username="empty", email=None, phone=None, is_active=False),
+            User.objects.create(username="名字", email="u@example.com", phone=None),
+        ]
+        times = [
+            aware(2024, 1, 1, 0, 0, 0),
+            aware(2024, 6, 30, 23, 59, 59, 999999),
+            aware(2024, 3, 10, 8, 0, 0, 500000, tz=shanghai),
+        ]
+        for user, moment in zip(cls.users, times):
+            User.objects.filter(pk=user.pk).update(created_at=moment, updated_at=moment + datetime.timedelta(days=1))
+            for index in range(2):
+                token = UserToken.objects.create(
+                    user=user,
+                    token=f"{user.username}-{index}",
+                    token_type="refresh",
+                    expires=moment + datetime.timedelta(days=30, microseconds=index),
+                    is_active=bool(index),
+                )
+                UserToken.objects.filter(pk=token.pk).update(created_at=moment)
+
+    def assertSameOutput(self, model, compiled, plain):
+        plan = compiled.get_read_plan()
+        self.assertIsNotNone(plan)
+        instances = list(model.objects.order_by("pk"))
+        expected = plain(instances, many=True).data
+        rows = list(model.objects.order_by("pk").values_list(*plan.columns, named=True))
+
+        self.assertEqual(compiled(rows, many=True).data, expected)
+        self.assertEqual(compiled(instances, many=True).data, expected)
+        for instance in instances:
+            self.assertEqual(compiled(instance).data, plain(instance).data)
+
+    def test_user_serializer(self):
+        self.assertSameOutput(User, UserSerializer, PlainUserSerializer)
+        data = UserSerializer(User.objects.get(username="empty")).data
+        self.assertIsNone(data["email"])
+        self.assertIsNone(data["phone"])
+
+    def test_token_serializer(self):
+        self.assertSameOutput(UserToken, TokenSerializer, PlainTokenSerializer)
+
+    def test_output_follows_current_timezone(self):
+        # 缓存的日期格式化结果按时区区分
+        for zone in ("UTC", "Asia/Shanghai", "America/New_York", "UTC"):
+            with self.subTest(zone=zone), timezone.override(zone):
+                self.assertSameOutput(User, UserSerializer, PlainUserSerializer)
+                self.assertSameOutput(UserToken, TokenSerializer, PlainTokenSerializer)
@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from libs.shm import GROUP_SIZE, SharedTable
+
+
+def increment(values):
+    count = values[0] + 1 if values is not None else 1.0
+    return [count], time.time() + 60, count
+
+
+def hammer(path, key, times):
+    table = SharedTable(path, slots=64, values=1)
+    for _ in range(times):
+        table.update(key, increment, time.time())
+
+
+class SharedTableTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, "table")
+
+    def test_update_and_items(self):
+        table = SharedTable(self.path, slots=64, values=2)
+        now = time.time()
+        table.update("a", lambda values: ([1.0, 2.0], now + 10, None), now)
+        result = table.update("a", lambda values: (values, now + 10, list(values)), now)
+        self.assertEqual(result, [1.0, 2.0])
+        self.assertEqual(dict(table.items(now)), {"a": [1.0, 2.0]})
+
+    def test_expired_entries_are_reset(self):
+        table = SharedTable(self.path, slots=64, values=1)
+        now = time.time()
+        table.update("a", lambda values: ([1.0], now + 1, None), now)
+        seen = table.update("a", lambda values: ([2.0], now + 10, values), now + 2)
+        self.assertIsNone(seen)
+        self.assertEqual(dict(table.items(now + 2)), {"a": [2.0]})
+
+    def test_full_group_evicts_earliest_expiry(self):
+        table = SharedTable(self.path, slots=GROUP_SIZE, values=1)
+        now = time.time()
+        for index in range(GROUP_SIZE + 1):
+            table.update(f"k{index}", lambda values, i=index: ([float(i)], now + 100 + i, None), now)
+        keys = dict(table.items(now))
+        self.assertEqual(len(keys), GROUP_SIZE)
+        self.assertNotIn("k0", keys)
+        self.assertIn(f"k{GROUP_SIZE}", keys)
+
+    def test_long_keys(self):
+        table = SharedTable(self.path, slots=64, values=1, key_size=16)
+        now = time.time()
+        table.update("x" * 100, lambda values: ([1.0], now + 10, None), now)
+        self.assertEqual(table.update("x" * 100, lambda values: (values, now + 10, values), now), [1.0])
+
+    def test_clear(self):
+        table = SharedTable(self.path, slots=64, values=1)
+        now = time.time()
+        table.update("a", lambda values: ([1.0], now + 10, None), now)
+        table.clear()
+        self.assertEqual(list(table.items(now)), [])
+
+    def test_updates_are_atomic_across_processes(self):
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=hammer, args=(self.path, "counter", 200)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        table = SharedTable(self.path, slots=64, values=1)
+        self.assertEqual(dict(table.items(time.time()))["counter"], [800.0])
+
+    def test_layout_is_part_of_the_file_name(self):
+        small = SharedTable(self.path, slots=64, values=1)
+        large = SharedTable(self.path, slots=128, values=1)
+        self.assertNotEqual(small.path, large.path)
+
+    def test_mismatched_file_is_not_truncated(self):
+        table = SharedTable(self.path, slots=64, values=1)
+        with open(table.path, "wb") as file:
+            file.write(b"x" * 10)
+        with self.assertRaises(RuntimeError):
+            table.update("a", increment, time.time())
+        self.assertEqual(os.path.getsize(table.path), 10)
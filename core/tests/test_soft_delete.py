@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.archive import archive_deleted
+from core.models import ArchivedRecord
+from core.pagination import approximate_count, is_unfiltered
+from users.models import User
+
+
+class SoftDeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([User(username=f"user{index}") for index in range(5)])
+
+    def test_default_manager_excludes_deleted(self):
+        User.objects.get(username="user0").delete()
+        self.assertEqual(User.objects.count(), 4)
+        self.assertEqual(User.objects.all_with_deleted().count(), 5)
+        self.assertEqual(list(User.objects.deleted_only().values_list("username", flat=True)), ["user0"])
+
+    def test_queryset_soft_delete_and_restore_use_one_update(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(User.objects.filter(username__in=["user1", "user2"]).soft_delete(), 2)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertTrue(all(User.objects.deleted_only().values_list("deleted_at", flat=True)))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(User.objects.deleted_only().restore(), 2)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertFalse(any(User.objects.values_list("deleted_at", flat=True)))
+
+    def test_archive_deleted_in_batches(self):
+        now = timezone.now()
+        User.objects.filter(username__in=["user0", "user1", "user2"]).update(
+            is_deleted=True, deleted_at=now - timedelta(days=100)
+        )
+        # 保留期内的软删除记录不归档
+        User.objects.filter(username="user3").update(is_deleted=True, deleted_at=now - timedelta(days=1))
+
+        stats = archive_deleted(models=[User], days=90, batch_size=2)
+        self.assertEqual(stats.rows_archived, 3)
+        self.assertEqual(stats.batches, 2)
+        self.assertEqual(
+            sorted(record.data["username"] for record in ArchivedRecord.objects.filter(model="users.user")),
+            ["user0", "user1", "user2"],
+        )
+        self.assertEqual(
+            sorted(User.objects.all_with_deleted().values_list("username", flat=True)), ["user3", "user4"]
+        )
+
+    def test_soft_delete_filter_counts_as_unfiltered(self):
+        # 默认管理器的软删除条件不影响 reltuples 估算
+        self.assertTrue(is_unfiltered(User.objects.all()))
+        self.assertTrue(is_unfiltered(User.objects.order_by("id").values_list("id", named=True)))
+        self.assertTrue(is_unfiltered(User.objects.all_with_deleted()))
+        self.assertFalse(is_unfiltered(User.objects.filter(username="user0")))
+        self.assertFalse(is_unfiltered(User.objects.deleted_only()))
+        self.assertEqual(approximate_count(User.objects.all()), 5)
+
+
+class ReRegisterDeletedUserTests(TestCase):
+    def test_deleted_username_is_rejected_by_validation(self):
+        User.objects.create_user("bob", "bob@example.com", "S3cure-pass-x").delete()
+        response = APIClient().post(
+            "/api/users/",
+            {"username": "bob", "password": "S3cure-pass-x", "email": "bob@example.com"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("UNIQUE constraint", response.content.decode())
+        self.assertEqual(User.objects.all_with_deleted().count(), 1)
@@ -1,7 +1,18 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotModified
+from django.utils.crypto import constant_time_compare
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
 from libs.logging import logger
+from libs.metrics import render_metrics, timed
+from libs.query_budget import check_budget, should_track, track_queries
+from core.exceptions import BusinessException
+from core.export import accepts_gzip
+from core import conditional, openapi
+from core.renderers import StreamingEnvelopeResponse
 
 
 class BaseViewSet(ModelViewSet):
@@ -11,6 +22,95 @@ class BaseViewSet(ModelViewSet):
     """
 
     serializer_class = None
+    # 各 action 的查询预算，如 {"list": 3}，见 libs.query_budget
+    query_budgets = {}
+    # 不做预算与 N+1 检查的 action（如按块处理的批量接口）
+    query_budget_exempt = set()
+    # 为 True 时 list 支持 ?stream=true：不分页，以统一格式流式返回全部结果（见 StreamingEnvelopeResponse）
+    stream_list = False
+    stream_query_param = "stream"
+
+    def dispatch(self, request, *args, **kwargs):
+        if not should_track():
+            return super().dispatch(request, *args, **kwargs)
+        with track_queries() as tracker:
+            response = super().dispatch(request, *args, **kwargs)
+        if self.action in self.query_budget_exempt:
+            return response
+        check_budget(
+            tracker,
+            f"{self.__class__.__name__}.{self.action}",
+            self.query_budgets.get(self.action),
+        )
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """支持条件请求（见 core.conditional），未修改时不序列化"""
+        instance = self.get_object()
+        validators = conditional.for_object(instance, request.accepted_media_type)
+        return conditional.respond(
+            request, validators, lambda: Response(self.get_serializer(instance).data)
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        支持条件请求：分页查询后由当前页的行与分页状态生成 ETag（见 core.conditional），未修改时不序列化
+        序列化器启用 compiled_read 时从 values_list() 元组生成列表，不实例化模型
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        serializer_class = self.get_serializer_class()
+        plan = getattr(serializer_class, "get_read_plan", lambda: None)()
+        if plan is not None:
+            queryset = queryset.values_list(*self.get_read_columns(plan, queryset), named=True)
+        if self.stream_list and request.query_params.get(self.stream_query_param) == "true":
+            return self.get_streaming_response(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            rows = list(queryset)
+            validators = conditional.for_page(request, model, rows, (), request.accepted_media_type)
+            return conditional.respond(
+                request, validators, lambda: Response(self.get_serializer(rows, many=True).data)
+            )
+
+        get_page_state = getattr(self.paginator, "get_page_state", None)
+        validators = None
+        if get_page_state is not None:
+            validators = conditional.for_page(
+                request, model, page, get_page_state(), request.accepted_media_type
+            )
+        return conditional.respond(
+            request,
+            validators,
+            lambda: self.get_paginated_response(self.get_serializer(page, many=True).data),
+        )
+
+    def get_streaming_response(self, queryset):
+        """分块读取并逐行序列化，响应体边生成边发送，内存占用与结果数量无关"""
+        serializer = self.get_serializer()
+        chunk_size = settings.JSON_RENDERER["STREAM_CHUNK_SIZE"]
+        rows = queryset.iterator(chunk_size=chunk_size)
+        response = StreamingEnvelopeResponse(
+            (serializer.to_representation(row) for row in rows), chunk_size=chunk_size
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def get_read_columns(self, plan, queryset):
+        """序列化需要的列，追加主键与排序字段供游标分页定位"""
+        meta = queryset.model._meta
+        ordering = [
+            *(getattr(self, "cursor_ordering", None) or ()),
+            *(queryset.query.order_by or meta.ordering or ()),
+        ]
+        extra = [meta.pk.attname]
+        if conditional.supports(queryset.model):
+            # 列表的 ETag 由各行的 updated_at 生成
+            extra.append(conditional.FIELD)
+        for name in ordering:
+            if isinstance(name, str) and "__" not in name and name.lstrip("-") not in ("?", "pk"):
+                extra.append(name.lstrip("-"))
+        return list(dict.fromkeys(plan.columns + tuple(extra)))
 
     def get_success_response(
         self, data=None, message="success", status_code=status.HTTP_200_OK
@@ -30,9 +130,71 @@ class BaseViewSet(ModelViewSet):
         response_data = {"status": "error", "message": message, "data": None}
         return Response(response_data, status=status_code)
 
+    def perform_authentication(self, request):
+        with timed("auth"):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with timed("perm"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed("perm"):
+            super().check_object_permissions(request, obj)
+
+    def check_throttles(self, request):
+        with timed("throttle"):
+            super().check_throttles(request)
+
     def handle_exception(self, exc):
         """
         统一异常处理
         """
         logger.error(f"Error in {self.__class__.__name__}: {str(exc)}")
+        if isinstance(exc, BusinessException):
+            return self.get_error_response(
+                message=exc.detail["message"], status_code=exc.status_code
+            )
         return self.get_error_response(message=str(exc))
+
+
+@require_GET
+def metrics(request):
+    """Prometheus 指标，配置 METRICS_TOKEN 时需携带 Bearer token"""
+    token = settings.METRICS["TOKEN"]
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@require_GET
+def openapi_schema(request, fmt):
+    """预生成的 OpenAPI schema（见 core/openapi.py），支持 gzip 与 If-None-Match"""
+    artifact = openapi.get_artifact(fmt)
+    compressed = accepts_gzip(request)
+    etag = artifact.gzip_etag if compressed else artifact.etag
+    conf = settings.OPENAPI_SCHEMA
+    if request.GET.get("v") == artifact.version:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = f"public, max-age={conf['MAX_AGE']}"
+
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if "*" in if_none_match or artifact.etag in if_none_match or artifact.gzip_etag in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            artifact.compressed if compressed else artifact.content,
+            content_type=openapi.FORMATS[fmt],
+        )
+        if compressed:
+            response["Content-Encoding"] = "gzip"
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    response["Vary"] = "Accept-Encoding"
+    response["Content-Location"] = f"{request.path}?v={artifact.version}"
+    return response
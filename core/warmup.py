@@ -0,0 +1,115 @@
+"""
+进程预热（见 gunicorn.conf.py）
+
+- prepare()：与进程无关的初始化，preload_app 时在 master 中执行，fork 后 worker 以写时复制方式共享：
+  导入 URLconf 与全部视图、填充 URL 解析器、加载翻译与 DRF 配置中的类、构建序列化读路径，
+  以及其他模块通过 register 注册的预热函数（如加载 JWT 密钥）
+- warm_worker()：每个进程各自持有的资源，在 worker 接收请求前执行：
+  为每个工作线程建立数据库连接（检查数据库可用；连接池模式下同时建立池中的连接），连接各缓存后端
+"""
+
+import threading
+import time
+from concurrent.futures import wait
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+from rest_framework.settings import api_settings
+
+from libs import db_pool
+from libs.logging import logger
+from .serializers import BaseModelSerializer
+
+# 启动时导入的 DRF 配置项（访问时才会 import_string）
+DRF_CLASS_SETTINGS = (
+    "DEFAULT_RENDERER_CLASSES",
+    "DEFAULT_PARSER_CLASSES",
+    "DEFAULT_AUTHENTICATION_CLASSES",
+    "DEFAULT_PERMISSION_CLASSES",
+    "DEFAULT_THROTTLE_CLASSES",
+    "DEFAULT_PAGINATION_CLASS",
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+    "DEFAULT_METADATA_CLASS",
+    "EXCEPTION_HANDLER",
+)
+
+_hooks = []
+
+
+def register(func):
+    """注册额外的进程无关预热函数，由 prepare() 在导入 URLconf 之后调用"""
+    _hooks.append(func)
+    return func
+
+
+def populate_resolver(resolver):
+    """填充解析器及其 include 的子解析器（Django 在首次解析到该前缀时才填充）"""
+    resolver.reverse_dict  # noqa: B018
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            populate_resolver(pattern)
+
+
+def serializer_classes(cls=BaseModelSerializer):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from serializer_classes(subclass)
+
+
+def prepare():
+    """进程无关的预热，可在 fork 之前执行；返回耗时（秒）"""
+    start = time.perf_counter()
+    populate_resolver(get_resolver())
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext("Authentication credentials were not provided.")
+    translation.deactivate()
+    for name in DRF_CLASS_SETTINGS:
+        getattr(api_settings, name)
+    for serializer_class in serializer_classes():
+        serializer_class.get_read_plan()
+    for func in _hooks:
+        func()
+    # 不把 master 中的数据库连接（及连接池）带入 worker
+    connections.close_all()
+    db_pool.close_pools()
+    return time.perf_counter() - start
+
+
+def open_connections(executor=None, threads=1):
+    """
+    为工作线程建立数据库连接（Django 连接按线程保存，CONN_MAX_AGE 内复用）
+    executor 为 worker 的线程池时用屏障让每个任务各占一个线程
+    """
+
+    def connect(barrier=None):
+        for alias in connections:
+            connections[alias].ensure_connection()
+        if barrier is not None:
+            barrier.wait(timeout=10)
+
+    if executor is None or threads <= 1:
+        connect()
+        return
+    barrier = threading.Barrier(threads)
+    futures = [executor.submit(connect, barrier) for _ in range(threads)]
+    done, _ = wait(futures, timeout=15)
+    for future in done:
+        future.result()
+
+
+def warm_worker(executor=None, threads=1):
+    """worker 接收请求前的预热，失败只记录警告（由首个请求重试）；返回耗时（秒）"""
+    start = time.perf_counter()
+    try:
+        open_connections(executor, threads)
+    except Exception as exc:
+        logger.warning(f"预热数据库连接失败: {exc}")
+    for alias in settings.CACHES:
+        try:
+            caches[alias].get("warmup")
+        except Exception as exc:
+            logger.warning(f"预热缓存 {alias} 失败: {exc}")
+    return time.perf_counter() - start
@@ -0,0 +1,116 @@
+"""
+Gunicorn 运行配置（gunicorn -c gunicorn.conf.py）
+
+- worker / 线程数：GUNICORN_WORKERS / GUNICORN_THREADS，留空时按可用 CPU（含容器 cgroup 配额）计算
+- preload_app：master 导入应用并执行 core.warmup.prepare()，fork 前冻结 GC，worker 以写时复制方式共享只读对象
+- post_worker_init：worker 接收请求前执行 core.warmup.warm_worker()，为每个工作线程建立数据库连接并连接缓存
+- max_requests + max_requests_jitter：worker 处理一定数量请求后错峰重启，回收内存碎片
+- ASGI：GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker，GUNICORN_APP=config.asgi:application
+- 多个 worker 时要求配置 CACHE_REDIS_URL（共享缓存），否则拒绝启动
+"""
+
+import gc
+import math
+import os
+
+ASYNC_WORKER_CLASSES = ("uvicorn.workers.UvicornWorker", "uvicorn.workers.UvicornH11Worker")
+
+
+def env_int(name, default):
+    value = os.getenv(name, "")
+    return int(value) if value.strip() else default
+
+
+def available_cpus():
+    """可用 CPU 数：考虑 CPU 亲和性与 cgroup v2 / v1 的 CPU 配额"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
+cpus = available_cpus()
+
+wsgi_app = os.getenv("GUNICORN_APP", "config.wsgi:application")
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# 同步 worker：2 x CPU + 1，上限 GUNICORN_MAX_WORKERS（每个 worker 还有独立的密码哈希进程池与缓存）；
+# 异步 worker 单进程即可处理大量连接，每个 CPU 一个
+if worker_class in ASYNC_WORKER_CLASSES:
+    default_workers = cpus
+else:
+    default_workers = min(2 * cpus + 1, env_int("GUNICORN_MAX_WORKERS", 8))
+workers = env_int("GUNICORN_WORKERS", default_workers)
+threads = env_int("GUNICORN_THREADS", 4)
+
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+# worker 心跳文件放在内存文件系统，避免容器 overlay 文件系统上的阻塞
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# 请求日志由 RequestLogMiddleware 输出
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """多个 worker 之间通过共享缓存同步状态（会话吊销、读主库固定、响应缓存锁等），未配置 Redis 时拒绝启动"""
+    if workers <= 1:
+        return
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    from django.conf import settings
+
+    if not settings.CACHES["shared"]["BACKEND"].endswith("RedisCache"):
+        raise RuntimeError("多个 worker 需要共享缓存，请设置 CACHE_REDIS_URL")
+
+
+def when_ready(server):
+    """master 就绪（preload 时应用已导入）：执行进程无关的预热"""
+    if not preload_app:
+        return
+    from core.warmup import prepare
+
+    server.log.info(f"预热完成（master）: {prepare() * 1000:.1f}ms")
+
+
+def pre_fork(server, worker):
+    """fork 前把 master 中已有对象移入永久代，worker 中的 GC 不再遍历（写入）这些共享页"""
+    if preload_app:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    """worker 加载应用后、接收请求前的预热"""
+    from core.warmup import prepare, warm_worker
+
+    elapsed = 0.0 if preload_app else prepare()
+    # gthread worker 的线程池在此之前已创建，为每个线程建立数据库连接
+    elapsed += warm_worker(getattr(worker, "tpool", None), threads)
+    worker.log.info(f"预热完成（worker {worker.pid}）: {elapsed * 1000:.1f}ms")
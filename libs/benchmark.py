@@ -0,0 +1,104 @@
+"""
+基准测试工具：延迟统计、基线对比与进程内存统计
+"""
+
+import statistics
+from pathlib import Path
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, elapsed, errors=0, queries=0):
+    """latencies 为秒，返回毫秒统计"""
+    ms = [value * 1000 for value in latencies]
+    count = len(ms)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(statistics.mean(ms), 3) if ms else 0.0,
+        "queries_per_request": round(queries / count, 2) if count else 0.0,
+    }
+
+
+def compare(results, baseline, latency_pct=20.0, throughput_pct=15.0, queries_delta=0.0):
+    """
+    与基线对比，返回 (rows, regressions)
+    :param latency_pct: p95 延迟允许增长的百分比
+    :param throughput_pct: 吞吐量允许下降的百分比
+    :param queries_delta: 每请求查询数允许增加的数量
+    """
+    rows = []
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        checks = (
+            ("p95_ms", current["p95_ms"] > base["p95_ms"] * (1 + latency_pct / 100)),
+            ("throughput", current["throughput"] < base["throughput"] * (1 - throughput_pct / 100)),
+            (
+                "queries_per_request",
+                current["queries_per_request"] > base["queries_per_request"] + queries_delta,
+            ),
+        )
+        for metric, regressed in checks:
+            before, after = base[metric], current[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append((name, metric, before, after, change, regressed))
+            if regressed:
+                regressions.append(f"{name}.{metric}: {before} -> {after} ({change:+.1f}%)")
+    return rows, regressions
+
+
+def process_tree(pid):
+    """pid 及其所有子孙进程（读取 /proc，仅 Linux）"""
+    children = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        pending.extend(children.get(current, []))
+    return pids
+
+
+def _tree_sum(pid, filename, field):
+    """进程树中每个进程 /proc/<pid>/<filename> 的 field 字段（kB）之和，单位字节"""
+    total = 0
+    for current in process_tree(pid):
+        try:
+            for line in Path(f"/proc/{current}/{filename}").read_text().splitlines():
+                if line.startswith(field):
+                    total += int(line.split()[1]) * 1024
+                    break
+        except OSError:
+            continue
+    return total
+
+
+def tree_rss(pid):
+    """进程树的常驻内存（字节）"""
+    return _tree_sum(pid, "status", "VmRSS:")
+
+
+def tree_pss(pid):
+    """进程树的按比例分摊内存（PSS，字节），fork 后共享的页按共享进程数分摊"""
+    return _tree_sum(pid, "smaps_rollup", "Pss:")
@@ -0,0 +1,484 @@
+"""
+多级缓存后端
+
+- L1：进程内 LRU，按条目数与字节数淘汰，过期时间不超过 L1_TIMEOUT 与该键在 L2 中的剩余有效期
+- L2：另一个 Django 缓存别名，多个 worker 共享，生产环境为 Redis（开发、测试环境可用进程内的 LocMemCache）
+
+值在写入时按 SERIALIZER（pickle / msgpack）序列化一次，L1 与 L2 存放同一份字节，字节前附带绝对过期时间；
+整数不经序列化且只存放在 L2。add / incr 直接交给 L2，其原子性由 L2 保证（Redis 的 SET NX / INCRBY），
+因此 L2 不能使用 add / incr 为非原子读改写的后端（如 FileBasedCache）。
+
+跨进程失效：L2 为 Redis 时，set / delete 等写操作通过发布/订阅通知其他进程丢弃对应的 L1 条目；
+订阅断开期间（可能错过通知）不使用 L1，重新订阅后清空 L1。L2 不支持通知时不启用 L1。
+
+配置示例：
+    CACHES = {
+        "default": {
+            "BACKEND": "libs.cache.TieredCache",
+            "OPTIONS": {"L2": "shared", "SERIALIZER": "pickle", "L1_MAX_BYTES": 64 * 1024 * 1024},
+        },
+        "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://..."},
+    }
+"""
+
+import logging
+import os
+import pickle
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger("django")
+
+# 字节值的头部：格式标记 + 绝对过期时间（0 表示不过期）
+HEADER = struct.Struct("!2sd")
+FORMAT = b"T1"
+
+COMPARE_AND_DELETE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class PickleSerializer:
+    def dumps(self, value):
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class MsgpackSerializer:
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImproperlyConfigured("SERIALIZER 为 msgpack 时需要安装 msgpack 包")
+        self.msgpack = msgpack
+
+    def dumps(self, value):
+        return self.msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data):
+        return self.msgpack.unpackb(data, raw=False)
+
+
+SERIALIZERS = {
+    "pickle": PickleSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+class LRUStore:
+    """按条目数和字节数限制的线程安全 LRU"""
+
+    def __init__(self, max_entries, max_bytes, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            data, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return data
+
+    def set(self, key, data, expires_at):
+        size = len(data) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (data, expires_at)
+            self.bytes += size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                if self.on_evict:
+                    self.on_evict()
+
+    def touch(self, key, expires_at):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data[key] = (item[0], expires_at)
+
+    def _remove(self, key):
+        data, _ = self._data.pop(key)
+        self.bytes -= len(data) + len(key)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisInvalidation:
+    """
+    通过 Redis 发布/订阅在进程间失效 L1
+
+    写操作后发布键名（附带本进程标识），后台线程订阅同一频道并删除本地 L1 中的对应条目。
+    订阅确认之前与连接断开期间 connected 未设置，此时不使用 L1
+    """
+
+    def __init__(self, cache, client, channel):
+        self.cache = cache
+        self.client = client
+        self.channel = channel
+        self.origin = uuid.uuid4().hex.encode()
+        self.connected = threading.Event()
+        # 每收到一次通知加一：读取 L2 期间若有变化，读到的值不写入 L1
+        self.generation = 0
+        self.pid = os.getpid()
+        threading.Thread(target=self._listen, name="tiered-cache-invalidation", daemon=True).start()
+
+    def publish(self, keys):
+        """通知其他进程，keys 为空表示清空全部 L1"""
+        try:
+            self.client.publish(self.channel, b"\0".join([self.origin, *(key.encode() for key in keys)]))
+        except Exception as e:
+            logger.warning(f"L1 失效通知发送失败: {e}")
+
+    def _listen(self):
+        delay = 0.1
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        # 订阅前的通知可能已错过
+                        self.generation += 1
+                        self.cache.l1.clear()
+                        self.connected.set()
+                        delay = 0.1
+                    elif message["type"] == "message":
+                        self._handle(message["data"])
+            except Exception as e:
+                logger.warning(f"L1 失效通知订阅中断: {e}")
+            finally:
+                self.connected.clear()
+                pubsub.close()
+            time.sleep(delay)
+            delay = min(delay * 2, 5)
+
+    def _handle(self, data):
+        origin, *keys = data.split(b"\0")
+        if origin == self.origin:
+            return
+        self.generation += 1
+        self.cache._count("invalidations")
+        if not keys:
+            self.cache.l1.clear()
+        for key in keys:
+            self.cache.l1.delete(key.decode())
+
+
+class TieredCache(BaseCache):
+    """L1 进程内 LRU + L2 共享缓存"""
+
+    STAT_NAMES = (
+        "l1_hits", "l1_misses", "l2_hits", "l2_misses", "sets", "deletes", "evictions", "invalidations",
+    )
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.l2_alias = options.get("L2")
+        self.l1_timeout = options.get("L1_TIMEOUT", 30)
+        self.channel = options.get("INVALIDATION_CHANNEL", f"tiered-cache:{self.l2_alias}")
+        self.serializer = SERIALIZERS[options.get("SERIALIZER", "pickle")]()
+        self.l1 = LRUStore(
+            options.get("L1_MAX_ENTRIES", 10000),
+            options.get("L1_MAX_BYTES", 64 * 1024 * 1024),
+            on_evict=lambda: self._count("evictions"),
+        )
+        self._stats = dict.fromkeys(self.STAT_NAMES, 0)
+        self._stats_lock = threading.Lock()
+        self._l2_checked = False
+        self._invalidation = None
+        self._invalidation_lock = threading.Lock()
+        self._compare_lock = threading.Lock()
+        self._compare_script = None
+
+    @property
+    def l2(self):
+        if not self.l2_alias:
+            return None
+        l2 = caches[self.l2_alias]
+        if not self._l2_checked:
+            if not isinstance(l2, (RedisCache, LocMemCache)):
+                # add / incr 依赖 L2 的原子操作，L1 依赖 L2 的失效通知
+                raise ImproperlyConfigured(
+                    f"TieredCache 的 L2（{self.l2_alias}）需要为 RedisCache（开发环境可用 LocMemCache）"
+                )
+            self._l2_checked = True
+        return l2
+
+    @property
+    def invalidation(self):
+        """L2 为 Redis 时的跨进程失效通知，fork 后在子进程中重新订阅"""
+        if self._invalidation is None or self._invalidation.pid != os.getpid():
+            with self._invalidation_lock:
+                if self._invalidation is None or self._invalidation.pid != os.getpid():
+                    client = self.l2._cache.get_client(write=True)
+                    self._invalidation = RedisInvalidation(self, client, self.channel)
+        return self._invalidation
+
+    def _l1_enabled(self):
+        l2 = self.l2
+        if l2 is None or isinstance(l2, LocMemCache):
+            # 无 L2 或 L2 同在本进程内，无需跨进程失效
+            return True
+        return self.invalidation.connected.is_set()
+
+    def _notify(self, keys):
+        """写操作后通知其他进程丢弃 L1 条目"""
+        if isinstance(self.l2, RedisCache):
+            self.invalidation.publish(keys)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        """命中 / 未命中 / 淘汰计数"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["l1_entries"] = len(self.l1)
+        stats["l1_bytes"] = self.l1.bytes
+        return stats
+
+    def _timeout(self, timeout):
+        """相对过期时间（秒），None 表示不过期"""
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _encode(self, value, timeout):
+        # 整数原样交给 L2，便于原子自增
+        if type(value) is int and self.l2_alias:
+            return value
+        expires_at = 0 if timeout is None else time.time() + timeout
+        return HEADER.pack(FORMAT, expires_at) + self.serializer.dumps(value)
+
+    def _decode(self, data):
+        if type(data) is int:
+            return data
+        return self.serializer.loads(data[HEADER.size:])
+
+    def _valid(self, data):
+        """L2 中的值是否为当前格式（升级前写入的值按未命中处理）"""
+        return type(data) is int or (type(data) is bytes and data[:len(FORMAT)] == FORMAT)
+
+    def _store_l1(self, key, data, generation=None):
+        """写入 L1，过期时间不超过 L1_TIMEOUT 与 L2 中的剩余有效期"""
+        if type(data) is not bytes or not self._l1_enabled():
+            return
+        if generation is not None and generation != self._generation():
+            # 读取 L2 期间其他进程修改过缓存，读到的值可能已过时
+            return
+        expires_at = HEADER.unpack_from(data)[1] or None
+        l1_expiry = time.time() + self.l1_timeout
+        self.l1.set(key, data, l1_expiry if expires_at is None else min(expires_at, l1_expiry))
+
+    def _generation(self):
+        return self._invalidation.generation if self._invalidation is not None else 0
+
+    def _get_l1(self, key):
+        if not self._l1_enabled():
+            return None
+        return self.l1.get(key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self._timeout(timeout)
+        data = self._encode(value, timeout)
+        if self.l2 is not None:
+            # 键在 L2 中不存在时，其他进程的 L1 中也不会有未过期的条目，无需通知
+            if not self.l2.add(key, data, timeout):
+                return False
+        elif self.l1.get(key) is not None:
+            return False
+        self._count("sets")
+        self._store_l1(key, data)
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        data = self._get_l1(key)
+        if data is not None:
+            self._count("l1_hits")
+            return self._decode(data)
+        self._count("l1_misses")
+        if self.l2 is None:
+            return default
+
+        generation = self._generation()
+        data = self.l2.get(key)
+        if data is None or not self._valid(data):
+            self._count("l2_misses")
+            return default
+        self._count("l2_hits")
+        self._store_l1(key, data, generation)
+        return self._decode(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self._timeout(timeout)
+        data = self._encode(value, timeout)
+        self._count("sets")
+        if self.l2 is not None:
+            self.l2.set(key, data, timeout)
+            self._notify([key])
+        if type(data) is bytes:
+            self._store_l1(key, data)
+        else:
+            self.l1.delete(key)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # 值中记录的过期时间不随 touch 更新，直接丢弃各进程的 L1 条目
+        self.l1.delete(key)
+        if self.l2 is not None:
+            touched = self.l2.touch(key, self._timeout(timeout))
+            if touched:
+                self._notify([key])
+            return touched
+        return False
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._count("deletes")
+        found = self.l1.get(key) is not None
+        self.l1.delete(key)
+        if self.l2 is not None:
+            deleted = self.l2.delete(key)
+            self._notify([key])
+            return deleted
+        return found
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if self._get_l1(key) is not None:
+            return True
+        return self.l2 is not None and self.l2.has_key(key)
+
+    def incr(self, key, delta=1, version=None):
+        if self.l2 is None:
+            return super().incr(key, delta, version)
+        key = self.make_and_validate_key(key, version=version)
+        # 整数只存放在 L2，自增的原子性由 L2 保证
+        return self.l2.incr(key, delta)
+
+    def delete_if_equal(self, key, value, version=None):
+        """
+        值仍等于整数 value 时删除（锁的比较后删除），返回是否删除
+        L2 为 Redis 时由 Lua 脚本原子执行；开发环境的进程内 L2 在本进程的锁内比较
+        """
+        key = self.make_and_validate_key(key, version=version)
+        l2 = self.l2
+        if isinstance(l2, RedisCache):
+            l2_key = l2.make_and_validate_key(key)
+            client = l2._cache.get_client(l2_key, write=True)
+            if self._compare_script is None:
+                self._compare_script = client.register_script(COMPARE_AND_DELETE_SCRIPT)
+            return bool(self._compare_script(keys=[l2_key], args=[value], client=client))
+        with self._compare_lock:
+            if l2 is not None:
+                if l2.get(key) != value:
+                    return False
+                return l2.delete(key)
+            data = self.l1.get(key)
+            if data is None or self._decode(data) != value:
+                return False
+            self.l1.delete(key)
+            return True
+
+    def get_many(self, keys, version=None):
+        result = {}
+        missing = {}
+        for key in keys:
+            made_key = self.make_and_validate_key(key, version=version)
+            data = self._get_l1(made_key)
+            if data is not None:
+                result[key] = self._decode(data)
+            else:
+                missing[made_key] = key
+        self._count("l1_hits", len(result))
+        self._count("l1_misses", len(missing))
+
+        if missing and self.l2 is not None:
+            generation = self._generation()
+            found = {k: v for k, v in self.l2.get_many(list(missing)).items() if self._valid(v)}
+            self._count("l2_hits", len(found))
+            self._count("l2_misses", len(missing) - len(found))
+            for made_key, data in found.items():
+                self._store_l1(made_key, data, generation)
+                result[missing[made_key]] = self._decode(data)
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        encoded = {
+            self.make_and_validate_key(key, version=version): self._encode(value, timeout)
+            for key, value in data.items()
+        }
+        self._count("sets", len(encoded))
+        failed = []
+        if self.l2 is not None:
+            failed = self.l2.set_many(encoded, timeout)
+            self._notify(list(encoded))
+        for made_key, value in encoded.items():
+            if type(value) is bytes:
+                self._store_l1(made_key, value)
+            else:
+                self.l1.delete(made_key)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        made_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not made_keys:
+            return
+        self._count("deletes", len(made_keys))
+        for key in made_keys:
+            self.l1.delete(key)
+        if self.l2 is not None:
+            self.l2.delete_many(made_keys)
+            self._notify(made_keys)
+
+    def clear(self):
+        self.l1.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+            self._notify([])
+
+    def clear_local(self):
+        """仅清空本进程的 L1"""
+        self.l1.clear()
@@ -0,0 +1,396 @@
+"""
+PostgreSQL 连接池（数据库后端 ENGINE = "libs.db_pool"，配置见 DATABASES[alias]["OPTIONS"]["pool"]）
+
+Django 的持久连接（CONN_MAX_AGE）按线程保存：每个线程各占一条连接，空闲超时后断开，
+worker 重启或发布时所有线程同时重连。连接池模式下：
+- 每个进程、每个数据库别名一个池，请求结束时（CONN_MAX_AGE=0）连接归还到池中而不是断开
+- min_size / max_size：保持的最少连接数 / 最多连接数；连接用尽时最多等待 timeout 秒，超时抛出 OperationalError
+- 取出时检查连接与事务状态（无网络往返），空闲超过 check_idle 秒的连接再执行一次 SELECT 1
+- 存活超过 max_lifetime（带 10% 随机提前量，避免同时重连）的连接关闭重建；
+  超出 min_size 的连接空闲超过 max_idle 后关闭
+- 后台线程定期回收过期连接、补足 min_size，并将统计写入共享内存表，由 /metrics 汇总各 worker 导出
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from libs.logging import logger
+from libs.metrics import register_collector
+from libs.shm import SharedTable, default_path
+
+ENGINE = "libs.db_pool"
+DEFAULTS = {
+    "min_size": 2,
+    "max_size": 4,
+    "timeout": 5.0,
+    "max_lifetime": 1800.0,
+    "max_idle": 300.0,
+    "check_idle": 10.0,
+}
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+STATS_FIELDS = (
+    "size", "idle", "in_use", "waiting", "max_size",
+    "checkouts", "timeouts", "opened", "closed", "checkout_seconds",
+)
+MAINTENANCE_INTERVAL = 5
+STATS_INTERVAL = 1
+STATS_TTL = 6 * MAINTENANCE_INTERVAL
+
+
+class PoolTimeout(Exception):
+    """等待可用连接超时"""
+
+
+class PooledConnection:
+    __slots__ = ("connection", "expires", "last_used")
+
+    def __init__(self, connection, now, max_lifetime):
+        self.connection = connection
+        self.expires = now + max_lifetime * (1 - random.random() * 0.1)
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    单个进程内线程安全的连接池
+    :param connect: connect() 建立新连接
+    :param check: check(connection, ping) -> bool，取出前检查连接是否可用，ping 为 True 时需访问数据库
+    :param reset: reset(connection) -> bool，归还时结束未完成的事务，返回 False 表示应关闭
+    :param close: close(connection) 关闭连接
+    """
+
+    def __init__(self, alias, connect, check, reset, close, *, min_size, max_size, timeout,
+                 max_lifetime, max_idle, check_idle):
+        self.alias = alias
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.close_connection = close
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_idle = check_idle
+
+        self._cond = threading.Condition()
+        # 右端为最近归还的连接：取出时优先复用，多余的连接留在左端空闲到期
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._counters = dict.fromkeys(("checkouts", "timeouts", "opened", "closed"), 0)
+        self._checkout_seconds = 0.0
+        self._checkout_buckets = [0] * len(CHECKOUT_BUCKETS)
+        self._published = 0.0
+        self._stop = threading.Event()
+        self._maintainer = threading.Thread(
+            target=self._maintain_loop, name=f"db-pool-{alias}", daemon=True
+        )
+        self._maintainer.start()
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            try:
+                entry, expired = self._acquire(deadline)
+            except PoolTimeout:
+                self.publish()
+                raise
+            self._close_entries(expired)
+            if entry is None:
+                entry = self._open()
+                break
+            ping = time.monotonic() - entry.last_used >= self.check_idle
+            if self.check(entry.connection, ping):
+                break
+            self._discard(entry)
+
+        duration = time.monotonic() - start
+        with self._cond:
+            self._in_use[id(entry.connection)] = entry
+            self._counters["checkouts"] += 1
+            self._checkout_seconds += duration
+            for i, bound in enumerate(CHECKOUT_BUCKETS):
+                if duration <= bound:
+                    self._checkout_buckets[i] += 1
+        self._maybe_publish()
+        return entry.connection
+
+    def putconn(self, connection, discard=False):
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # 不是从本池取出的连接（如池已重建）
+            self.close_connection(connection)
+            return
+        if discard or self._closed or entry.expires <= time.monotonic() or not self.reset(connection):
+            self._discard(entry)
+        else:
+            with self._cond:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                self._cond.notify()
+        self._maybe_publish()
+
+    def _acquire(self, deadline):
+        """取出一个空闲连接，或预留一个新建连接的名额（返回 None）；同时返回取出时发现的过期连接"""
+        expired = []
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._idle:
+                    entry = self._idle.pop()
+                    if entry.expires > now:
+                        return entry, expired
+                    self._size -= 1
+                    expired.append(entry)
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, expired
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"数据库连接池 {self.alias} 的 {self.max_size} 个连接均在使用中，等待 {self.timeout}s 超时"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _open(self):
+        """建立新连接，调用前已预留名额"""
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters["opened"] += 1
+        return PooledConnection(connection, time.monotonic(), self.max_lifetime)
+
+    def _close_entries(self, entries):
+        for entry in entries:
+            try:
+                self.close_connection(entry.connection)
+            except Exception as exc:
+                logger.warning(f"关闭数据库连接失败（{self.alias}）: {exc}")
+        if entries:
+            with self._cond:
+                self._counters["closed"] += len(entries)
+
+    def _discard(self, entry):
+        self._close_entries([entry])
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def maintain(self):
+        """关闭过期与多余的空闲连接，补足 min_size"""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            if self._closed:
+                return
+            keep = deque()
+            for entry in self._idle:
+                idle_too_long = (
+                    self._size - len(expired) > self.min_size and now - entry.last_used >= self.max_idle
+                )
+                if entry.expires <= now or idle_too_long:
+                    expired.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._size -= len(expired)
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+        self._close_entries(expired)
+        for opened in range(missing):
+            try:
+                entry = self._open()
+            except Exception as exc:
+                with self._cond:
+                    self._size -= missing - opened - 1
+                logger.warning(f"数据库连接池 {self.alias} 补充连接失败: {exc}")
+                break
+            with self._cond:
+                self._idle.appendleft(entry)
+                self._cond.notify()
+
+    def _maintain_loop(self):
+        while True:
+            try:
+                self.maintain()
+                self.publish()
+            except Exception as exc:
+                logger.warning(f"数据库连接池 {self.alias} 维护失败: {exc}")
+            if self._stop.wait(MAINTENANCE_INTERVAL):
+                return
+
+    def close(self):
+        """关闭池：立即关闭空闲连接，使用中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._stop.set()
+        self._close_entries(idle)
+
+    def stats(self):
+        with self._cond:
+            values = {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting,
+                "max_size": self.max_size,
+                **self._counters,
+                "checkout_seconds": self._checkout_seconds,
+            }
+            return values, list(self._checkout_buckets)
+
+    def _maybe_publish(self):
+        if time.monotonic() - self._published >= STATS_INTERVAL:
+            self.publish()
+
+    def publish(self):
+        """将本进程的统计写入共享内存表（至多每秒一次，另由后台线程定期刷新）"""
+        self._published = time.monotonic()
+        values, buckets = self.stats()
+        row = [float(values[field]) for field in STATS_FIELDS] + buckets
+        now = time.time()
+        get_stats_table().update(
+            f"{os.getpid()}|{self.alias}", lambda current: (row, now + STATS_TTL, None), now
+        )
+
+
+def pool_options(settings_dict):
+    """OPTIONS["pool"]（True 或参数字典）合并默认值并校验"""
+    options = settings_dict["OPTIONS"].get("pool") or {}
+    if options is True:
+        options = {}
+    unknown = set(options) - set(DEFAULTS)
+    if unknown:
+        raise ImproperlyConfigured(f"未知的连接池参数: {', '.join(sorted(unknown))}")
+    options = {**DEFAULTS, **options}
+    if options["max_size"] < 1 or not 0 <= options["min_size"] <= options["max_size"]:
+        raise ImproperlyConfigured("连接池参数需满足 0 <= min_size <= max_size 且 max_size >= 1")
+    return options
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# fork 时从父进程继承的池：保留引用，避免连接对象被回收时关闭父进程仍在使用的套接字
+_inherited = []
+
+
+def get_pool(alias, settings_dict, **callbacks):
+    """当前进程中 alias 对应的连接池，不存在时创建"""
+    key = (alias, settings_dict["NAME"])
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(alias, **callbacks, **pool_options(settings_dict))
+                _pools[key] = pool
+    return pool
+
+
+def close_pools():
+    """关闭当前进程的所有连接池（如 preload 的 master 在 fork 之前）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def _reset_after_fork():
+    global _pools_lock
+    _inherited.extend(_pools.values())
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+_stats_table = None
+
+
+def get_stats_table():
+    global _stats_table
+    if _stats_table is None:
+        _stats_table = SharedTable(
+            default_path("django-db-pool"),
+            slots=256,
+            values=len(STATS_FIELDS) + len(CHECKOUT_BUCKETS),
+        )
+    return _stats_table
+
+
+def pool_enabled():
+    return any(conf.get("ENGINE") == ENGINE for conf in settings.DATABASES.values())
+
+
+@register_collector
+def collect():
+    """各 worker 连接池统计的 Prometheus 文本行"""
+    if not pool_enabled():
+        return []
+    rows = []
+    for key, values in get_stats_table().items(time.time()):
+        pid, alias = key.split("|", 1)
+        stats = dict(zip(STATS_FIELDS, values))
+        buckets = values[len(STATS_FIELDS):]
+        rows.append((f'alias="{alias}",pid="{pid}"', stats, buckets))
+    rows.sort(key=lambda row: row[0])
+
+    lines = [
+        "# HELP db_pool_connections Pooled database connections by state",
+        "# TYPE db_pool_connections gauge",
+    ]
+    for labels, stats, _ in rows:
+        lines.append(f'db_pool_connections{{{labels},state="idle"}} {stats["idle"]:.0f}')
+        lines.append(f'db_pool_connections{{{labels},state="in_use"}} {stats["in_use"]:.0f}')
+    gauges = (
+        ("db_pool_max_connections", "max_size", "Maximum connections per pool"),
+        ("db_pool_waiting", "waiting", "Threads waiting for a pooled connection"),
+    )
+    counters = (
+        ("db_pool_checkout_timeouts_total", "timeouts", "Checkouts that timed out waiting for a connection"),
+        ("db_pool_connections_opened_total", "opened", "Connections opened by the pool"),
+        ("db_pool_connections_closed_total", "closed", "Connections closed by the pool"),
+    )
+    for kind, metrics in (("gauge", gauges), ("counter", counters)):
+        for name, field, description in metrics:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, stats, _ in rows:
+                lines.append(f"{name}{{{labels}}} {stats[field]:.0f}")
+
+    lines.append("# HELP db_pool_checkout_duration_seconds Time to check out a connection, including waiting and connecting")
+    lines.append("# TYPE db_pool_checkout_duration_seconds histogram")
+    for labels, stats, buckets in rows:
+        for bound, count in zip(CHECKOUT_BUCKETS, buckets):
+            lines.append(f'db_pool_checkout_duration_seconds_bucket{{{labels},le="{bound}"}} {count:.0f}')
+        lines.append(f'db_pool_checkout_duration_seconds_bucket{{{labels},le="+Inf"}} {stats["checkouts"]:.0f}')
+        lines.append(f"db_pool_checkout_duration_seconds_count{{{labels}}} {stats['checkouts']:.0f}")
+        lines.append(f"db_pool_checkout_duration_seconds_sum{{{labels}}} {stats['checkout_seconds']:.6f}")
+    return lines
@@ -0,0 +1,80 @@
+"""
+带连接池的 PostgreSQL 后端：建立连接改为从池中取出，关闭连接改为归还（见 libs/db_pool/__init__.py）
+"""
+
+from django.db.backends.postgresql import base
+
+from . import PoolTimeout, get_pool
+
+# libpq 的事务状态（PQTRANS_*，psycopg2 与 psycopg 3 取值相同）
+TRANSACTION_IDLE = 0
+TRANSACTION_INTRANS = 2
+TRANSACTION_INERROR = 3
+
+
+def check_connection(connection, ping):
+    if connection.closed or connection.info.transaction_status != TRANSACTION_IDLE:
+        return False
+    if not ping:
+        return True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if connection.info.transaction_status != TRANSACTION_IDLE:
+            connection.rollback()
+    except Exception:
+        return False
+    return True
+
+
+def reset_connection(connection):
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status in (TRANSACTION_INTRANS, TRANSACTION_INERROR):
+        try:
+            connection.rollback()
+        except Exception:
+            return False
+        status = connection.info.transaction_status
+    return status == TRANSACTION_IDLE
+
+
+def close_connection(connection):
+    if not connection.closed:
+        connection.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    @property
+    def pool(self):
+        # 每次查找：fork 之后需使用子进程自己的池
+        return get_pool(
+            self.alias,
+            self.settings_dict,
+            connect=self.connect_new,
+            check=check_connection,
+            reset=reset_connection,
+            close=close_connection,
+        )
+
+    def connect_new(self):
+        return super().get_new_connection(self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.pool.getconn()
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            # 在事务（atomic）中关闭时 Django 仍保留该连接对象，不能交给其他线程，直接关闭
+            self.pool.putconn(self.connection, discard=self.in_atomic_block)
@@ -5,40 +5,24 @@ API装饰器模块
 
 from functools import wraps
 from rest_framework.response import Response
-from libs.logging import logger
+import math
 import time
 import functools
-from django.core.cache import cache
 from django.conf import settings
 from core.exceptions import BusinessException
+from libs.ratelimit import check_rate_limit
+from libs.response_cache import cache_response  # noqa: F401
 
 
 def api_log(func):
     """
     API调用日志装饰器
-    记录请求的路径、方法、数据等信息，自动过滤敏感信息
+    为请求日志记录标注视图动作名，日志本身由 RequestLogMiddleware 统一输出
     """
 
     @wraps(func)
     def wrapper(self, request, *args, **kwargs):
-        # 过滤掉敏感信息
-        safe_headers = {
-            k: v
-            for k, v in request.headers.items()
-            if k.lower() not in ["authorization", "cookie"]
-        }
-        safe_data = {
-            k: "******" if k.lower() in ["password", "token"] else v
-            for k, v in request.data.items()
-        }
-
-        logger.info(
-            f"API调用 - {request.method} {request.path}\n"
-            f"Query参数: {request.GET}\n"
-            f"请求数据: {safe_data}\n"
-            f"请求头: {safe_headers}"
-        )
-
+        request._request.log_action = f"{self.__class__.__name__}.{func.__name__}"
         return func(self, request, *args, **kwargs)
 
     return wrapper
@@ -84,62 +68,33 @@ def validate_body_params(required_params):
     return decorator
 
 
-def rate_limit(key_prefix, limit=60, period=60):
+def rate_limit(key_prefix, limit=60, period=60, algorithm="sliding_window", key="ip"):
     """
     速率限制装饰器
     :param key_prefix: 缓存key前缀
     :param limit: 限制次数
     :param period: 时间周期(秒)
+    :param algorithm: sliding_window / token_bucket
+    :param key: 限流维度 ip / user / user_or_ip / route，或自定义函数
     """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(self, request, *args, **kwargs):
-            # 获取用户IP
-            ip = request.META.get('REMOTE_ADDR')
-            # 缓存key
-            cache_key = f"rate_limit:{key_prefix}:{ip}"
-            # 获取当前访问次数
-            count = cache.get(cache_key, 0)
-            
-            if count >= limit:
-                raise BusinessException(
-                    detail=f"请求过于频繁，请{period}秒后再试",
-                    code="rate_limit"
+            result = check_rate_limit(request, key_prefix, limit, period, algorithm, key)
+            if not result.allowed:
+                return Response(
+                    {
+                        "status": "error",
+                        "message": f"请求过于频繁，请{math.ceil(result.retry_after)}秒后再试",
+                        "data": None,
+                    },
+                    status=429,
+                    headers=result.headers(),
                 )
-            
-            # 增加访问次数
-            if count == 0:
-                cache.set(cache_key, 1, period)
-            else:
-                cache.incr(cache_key)
-                
-            return func(self, request, *args, **kwargs)
-        return wrapper
-    return decorator
 
-
-def cache_response(timeout=300, key_prefix='view'):
-    """
-    缓存响应装饰器
-    :param timeout: 缓存时间(秒)
-    :param key_prefix: 缓存key前缀
-    """
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(self, request, *args, **kwargs):
-            # 生成缓存key
-            cache_key = f"cache:{key_prefix}:{request.path}:{request.query_params}"
-            # 尝试获取缓存
-            response_data = cache.get(cache_key)
-            
-            if response_data is not None:
-                return Response(response_data)
-            
-            # 执行视图函数
             response = func(self, request, *args, **kwargs)
-            # 设置缓存
-            cache.set(cache_key, response.data, timeout)
-            
+            for header, value in result.headers().items():
+                response[header] = value
             return response
         return wrapper
     return decorator
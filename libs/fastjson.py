@@ -0,0 +1,67 @@
+"""
+JSON 编码后端
+
+BACKEND（settings.JSON_RENDERER）：
+- auto：已安装 orjson 时使用 orjson，否则使用标准库 json
+- orjson：强制使用 orjson，未安装时报错
+- json：标准库 json
+
+两种后端的输出与 DRF JSONRenderer（COMPACT_JSON、UNICODE_JSON 默认配置）一致：
+datetime / UUID / Decimal 等类型统一交给 DRF 的 JSONEncoder.default 转换。
+"""
+
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_drf_default = JSONEncoder().default
+
+
+class OrjsonBackend:
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImproperlyConfigured("JSON_RENDERER BACKEND 为 orjson 时需要安装 orjson 包")
+        # datetime 交给 DRF 的转换（毫秒精度、UTC 写作 Z），保证与标准库后端输出一致
+        self.option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value):
+        return orjson.dumps(value, default=_drf_default, option=self.option)
+
+
+class StdlibBackend:
+    name = "json"
+
+    def dumps(self, value):
+        return json.dumps(
+            value, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        name = settings.JSON_RENDERER["BACKEND"]
+        if name == "auto":
+            name = "orjson" if orjson is not None else "json"
+        _backend = OrjsonBackend() if name == "orjson" else StdlibBackend()
+    return _backend
+
+
+def dumps(value):
+    """编码为紧凑的 UTF-8 JSON 字节串，并转义 U+2028 / U+2029"""
+    data = get_backend().dumps(value)
+    if b"\xe2\x80" in data:
+        data = data.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return data
@@ -0,0 +1,205 @@
+"""
+请求耗时统计
+
+- 每个请求的分段耗时（认证、权限、限流、数据库、序列化、渲染），通过 Server-Timing 响应头返回
+- 按 方法 / 路由 / 状态码 统计的耗时直方图，存放在共享内存表中，多个 worker 汇总
+- 以 Prometheus 文本格式导出，其他模块可通过 register_collector 追加指标
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from libs.shm import SharedTable, default_path
+
+PHASES = ("auth", "perm", "throttle", "db", "serialize", "render")
+ENTRY_TTL = 30 * 24 * 3600
+MAX_ROUTE_LENGTH = 120
+
+
+class RequestTimings:
+    """单个请求的分段耗时"""
+
+    __slots__ = ("phases", "db_queries", "serializing")
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.db_queries = 0
+        self.serializing = False
+
+    def add(self, phase, seconds):
+        self.phases[phase] += seconds
+
+    def server_timing(self, total):
+        items = []
+        for phase, seconds in self.phases.items():
+            if seconds:
+                if phase == "db":
+                    items.append(f'db;dur={seconds * 1000:.2f};desc="{self.db_queries} queries"')
+                else:
+                    items.append(f"{phase};dur={seconds * 1000:.2f}")
+        items.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(items)
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+def current_timings():
+    return _current.get()
+
+
+def start_request():
+    """开始记录当前请求，返回 (timings, token)，结束时调用 finish_request(token)"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """将代码块耗时计入当前请求的 phase"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[phase] += time.perf_counter() - start
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.phases["db"] += time.perf_counter() - start
+        timings.db_queries += 1
+
+
+@receiver(connection_created)
+def install_db_wrapper(sender, connection, **kwargs):
+    # 连接重建时 DatabaseWrapper 对象不变，避免重复安装
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class LatencyRegistry:
+    """
+    跨 worker 的耗时直方图
+    每个 (方法, 路由, 状态码) 占一个槽位：各桶计数、总数、总耗时、各分段总耗时、查询总数
+    """
+
+    def __init__(self, path, slots, buckets):
+        self.buckets = tuple(buckets)
+        self.size = len(self.buckets) + 2 + len(PHASES) + 1
+        self.table = SharedTable(path, slots=slots, values=self.size, key_size=160)
+
+    def observe(self, method, route, status_code, duration, timings=None):
+        key = f"{method}|{route[:MAX_ROUTE_LENGTH]}|{status_code}"
+        buckets = self.buckets
+        count_index = len(buckets)
+
+        def update(values):
+            values = list(values) if values is not None else [0.0] * self.size
+            for i, bound in enumerate(buckets):
+                if duration <= bound:
+                    values[i] += 1
+            values[count_index] += 1
+            values[count_index + 1] += duration
+            if timings is not None:
+                for i, phase in enumerate(PHASES):
+                    values[count_index + 2 + i] += timings.phases[phase]
+                values[-1] += timings.db_queries
+            return values, now + ENTRY_TTL, None
+
+        now = time.time()
+        self.table.update(key, update, now)
+
+    def collect(self):
+        """Prometheus 文本格式的指标行"""
+        count_index = len(self.buckets)
+        rows = []
+        for key, values in self.table.items(time.time()):
+            method, route, status_code = key.rsplit("|", 2)
+            labels = f'method="{_escape(method)}",route="{_escape(route)}",status="{status_code}"'
+            rows.append((labels, values))
+        rows.sort()
+
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route and status",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for labels, values in rows:
+            for i, bound in enumerate(self.buckets):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {values[i]:.0f}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {values[count_index]:.0f}')
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {values[count_index]:.0f}")
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {values[count_index + 1]:.6f}")
+
+        lines.append("# HELP http_request_phase_seconds_total Time spent in each request phase")
+        lines.append("# TYPE http_request_phase_seconds_total counter")
+        for labels, values in rows:
+            for i, phase in enumerate(PHASES):
+                lines.append(
+                    f'http_request_phase_seconds_total{{{labels},phase="{phase}"}} '
+                    f"{values[count_index + 2 + i]:.6f}"
+                )
+
+        lines.append("# HELP http_request_db_queries_total Database queries executed by requests")
+        lines.append("# TYPE http_request_db_queries_total counter")
+        for labels, values in rows:
+            lines.append(f"http_request_db_queries_total{{{labels}}} {values[-1]:.0f}")
+        return lines
+
+    def clear(self):
+        self.table.clear()
+
+
+_collectors = []
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                conf = settings.METRICS
+                _registry = LatencyRegistry(
+                    conf["SHM_PATH"] or default_path("django-metrics"),
+                    conf["SHM_SLOTS"],
+                    conf["BUCKETS"],
+                )
+    return _registry
+
+
+def register_collector(func):
+    """注册额外的指标来源，func() 返回 Prometheus 文本行列表"""
+    _collectors.append(func)
+    return func
+
+
+def render_metrics():
+    lines = get_registry().collect()
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,83 @@
+"""
+不阻塞写入的迁移操作（PostgreSQL）
+
+- AddIndexConcurrently / RemoveIndexConcurrently：CREATE / DROP INDEX CONCURRENTLY，
+  所在迁移需设置 atomic = False
+- SetNotNull：将可空列改为非空。先添加 NOT VALID 的 CHECK 约束（只短暂加锁），
+  再 VALIDATE（扫描期间不阻塞读写），随后的 SET NOT NULL 利用已验证的约束跳过全表扫描（PostgreSQL 12+），
+  最后删除该 CHECK 约束
+
+其他数据库（开发环境的 SQLite）执行对应的普通操作。
+"""
+
+from django.db import NotSupportedError, migrations
+
+
+def _concurrently(schema_editor):
+    """是否使用不阻塞写入的方式执行，PostgreSQL 上要求迁移不在事务中"""
+    if schema_editor.connection.vendor != "postgresql":
+        return False
+    if schema_editor.connection.in_atomic_block:
+        raise NotSupportedError("CONCURRENTLY 操作不能在事务中执行，请在迁移中设置 atomic = False")
+    return True
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """CREATE INDEX CONCURRENTLY"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not _concurrently(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not _concurrently(schema_editor):
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class RemoveIndexConcurrently(migrations.RemoveIndex):
+    """DROP INDEX CONCURRENTLY"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not _concurrently(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = from_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            schema_editor.remove_index(model, index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not _concurrently(schema_editor):
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = to_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            schema_editor.add_index(model, index, concurrently=True)
+
+
+class SetNotNull(migrations.AlterField):
+    """将可空字段改为非空（field 除 null 外须与原字段一致）"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not _concurrently(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        quote = schema_editor.quote_name
+        table = model._meta.db_table
+        column = model._meta.get_field(self.name).column
+        constraint = quote(f"{table}_{column}_not_null"[:63])
+        table, column = quote(table), quote(column)
+        for sql in (
+            f"ALTER TABLE {table} ADD CONSTRAINT {constraint} CHECK ({column} IS NOT NULL) NOT VALID",
+            f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}",
+            f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL",
+            f"ALTER TABLE {table} DROP CONSTRAINT {constraint}",
+        ):
+            schema_editor.execute(sql, params=None)
@@ -0,0 +1,136 @@
+"""
+查询预算与 N+1 检测
+
+通过 connection.execute_wrapper 记录请求内的查询次数、耗时与 SQL 指纹（参数与 IN 列表归一化后的语句），
+同一指纹重复出现达到 N_PLUS_ONE_THRESHOLD 次视为疑似 N+1。
+
+视图集通过 query_budgets 为各 action 声明预算：
+    class UserViewSet(BaseViewSet):
+        query_budgets = {"profile": 0, "list": 3}
+
+MODE（settings.QUERY_BUDGET）：
+- raise：超出预算或发现 N+1 时抛出 QueryBudgetExceeded（测试环境默认）
+- log：按 SAMPLE_RATE 采样记录，超出时写警告日志
+- off：不记录
+"""
+
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from libs.logging import logger
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*%s\s*,?)+\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """归一化 SQL：参数、字面量与 IN 列表替换为占位符"""
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """查询次数超出预算或存在 N+1"""
+
+
+class QueryTracker:
+    """单个请求内的查询记录"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, sql, duration, many):
+        self.count += 1
+        self.duration += duration
+        if not many:
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold):
+        """重复次数不少于 threshold 的 SELECT 指纹"""
+        return [
+            (sql, count)
+            for sql, count in self.fingerprints.most_common()
+            if count >= threshold and sql.upper().startswith("SELECT")
+        ]
+
+    def duplicates(self):
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+    def summary(self):
+        return {
+            "queries": self.count,
+            "duration_ms": round(self.duration * 1000, 2),
+            "duplicates": self.duplicates(),
+        }
+
+
+_current = ContextVar("query_tracker", default=None)
+
+
+def tracker_execute_wrapper(execute, sql, params, many, context):
+    tracker = _current.get()
+    if tracker is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        tracker.record(sql, time.perf_counter() - start, many)
+
+
+@receiver(connection_created)
+def install_tracker(sender, connection, **kwargs):
+    if tracker_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(tracker_execute_wrapper)
+
+
+@contextmanager
+def track_queries():
+    """记录代码块内的查询，返回 QueryTracker"""
+    tracker = QueryTracker()
+    token = _current.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current.reset(token)
+
+
+def should_track():
+    conf = settings.QUERY_BUDGET
+    if conf["MODE"] == "raise":
+        return True
+    if conf["MODE"] == "log":
+        rate = conf["SAMPLE_RATE"]
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+    return False
+
+
+def check_budget(tracker, name, budget=None):
+    """检查查询预算与 N+1，按 MODE 抛出异常或写日志"""
+    conf = settings.QUERY_BUDGET
+    problems = []
+    if budget is not None and tracker.count > budget:
+        problems.append(f"执行了 {tracker.count} 次查询，超出预算 {budget}")
+    for sql, count in tracker.repeated(conf["N_PLUS_ONE_THRESHOLD"]):
+        problems.append(f"疑似 N+1，重复 {count} 次: {sql[:200]}")
+    if not problems:
+        return
+
+    message = f"{name} 查询检查未通过 {tracker.summary()}:\n" + "\n".join(problems)
+    if conf["MODE"] == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,279 @@
+"""
+限流引擎
+
+算法：
+- sliding_window：滑动窗口计数（按上一窗口剩余比例加权）
+- token_bucket：令牌桶，容量为 limit，每 period 秒补满
+
+后端（settings.RATE_LIMIT["BACKEND"]）：
+- shm：基于 mmap 的共享内存表，同一主机的多个 worker 共享计数
+- redis：Redis 兼容服务，使用 Lua 脚本保证原子性
+- memory：进程内实现，用于本地开发与测试
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from libs.shm import SharedTable, default_path
+
+
+@dataclass
+class RateLimitResult:
+    """单次限流判定结果"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float  # 距离额度完全恢复的秒数
+    retry_after: float  # 被拒绝时建议的重试等待秒数
+
+    def headers(self):
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+# 算法：state 为 None 表示首次访问，返回 (new_state, expires, RateLimitResult)
+
+
+def sliding_window(state, limit, period, now):
+    window_start, current, previous = state or (0.0, 0.0, 0.0)
+    window = math.floor(now / period) * period
+    if window != window_start:
+        previous = current if window - window_start == period else 0.0
+        current = 0.0
+        window_start = window
+
+    elapsed = now - window_start
+    weight = (period - elapsed) / period
+    estimated = previous * weight + current
+
+    if estimated + 1 <= limit:
+        current += 1
+        remaining = int(limit - (estimated + 1))
+        result = RateLimitResult(True, limit, remaining, period - elapsed, 0.0)
+    else:
+        # 等到上一窗口的加权计数衰减到可以容纳本次请求
+        if previous > 0 and current + 1 <= limit:
+            retry_after = period - elapsed - (limit - current - 1) / previous * period
+            retry_after = max(retry_after, 0.0)
+        else:
+            retry_after = period - elapsed
+        result = RateLimitResult(False, limit, 0, period - elapsed, retry_after)
+
+    return (window_start, current, previous), window_start + 2 * period, result
+
+
+def token_bucket(state, limit, period, now):
+    rate = limit / period
+    tokens, updated_at, _ = state or (float(limit), now, 0.0)
+    tokens = min(float(limit), tokens + (now - updated_at) * rate)
+
+    if tokens >= 1:
+        tokens -= 1
+        result = RateLimitResult(True, limit, int(tokens), (limit - tokens) / rate, 0.0)
+    else:
+        result = RateLimitResult(False, limit, 0, (limit - tokens) / rate, (1 - tokens) / rate)
+
+    return (tokens, now, 0.0), now + period, result
+
+
+ALGORITHMS = {
+    "sliding_window": sliding_window,
+    "token_bucket": token_bucket,
+}
+
+
+class MemoryBackend:
+    """进程内后端"""
+
+    def __init__(self, **options):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, algorithm, limit, period):
+        now = time.time()
+        with self._lock:
+            state, expires = self._data.get(key, (None, 0))
+            if expires <= now:
+                state = None
+            state, expires, result = ALGORITHMS[algorithm](state, limit, period, now)
+            self._data[key] = (state, expires)
+            if len(self._data) > 100000:
+                self._data = {k: v for k, v in self._data.items() if v[1] > now}
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SharedMemoryBackend:
+    """共享内存后端"""
+
+    def __init__(self, **options):
+        self.table = SharedTable(
+            options.get("SHM_PATH") or default_path("django-ratelimit"),
+            slots=options.get("SHM_SLOTS", 65536),
+            values=3,
+        )
+
+    def hit(self, key, algorithm, limit, period):
+        func = ALGORITHMS[algorithm]
+        now = time.time()
+        return self.table.update(key, lambda state: func(state, limit, period, now), now)
+
+    def clear(self):
+        self.table.clear()
+
+
+SLIDING_WINDOW_SCRIPT = """
+local period = tonumber(ARGV[2])
+local limit = tonumber(ARGV[1])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'start', 'curr', 'prev')
+local start = tonumber(data[1]) or 0
+local curr = tonumber(data[2]) or 0
+local prev = tonumber(data[3]) or 0
+local window = math.floor(now / period) * period
+if window ~= start then
+    if window - start == period then prev = curr else prev = 0 end
+    curr = 0
+    start = window
+end
+local elapsed = now - start
+local estimated = prev * (period - elapsed) / period + curr
+local allowed = 0
+local remaining = 0
+local retry = 0
+if estimated + 1 <= limit then
+    curr = curr + 1
+    allowed = 1
+    remaining = math.floor(limit - estimated - 1)
+elseif prev > 0 and curr + 1 <= limit then
+    retry = math.max(period - elapsed - (limit - curr - 1) / prev * period, 0)
+else
+    retry = period - elapsed
+end
+redis.call('HSET', KEYS[1], 'start', start, 'curr', curr, 'prev', prev)
+redis.call('PEXPIRE', KEYS[1], math.ceil(2 * period * 1000))
+return {allowed, remaining, tostring(period - elapsed), tostring(retry)}
+"""
+
+TOKEN_BUCKET_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local rate = limit / period
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or limit
+local ts = tonumber(data[2]) or now
+tokens = math.min(limit, tokens + (now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(period * 1000))
+return {allowed, math.floor(tokens), tostring((limit - tokens) / rate), tostring(retry)}
+"""
+
+
+class RedisBackend:
+    """Redis 兼容服务后端"""
+
+    def __init__(self, **options):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RATE_LIMIT BACKEND 为 redis 时需要安装 redis 包")
+        self.client = redis.Redis.from_url(options["REDIS_URL"])
+        self.scripts = {
+            "sliding_window": self.client.register_script(SLIDING_WINDOW_SCRIPT),
+            "token_bucket": self.client.register_script(TOKEN_BUCKET_SCRIPT),
+        }
+
+    def hit(self, key, algorithm, limit, period):
+        allowed, remaining, reset, retry_after = self.scripts[algorithm](
+            keys=[key], args=[limit, period, time.time()]
+        )
+        return RateLimitResult(
+            bool(allowed), limit, int(remaining), float(reset), float(retry_after)
+        )
+
+    def clear(self):
+        for key in self.client.scan_iter("rl:*"):
+            self.client.delete(key)
+
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "shm": SharedMemoryBackend,
+    "redis": RedisBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """按 settings.RATE_LIMIT 创建的全局后端"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = settings.RATE_LIMIT
+                _backend = BACKENDS[options["BACKEND"]](**options)
+    return _backend
+
+
+def get_client_ip(request):
+    return request.META.get("REMOTE_ADDR")
+
+
+def build_key(request, key_prefix, key="ip"):
+    """
+    生成限流 key
+    :param key: ip / user / route / user_or_ip，或接收 request 返回字符串的函数
+    """
+    if callable(key):
+        ident = key(request)
+    elif key == "ip":
+        ident = get_client_ip(request)
+    elif key == "user":
+        ident = getattr(request.user, "pk", None) or "anonymous"
+    elif key == "user_or_ip":
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            ident = f"u{user.pk}"
+        else:
+            ident = get_client_ip(request)
+    elif key == "route":
+        ident = "all"
+    else:
+        raise ValueError(f"Unknown rate limit key: {key}")
+
+    match = getattr(request, "resolver_match", None)
+    route = match.route if match is not None else request.path
+    return f"rl:{key_prefix}:{request.method}:{route}:{ident}"
+
+
+def check_rate_limit(request, key_prefix, limit, period, algorithm="sliding_window", key="ip"):
+    """记录一次访问并返回 RateLimitResult"""
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+    return get_backend().hit(build_key(request, key_prefix, key), algorithm, limit, period)
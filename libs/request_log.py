@@ -0,0 +1,260 @@
+"""
+请求日志流水线
+
+请求线程只收集原始数据（方法、路径、状态码、耗时、截断后的请求体字节等），
+解析、脱敏与 JSON 序列化都在后台线程中完成；队列满时直接丢弃并计数，不阻塞请求。
+
+- 按路由前缀配置采样率，错误响应与慢请求始终记录
+- 只读取不超过 MAX_BODY_BYTES 的文本类请求体，multipart / 二进制请求体只记录类型与大小
+- 敏感字段（password、token 等）的匹配规则只编译一次
+- 每个请求输出一条包含请求与响应信息的结构化记录
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.http.request import RawPostDataException
+from django.utils.functional import SimpleLazyObject, empty
+
+REDACTED = "******"
+TEXT_CONTENT_TYPES = ("application/json", "application/x-www-form-urlencoded", "text/")
+
+logger = logging.getLogger("request")
+
+
+class Redactor:
+    """按字段名脱敏，规则在初始化时编译"""
+
+    def __init__(self, fields):
+        self.pattern = re.compile("|".join(re.escape(field) for field in fields), re.IGNORECASE)
+
+    def is_sensitive(self, name):
+        return self.pattern.search(name) is not None
+
+    def redact(self, value):
+        if isinstance(value, dict):
+            return {
+                k: REDACTED if isinstance(k, str) and self.is_sensitive(k) else self.redact(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self.redact(item) for item in value]
+        return value
+
+    def redact_pairs(self, pairs):
+        result = {}
+        for name, value in pairs:
+            result[name] = REDACTED if self.is_sensitive(name) else value
+        return result
+
+
+class RequestLogRecord:
+    """请求日志记录，只保存原始数据，render() 在后台线程中调用"""
+
+    __slots__ = (
+        "timestamp", "method", "path", "route", "action", "query_string", "status_code",
+        "duration", "client_ip", "user_id", "headers", "content_type", "body", "body_note",
+        "response_size",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def _render_body(self, redactor):
+        if self.body_note is not None:
+            return self.body_note
+        if not self.body:
+            return None
+        try:
+            if self.content_type.startswith("application/json"):
+                return redactor.redact(json.loads(self.body))
+            if self.content_type.startswith("application/x-www-form-urlencoded"):
+                return redactor.redact_pairs(parse_qsl(self.body.decode("utf-8"), keep_blank_values=True))
+        except (ValueError, UnicodeDecodeError):
+            return {"invalid": True, "size": len(self.body)}
+        # 其他文本内容无法按字段脱敏，只记录大小
+        return {"size": len(self.body)}
+
+    def render(self, redactor):
+        data = {
+            "timestamp": self.timestamp,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "action": self.action,
+            "status_code": self.status_code,
+            "duration_ms": round(self.duration * 1000, 2),
+            "client_ip": self.client_ip,
+            "user_id": self.user_id,
+        }
+        if self.query_string:
+            data["query_params"] = redactor.redact_pairs(
+                parse_qsl(self.query_string, keep_blank_values=True)
+            )
+        if self.headers:
+            data["headers"] = redactor.redact_pairs(self.headers.items())
+        body = self._render_body(redactor)
+        if body is not None:
+            data["body"] = body
+        if self.response_size is not None:
+            data["response_size"] = self.response_size
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class RequestLogPipeline:
+    """后台写日志的有界队列"""
+
+    STAT_NAMES = ("submitted", "written", "dropped", "sampled_out", "errors")
+
+    def __init__(self):
+        self.configure()
+
+    def configure(self, **overrides):
+        """根据 settings.REQUEST_LOG 重新配置，可传入覆盖项"""
+        conf = {**settings.REQUEST_LOG, **overrides}
+        self.enabled = conf["ENABLED"]
+        self.sample_rate = conf["SAMPLE_RATE"]
+        # 最长前缀优先匹配
+        self.route_rates = sorted(conf["ROUTE_SAMPLE_RATES"].items(), key=lambda item: -len(item[0]))
+        self.always_log_status = conf["ALWAYS_LOG_STATUS"]
+        self.slow_threshold = conf["SLOW_THRESHOLD"]
+        self.max_body_bytes = conf["MAX_BODY_BYTES"]
+        self.body_methods = frozenset(conf["BODY_METHODS"])
+        self.header_names = [(name, "HTTP_" + name.upper().replace("-", "_")) for name in conf["HEADERS"]]
+        self.queue_size = conf["QUEUE_SIZE"]
+        self.redactor = Redactor(conf["REDACT_FIELDS"])
+        self._stats = dict.fromkeys(self.STAT_NAMES, 0)
+        self._stats_lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    def _ensure_worker(self):
+        # fork 后的 worker 需要各自启动后台线程
+        if self._pid != os.getpid():
+            with self._stats_lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(self.queue_size)
+                    self._thread = threading.Thread(
+                        target=self._run, args=(self._queue,), name="request-log", daemon=True
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def _run(self, records):
+        while True:
+            record = records.get()
+            try:
+                logger.info(record.render(self.redactor))
+                self._count("written")
+            except Exception:
+                self._count("errors")
+            finally:
+                records.task_done()
+
+    def should_log(self, path, status_code, duration):
+        if not self.enabled:
+            return False
+        if status_code >= self.always_log_status or duration >= self.slow_threshold:
+            return True
+        rate = self.sample_rate
+        for prefix, route_rate in self.route_rates:
+            if path.startswith(prefix):
+                rate = route_rate
+                break
+        if rate >= 1 or (rate > 0 and random.random() < rate):
+            return True
+        self._count("sampled_out")
+        return False
+
+    def submit(self, record):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(record)
+            self._count("submitted")
+        except queue.Full:
+            self._count("dropped")
+
+    def flush(self, timeout=5):
+        """等待队列中的记录写完"""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def capture_body(self, request):
+        """
+        在视图执行前调用，返回 (body, note)
+        只读取不超过上限的文本请求体（读取后由 Django 缓存，视图解析时不会重复读取）；
+        multipart 等二进制内容只记录类型与大小，不读入内存
+        """
+        if not self.enabled or request.method not in self.body_methods:
+            return None, None
+        content_type = request.META.get("CONTENT_TYPE", "")
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if not length:
+            return None, None
+        if not content_type.startswith(TEXT_CONTENT_TYPES):
+            return None, {"skipped": content_type.split(";")[0], "size": length}
+        if length > self.max_body_bytes:
+            return None, {"truncated": True, "size": length}
+        try:
+            return request.body[: self.max_body_bytes], None
+        except RawPostDataException:
+            return None, {"unavailable": True, "size": length}
+
+    def build_record(self, request, response, duration, body=None, note=None):
+        """在请求线程中收集原始数据"""
+        meta = request.META
+        match = getattr(request, "resolver_match", None)
+
+        user_id = None
+        user = request.__dict__.get("user")
+        if user is not None and not (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+            user_id = getattr(user, "pk", None)
+
+        return RequestLogRecord(
+            timestamp=time.time(),
+            method=request.method,
+            path=request.path,
+            route=match.route if match is not None else None,
+            action=getattr(request, "log_action", None),
+            query_string=meta.get("QUERY_STRING"),
+            status_code=response.status_code,
+            duration=duration,
+            client_ip=meta.get("REMOTE_ADDR"),
+            user_id=user_id,
+            headers={name: meta[key] for name, key in self.header_names if key in meta},
+            content_type=meta.get("CONTENT_TYPE", ""),
+            body=body,
+            body_note=note,
+            response_size=None if response.streaming else len(response.content),
+        )
+
+
+request_log = RequestLogPipeline()
+atexit.register(request_log.flush)
@@ -0,0 +1,289 @@
+"""
+视图响应缓存
+
+- 规范化 key：查询参数排序，按用户、声明的请求头与参数区分
+- 只缓存 200 响应
+- single-flight：并发未命中时只有一个请求执行视图，其余请求等待结果
+- stale-while-revalidate：过期后的 stale_ttl 内，由抢到锁的请求重新计算，
+  其余请求直接返回旧数据
+- 按标签失效：key 中包含标签版本号，BaseModel 保存/删除时自增对应模型的版本号；
+  只处理被 cache_response 用作标签的模型，其他模型（如 UserToken）的写入不访问缓存
+- 缓存 ETag / Last-Modified 等响应头，命中时条件请求（If-None-Match / If-Modified-Since）满足则返回 304
+- 按视图统计命中情况（多个 worker 汇总到共享内存表，见 /metrics），响应头 X-Cache 标明 HIT / STALE / MISS
+
+示例：
+    @cache_response(timeout=60, key_prefix="user_list", stale_ttl=30, tags=[User])
+    def list(self, request, *args, **kwargs):
+        ...
+"""
+
+import functools
+import hashlib
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import get_resolver
+from django.utils.http import parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from libs.metrics import register_collector
+from libs.shm import SharedTable, default_path
+
+TAG_KEY = "rc:tag:{}"
+LOCK_KEY = "rc:lock:{}"
+ENTRY_KEY = "rc:entry:{}"
+
+STAT_NAMES = ("hits", "stale_hits", "misses", "waits", "uncacheable")
+STATS_TTL = 30 * 24 * 3600
+# 随缓存响应保存的响应头（条件请求的校验值）
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+# cache_response 声明过的标签
+_cached_tags = set()
+_resolver_loaded = False
+_stats_table = None
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE["ALIAS"]]
+
+
+def get_stats_table():
+    global _stats_table
+    if _stats_table is None:
+        _stats_table = SharedTable(
+            default_path("django-response-cache"), slots=256, values=len(STAT_NAMES)
+        )
+    return _stats_table
+
+
+def _count(view, name):
+    index = STAT_NAMES.index(name)
+    now = time.time()
+
+    def update(values):
+        values = list(values) if values is not None else [0.0] * len(STAT_NAMES)
+        values[index] += 1
+        return values, now + STATS_TTL, None
+
+    get_stats_table().update(view, update, now)
+
+
+def get_stats():
+    """各视图的缓存使用情况（所有 worker 合计）"""
+    return {
+        view: dict(zip(STAT_NAMES, (int(value) for value in values)))
+        for view, values in get_stats_table().items(time.time())
+    }
+
+
+@register_collector
+def collect():
+    """各视图响应缓存统计的 Prometheus 文本行"""
+    lines = [
+        "# HELP response_cache_requests_total Cached view requests by view and result",
+        "# TYPE response_cache_requests_total counter",
+    ]
+    for view, counts in sorted(get_stats().items()):
+        for name, value in counts.items():
+            lines.append(f'response_cache_requests_total{{view="{view}",result="{name}"}} {value}')
+    return lines
+
+
+def _acquire(cache, lock_key, timeout):
+    """尝试加锁，成功时返回锁令牌（整数，由 L2 原样保存以便比较），否则返回 None"""
+    token = secrets.randbits(62) + 1
+    return token if cache.add(lock_key, token, timeout) else None
+
+
+def _release(cache, lock_key, token):
+    """锁仍由本请求持有时才删除：超时后锁可能已被其他请求获得"""
+    delete_if_equal = getattr(cache, "delete_if_equal", None)
+    if delete_if_equal is not None:
+        delete_if_equal(lock_key, token)
+    elif cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _not_modified(request, headers):
+    """按缓存的 ETag / Last-Modified 判断条件请求是否可返回 304"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        etag = headers.get("ETag")
+        if not etag:
+            return False
+        etags = parse_etags(if_none_match)
+        opaque = etag.removeprefix("W/")
+        return "*" in etags or any(value.removeprefix("W/") == opaque for value in etags)
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    modified = parse_http_date_safe(headers.get("Last-Modified", ""))
+    return since is not None and modified is not None and modified <= since
+
+
+def _cached(request, entry, state):
+    headers = entry.get("headers", {})
+    if _not_modified(request, headers):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(entry["data"], status=entry["status"])
+    for name, value in headers.items():
+        response[name] = value
+    response["X-Cache"] = state
+    return response
+
+
+def tag_for_model(model):
+    return model._meta.label_lower
+
+
+def _normalize_tag(tag):
+    return tag if isinstance(tag, str) else tag_for_model(tag)
+
+
+def invalidate_tags(*tags):
+    """使带有这些标签的缓存全部失效"""
+    cache = get_cache()
+    for tag in tags:
+        key = TAG_KEY.format(_normalize_tag(tag))
+        try:
+            cache.incr(key)
+        except ValueError:
+            # 首次失效：版本号从 1 开始，与未设置时的 0 区分
+            if not cache.add(key, 1, None):
+                cache.incr(key)
+
+
+def is_cached_tag(tag):
+    """标签是否被某个 cache_response 使用"""
+    global _resolver_loaded
+    if not _resolver_loaded:
+        # 导入全部视图，使其 cache_response 声明的标签完成注册（管理命令等进程不会主动导入视图）
+        get_resolver().url_patterns
+        _resolver_loaded = True
+    return _normalize_tag(tag) in _cached_tags
+
+
+def invalidate_model(model):
+    """模型数据变更：仅当该模型被用作缓存标签时使相关缓存失效"""
+    if is_cached_tag(model):
+        invalidate_tags(tag_for_model(model))
+
+
+def build_cache_key(request, key_prefix, vary_on_user=True, vary_on_headers=(), vary_on_params=None, tags=()):
+    """生成与参数顺序无关的缓存 key"""
+    params = request.query_params
+    names = sorted(params.keys()) if vary_on_params is None else sorted(vary_on_params)
+    # 分页链接等包含请求的主机名
+    parts = [key_prefix, request.method, request.get_host(), request.path]
+    for name in names:
+        for value in sorted(params.getlist(name)):
+            parts.append(f"q:{name}={value}")
+    for header in sorted(h.lower() for h in vary_on_headers):
+        parts.append(f"h:{header}={request.headers.get(header, '')}")
+    if vary_on_user:
+        user = getattr(request, "user", None)
+        parts.append(f"u:{user.pk}" if user is not None and user.is_authenticated else "u:anon")
+
+    if tags:
+        tag_keys = [TAG_KEY.format(_normalize_tag(tag)) for tag in tags]
+        versions = get_cache().get_many(tag_keys)
+        for tag_key in sorted(tag_keys):
+            parts.append(f"t:{tag_key}={versions.get(tag_key, 0)}")
+
+    digest = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+    return f"{key_prefix}:{digest}"
+
+
+def cache_response(
+    timeout=300,
+    key_prefix="view",
+    vary_on_user=True,
+    vary_on_headers=(),
+    vary_on_params=None,
+    stale_ttl=0,
+    tags=(),
+):
+    """
+    视图响应缓存装饰器
+    :param timeout: 新鲜期(秒)
+    :param key_prefix: 缓存key前缀，同时作为统计中的视图名
+    :param vary_on_user: 是否按用户区分
+    :param vary_on_headers: 参与 key 的请求头
+    :param vary_on_params: 参与 key 的查询参数，None 表示全部
+    :param stale_ttl: 过期后仍可返回旧数据的时间(秒)
+    :param tags: 失效标签，可以是模型类或字符串
+    """
+
+    _cached_tags.update(_normalize_tag(tag) for tag in tags)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            conf = settings.RESPONSE_CACHE
+            if not conf["ENABLED"]:
+                return func(self, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = build_cache_key(
+                request, key_prefix, vary_on_user, vary_on_headers, vary_on_params, tags
+            )
+            entry_key = ENTRY_KEY.format(key)
+            lock_key = LOCK_KEY.format(key)
+
+            entry = cache.get(entry_key)
+            now = time.time()
+            token = None
+            if entry is not None:
+                if entry["fresh_until"] > now:
+                    _count(key_prefix, "hits")
+                    return _cached(request, entry, "HIT")
+                # 已过期：抢到锁的请求重新计算，其余请求返回旧数据
+                token = _acquire(cache, lock_key, conf["LOCK_TIMEOUT"])
+                if token is None:
+                    _count(key_prefix, "stale_hits")
+                    return _cached(request, entry, "STALE")
+            else:
+                token = _acquire(cache, lock_key, conf["LOCK_TIMEOUT"])
+                if token is None:
+                    # 其他请求正在计算，等待其结果；超时或对方失败后自行计算（不持有锁）
+                    _count(key_prefix, "waits")
+                    deadline = now + conf["WAIT_TIMEOUT"]
+                    while time.time() < deadline:
+                        time.sleep(conf["POLL_INTERVAL"])
+                        entry = cache.get(entry_key)
+                        if entry is not None:
+                            _count(key_prefix, "hits")
+                            return _cached(request, entry, "HIT")
+                        if not cache.has_key(lock_key):
+                            break
+
+            try:
+                _count(key_prefix, "misses")
+                response = func(self, request, *args, **kwargs)
+                if response.status_code == 200 and not getattr(response, "streaming", False):
+                    cache.set(
+                        entry_key,
+                        {
+                            "data": response.data,
+                            "status": response.status_code,
+                            "headers": {name: response[name] for name in CACHED_HEADERS if name in response},
+                            "fresh_until": time.time() + timeout,
+                        },
+                        timeout + stale_ttl,
+                    )
+                    response["X-Cache"] = "MISS"
+                else:
+                    _count(key_prefix, "uncacheable")
+                return response
+            finally:
+                if token is not None:
+                    _release(cache, lock_key, token)
+
+        return wrapper
+
+    return decorator
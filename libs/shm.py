@@ -0,0 +1,156 @@
+"""
+基于 mmap 的跨进程共享内存表
+
+同一主机上的多个 gunicorn worker 通过同一个文件（默认位于 /dev/shm）共享数据。
+表按 16 个槽位分组，键经哈希后定位到分组，在组内线性探测；
+每次更新都在该分组的文件区间锁（fcntl）与进程内线程锁保护下完成，保证原子性。
+
+槽位结构：key（定长字节）+ 过期时间 + 若干 float64 数值
+
+实际文件名带有布局版本（格式版本、槽位数、数值个数、键长），配置变更后使用新文件，
+不会截断其他仍在运行的 worker 正在映射的旧文件（截断会使其访问映射时收到 SIGBUS）
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+DEFAULT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+GROUP_SIZE = 16
+THREAD_LOCKS = 64
+
+
+def default_path(name):
+    return os.path.join(DEFAULT_DIR, name)
+
+
+class SharedTable:
+    """定长槽位的共享内存哈希表"""
+
+    MAGIC = b"SHMTBL01"
+    HEADER = struct.Struct("8sIII")
+
+    def __init__(self, path, slots=65536, values=3, key_size=64):
+        self.groups = max(1, -(-slots // GROUP_SIZE))
+        self.slots = self.groups * GROUP_SIZE
+        self.values = values
+        self.key_size = key_size
+        layout = f"{self.MAGIC.decode().lower()}-{self.slots}x{values}x{key_size}"
+        self.path = f"{path}.{layout}"
+        self.slot_struct = struct.Struct(f"{key_size}sd{values}d")
+        self.group_bytes = self.slot_struct.size * GROUP_SIZE
+        self.size = self.HEADER.size + self.group_bytes * self.groups
+        self._thread_locks = [threading.Lock() for _ in range(THREAD_LOCKS)]
+        self._open_lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._mm = None
+
+    def _open(self):
+        # fork 之后每个进程需要重新打开映射
+        if self._pid == os.getpid():
+            return
+        with self._open_lock:
+            if self._pid == os.getpid():
+                return
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                header = self.HEADER.pack(self.MAGIC, self.slots, self.values, self.key_size)
+                size = os.fstat(fd).st_size
+                if size == 0:
+                    # 首次创建
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, header, 0)
+                    size = self.size
+                valid = size == self.size and os.pread(fd, self.HEADER.size, 0) == header
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            if not valid:
+                # 文件名已包含布局，不一致说明文件被其他程序写入；不截断，以免影响仍在映射它的进程
+                os.close(fd)
+                raise RuntimeError(f"共享内存文件 {self.path} 布局不符，请停止服务后删除该文件")
+            self._mm = mmap.mmap(fd, self.size)
+            self._fd = fd
+            self._pid = os.getpid()
+
+    def _encode_key(self, key):
+        data = key.encode("utf-8")
+        if len(data) > self.key_size:
+            data = hashlib.blake2b(data, digest_size=self.key_size // 2).hexdigest().encode()
+        return data
+
+    def _group(self, key_bytes):
+        digest = hashlib.blake2b(key_bytes, digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.groups
+
+    def update(self, key, func, now):
+        """
+        原子地读取并更新 key 对应的数值
+        :param func: func(values) -> (new_values, expires, result)，values 为 None 表示不存在
+        :return: func 返回的 result
+        """
+        self._open()
+        key_bytes = self._encode_key(key)
+        group = self._group(key_bytes)
+        offset = self.HEADER.size + group * self.group_bytes
+        slot_size = self.slot_struct.size
+        mm = self._mm
+
+        with self._thread_locks[group % THREAD_LOCKS]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.group_bytes, offset)
+            try:
+                target = None
+                free = None
+                victim = None
+                victim_expires = None
+                for i in range(GROUP_SIZE):
+                    position = offset + i * slot_size
+                    slot_key, expires, *values = self.slot_struct.unpack_from(mm, position)
+                    slot_key = slot_key.rstrip(b"\0")
+                    if not slot_key or expires <= now:
+                        if free is None:
+                            free = position
+                        continue
+                    if slot_key == key_bytes:
+                        target = (position, values)
+                        break
+                    if victim is None or expires < victim_expires:
+                        victim, victim_expires = position, expires
+
+                if target is not None:
+                    position, current = target
+                else:
+                    # 分组已满时淘汰最早过期的条目
+                    position = free if free is not None else victim
+                    current = None
+
+                new_values, expires, result = func(current)
+                self.slot_struct.pack_into(mm, position, key_bytes, expires, *new_values)
+                return result
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.group_bytes, offset)
+
+    def items(self, now):
+        """遍历所有未过期条目（无锁快照，用于导出统计）"""
+        self._open()
+        slot_size = self.slot_struct.size
+        for index in range(self.slots):
+            position = self.HEADER.size + index * slot_size
+            slot_key, expires, *values = self.slot_struct.unpack_from(self._mm, position)
+            slot_key = slot_key.rstrip(b"\0")
+            if slot_key and expires > now:
+                yield slot_key.decode("utf-8", "replace"), values
+
+    def clear(self):
+        self._open()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            self._mm[self.HEADER.size:] = bytes(self.size - self.HEADER.size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
@@ -0,0 +1,174 @@
+"""
+UserViewSet 热点接口（profile / login / refresh / logout）的异步实现
+
+ASGI 部署（config/asgi.py，settings.ASYNC_VIEWS）时由 users/urls.py 挂载在同名路由上，优先于视图集：
+- 认证使用 JWTAuthentication.authenticate_async，数据库访问使用 Django 异步 ORM
+- 登录的密码校验通过 hashing_executor.acheck_password 等待进程池结果，不占用线程
+- 刷新令牌的轮换需要事务与行锁，在线程中执行同步版本（sessions.rotate）
+- 限流（UserViewSet.throttle_classes）、请求体校验、响应格式与错误处理均与同步版本一致
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, HttpResponseNotModified
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, status
+
+from core import conditional, db_router
+from core.exceptions import BusinessException
+from libs import fastjson
+from libs.logging import logger
+from libs.metrics import timed
+from . import sessions
+from .authentication import JWTAuthentication
+from .hashing import hashing_executor
+from .models import User
+from .serializers import LoginSerializer, UserSerializer
+from .views import UserViewSet
+
+authenticator = JWTAuthentication()
+
+
+def api_response(data=None, message="success", status_code=status.HTTP_200_OK, success=True):
+    """与 BaseViewSet.get_success_response / get_error_response 经渲染器输出的内容一致"""
+    body = fastjson.dumps({
+        "status": "success" if success else "error",
+        "message": message,
+        "data": data if success else None,
+    })
+    with timed("render"):
+        return HttpResponse(body, status=status_code, content_type="application/json")
+
+
+def error_response(exc):
+    """与 BaseViewSet.handle_exception 一致"""
+    logger.error(f"Error in {UserViewSet.__name__}: {str(exc)}")
+    if isinstance(exc, BusinessException):
+        return api_response(message=exc.detail["message"], status_code=exc.status_code, success=False)
+    return api_response(message=str(exc), status_code=status.HTTP_400_BAD_REQUEST, success=False)
+
+
+def check_throttles(request):
+    """与 APIView.check_throttles 相同的逻辑，限流计数存放在缓存中"""
+    durations = []
+    for throttle in (throttle_class() for throttle_class in UserViewSet.throttle_classes):
+        if not throttle.allow_request(request, None):
+            durations.append(throttle.wait())
+    if durations:
+        durations = [duration for duration in durations if duration is not None]
+        raise exceptions.Throttled(max(durations, default=None))
+
+
+async def authenticate(request):
+    """认证并写入 request.user，未认证时抛出 NotAuthenticated"""
+    with timed("auth"):
+        result = await authenticator.authenticate_async(request)
+    if result is None:
+        raise exceptions.NotAuthenticated()
+    request.user, request.auth = result
+
+
+def api_view(action, authenticated=True):
+    """异步视图的公共流程：标注日志动作名、认证、限流与统一的异常处理，顺序与 APIView.initial 相同"""
+
+    def decorator(func):
+        async def view(request):
+            request.log_action = f"{UserViewSet.__name__}.{action}"
+            try:
+                if authenticated:
+                    await authenticate(request)
+                else:
+                    request.user, request.auth = AnonymousUser(), None
+                with timed("throttle"):
+                    await sync_to_async(check_throttles)(request)
+                return await func(request)
+            except Exception as exc:
+                return error_response(exc)
+
+        view.__name__ = func.__name__
+        view.__doc__ = func.__doc__
+        return csrf_exempt(view)
+
+    return decorator
+
+
+def parse_body(request):
+    """解析 JSON 或表单请求体"""
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+    return request.POST
+
+
+def missing_params(data, names):
+    """与 validate_body_params 一致，缺少参数时返回错误响应"""
+    missing = [name for name in names if name not in data]
+    if missing:
+        return api_response(
+            message=f"缺少必需参数: {', '.join(missing)}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            success=False,
+        )
+    return None
+
+
+@require_GET
+@api_view("profile")
+async def profile(request):
+    """获取个人信息，与 UserViewSet.profile 相同的条件请求处理"""
+    validators = conditional.for_object(request.user)
+    if conditional.is_not_modified(request, validators):
+        return conditional.set_headers(HttpResponseNotModified(), validators)
+    return conditional.set_headers(api_response(UserSerializer(request.user).data), validators)
+
+
+@require_POST
+@api_view("login", authenticated=False)
+async def login(request):
+    """登录"""
+    data = parse_body(request)
+    missing = missing_params(data, ("username", "password"))
+    if missing:
+        return missing
+    serializer = LoginSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+
+    user = await User.objects.filter(username=serializer.validated_data["username"]).afirst()
+    if not user or not await hashing_executor.acheck_password(
+        user, serializer.validated_data["password"]
+    ):
+        return api_response(
+            message="用户名或密码错误", status_code=status.HTTP_401_UNAUTHORIZED, success=False
+        )
+
+    db_router.set_request_user(user.id)
+    tokens = await sessions.astart(user)
+    user_data = UserSerializer(user).data
+    user_data.update(tokens.as_dict())
+    return api_response(user_data, "登录成功")
+
+
+@require_POST
+@api_view("refresh", authenticated=False)
+async def refresh(request):
+    """刷新令牌"""
+    data = parse_body(request)
+    missing = missing_params(data, ("refresh_token",))
+    if missing:
+        return missing
+    tokens = await sync_to_async(sessions.rotate)(data["refresh_token"])
+    return api_response(tokens.as_dict(), "刷新成功")
+
+
+@require_POST
+@api_view("logout")
+async def logout(request):
+    """登出：吊销当前会话的刷新令牌与访问令牌"""
+    await sessions.aend(request.auth)
+    return api_response(message="登出成功")
+
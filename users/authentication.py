@@ -1,79 +1,126 @@
-from datetime import datetime, timedelta
+from contextlib import contextmanager
 import jwt
-from django.conf import settings
 from rest_framework import authentication
 from rest_framework import exceptions
-from .models import User, UserToken
+from core import db_router
+from .keys import decode_token
+from .models import UserSession
+from .token_cache import token_cache, ACTIVE, REVOKED
+
+# 令牌类型（payload 中的 type），签发见 users/sessions.py
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+def decode(token, token_type):
+    """校验签名、有效期与令牌类型，失败时抛出 jwt.InvalidTokenError"""
+    payload = decode_token(token)
+    if payload.get("type") != token_type or not payload.get("user_id") or not payload.get("sid"):
+        raise jwt.InvalidTokenError("Invalid token type")
+    return payload
+
+
+@contextmanager
+def authentication_errors():
+    """将 token 校验过程中的异常统一转换为 AuthenticationFailed"""
+    try:
+        yield
+    except exceptions.AuthenticationFailed:
+        raise
+    except jwt.ExpiredSignatureError:
+        raise exceptions.AuthenticationFailed("Token has expired")
+    except jwt.InvalidTokenError:
+        raise exceptions.AuthenticationFailed("Invalid token")
+    except Exception as e:
+        raise exceptions.AuthenticationFailed(str(e))
 
 
 class JWTAuthentication(authentication.BaseAuthentication):
-    """JWT认证类"""
-
-    def authenticate(self, request):
-        # 获取token
+    """
+    JWT认证类：只接受访问令牌，校验签名与有效期，不查询 UserToken（见 users/sessions.py）
+    已校验的令牌缓存在进程内（L1），命中时不再检查会话状态；未命中时经共享缓存读取会话状态与用户，
+    仍未命中时一次查询同时读取会话与用户
+    authenticate_async 供 ASGI 下的异步视图使用
+    """
+
+    def parse_token(self, request):
+        """解析 Authorization 头，返回 (token, payload, user_id)，未携带时返回 None"""
         auth_header = request.headers.get("Authorization")
         if not auth_header:
             return None
 
-        try:
-            # 分离token，确保格式为 "Bearer <token>"
-            parts = auth_header.split()
-            if len(parts) != 2:
-                raise exceptions.AuthenticationFailed(
-                    'Invalid Authorization header. Expected "Bearer <token>"'
-                )
-
-            auth_type, token = parts
-            if auth_type.lower() != "bearer":
-                raise exceptions.AuthenticationFailed("Invalid token type")
-
-            # 验证token
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user_id = payload.get("user_id")
-            if not user_id:
-                raise exceptions.AuthenticationFailed("Invalid token")
-
-            # 获取用户
-            user = User.objects.filter(id=user_id, is_active=True).first()
-            if not user:
-                raise exceptions.AuthenticationFailed("User not found")
-
-            # 验证token是否在数据库中且有效
-            token_obj = UserToken.objects.filter(
-                user=user, token=token, is_active=True, expires__gt=datetime.now()
-            ).first()
-            if not token_obj:
-                raise exceptions.AuthenticationFailed("Token expired or invalid")
+        # 分离token，确保格式为 "Bearer <token>"
+        parts = auth_header.split()
+        if len(parts) != 2:
+            raise exceptions.AuthenticationFailed(
+                'Invalid Authorization header. Expected "Bearer <token>"'
+            )
 
-            return (user, token)
+        auth_type, token = parts
+        if auth_type.lower() != "bearer":
+            raise exceptions.AuthenticationFailed("Invalid token type")
 
-        except jwt.ExpiredSignatureError:
-            raise exceptions.AuthenticationFailed("Token has expired")
-        except jwt.InvalidTokenError:
-            raise exceptions.AuthenticationFailed("Invalid token")
-        except Exception as e:
-            raise exceptions.AuthenticationFailed(str(e))
+        # 验证token（刷新令牌不能用于认证）
+        payload = decode(token, ACCESS)
+        return token, payload, payload["user_id"]
 
-    def authenticate_header(self, request):
-        return "Bearer"
+    def session_queryset(self, payload):
+        """令牌所属的会话及其用户（用户已停用或删除时为空）"""
+        return UserSession.objects.select_related("user").filter(
+            sid=payload["sid"], user_id=payload["user_id"], user__is_active=True, user__is_deleted=False
+        )
 
+    def authenticate(self, request):
+        with authentication_errors():
+            parsed = self.parse_token(request)
+            if parsed is None:
+                return None
+            token, payload, user_id = parsed
+
+            state, user = token_cache.get(token, payload)
+            if state == REVOKED:
+                raise exceptions.AuthenticationFailed("Token expired or invalid")
+            if state == ACTIVE and user is not None:
+                db_router.set_request_user(user_id)
+                return (user, token)
+
+            # 缓存未命中：以数据库中的会话状态为准，用户查询走只读副本（配置时）
+            with db_router.auth_reads(user_id):
+                session = self.session_queryset(payload).first()
+            user = self.check_session(session, payload)
+            token_cache.set(token, payload, user)
+            return (user, token)
 
-def generate_token(user):
-    """生成JWT token"""
-    # Token过期时间设置为7天
-    expires = datetime.now() + timedelta(days=7)
+    async def authenticate_async(self, request):
+        """authenticate 的异步版本，使用异步 ORM 与 token 缓存"""
+        with authentication_errors():
+            parsed = self.parse_token(request)
+            if parsed is None:
+                return None
+            token, payload, user_id = parsed
 
-    # 创建JWT payload
-    payload = {
-        "user_id": user.id,
-        "username": user.username,
-        "exp": expires.timestamp(),
-    }
+            state, user = await token_cache.aget(token, payload)
+            if state == REVOKED:
+                raise exceptions.AuthenticationFailed("Token expired or invalid")
+            if state == ACTIVE and user is not None:
+                db_router.set_request_user(user_id)
+                return (user, token)
+
+            with db_router.auth_reads(user_id):
+                session = await self.session_queryset(payload).afirst()
+            user = self.check_session(session, payload)
+            await token_cache.aset(token, payload, user)
+            return (user, token)
 
-    # 生成token
-    token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+    def check_session(self, session, payload):
+        """会话不存在（已清理）或已吊销时认证失败，否则返回用户"""
+        if session is None:
+            raise exceptions.AuthenticationFailed("User not found or session expired")
+        if not session.is_active:
+            token_cache.remember_revoked(payload)
+            raise exceptions.AuthenticationFailed("Token expired or invalid")
+        return session.user
 
-    # 保存token到数据库
-    UserToken.objects.create(user=user, token=token, expires=expires, is_active=True)
+    def authenticate_header(self, request):
+        return "Bearer"
 
-    return token, expires
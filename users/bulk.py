@@ -0,0 +1,328 @@
+"""
+用户批量操作
+
+- 请求体为 JSON 数组或 NDJSON（每行一项），条数与字节数有上限（settings.BULK_USERS）
+- 按 CHUNK_SIZE 分块处理：逐项校验，唯一性按块每个字段一次查询，密码并行哈希，
+  每块在一个事务内 bulk_create / bulk_update
+- 每一项返回独立的结果，单项失败不影响其他项；某块写入冲突时该块逐项重试以定位失败项
+- bulk_create / bulk_update / update 不触发 post_save，事务提交后由 invalidate_users
+  清除被修改用户的缓存对象与响应缓存
+"""
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.exceptions import PayloadTooLargeError, ServiceUnavailableError, ValidationError
+from libs.response_cache import invalidate_model
+from . import sessions
+from .hashing import hashing_executor
+from .models import User
+from .serializers import BulkUserSerializer
+from .token_cache import token_cache
+
+CREATE_REQUIRED_FIELDS = ("username", "password", "email")
+
+
+def get_bulk_settings():
+    return settings.BULK_USERS
+
+
+def check_payload_size(request):
+    """在解析请求体之前按 Content-Length 检查大小"""
+    max_bytes = get_bulk_settings()["MAX_BYTES"]
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length > max_bytes:
+        raise PayloadTooLargeError(f"请求体超过 {max_bytes} 字节")
+
+
+def read_items(request):
+    """读取批量请求的数据项：JSON 数组、{"items": [...]} 或 NDJSON"""
+    check_payload_size(request)
+    data = request.data
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        data = data["items"]
+    if not isinstance(data, list):
+        raise ValidationError("请求体必须是数组或 NDJSON")
+    max_items = get_bulk_settings()["MAX_ITEMS"]
+    if len(data) > max_items:
+        raise PayloadTooLargeError(f"单次最多处理 {max_items} 项")
+    return data
+
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def chunked(items, size):
+    """[(起始下标, 块)]"""
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+class BulkReport:
+    """逐项结果"""
+
+    def __init__(self, total):
+        self.results = [None] * total
+        self.changed = False
+
+    def success(self, index, status, pk):
+        self.results[index] = {"index": index, "status": status, "id": pk}
+        if status != "unchanged":
+            self.changed = True
+
+    def fail(self, index, errors):
+        if isinstance(errors, str):
+            errors = {"non_field_errors": [errors]}
+        self.results[index] = {"index": index, "status": "error", "errors": errors}
+
+    def changed_ids(self):
+        """写入成功且有变化的主键"""
+        return [
+            result["id"] for result in self.results
+            if result["status"] not in ("error", "unchanged")
+        ]
+
+    def as_dict(self):
+        failed = sum(1 for result in self.results if result["status"] == "error")
+        return {
+            "total": len(self.results),
+            "succeeded": len(self.results) - failed,
+            "failed": failed,
+            "results": self.results,
+        }
+
+
+class UniqueChecker:
+    """
+    按块检查唯一字段：每个字段一次 IN 查询（包含已软删除的用户），
+    同时检查本次请求内的重复值
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.seen = {name: {} for name in messages}
+
+    def check(self, entries, report):
+        """entries 为 [(下标, 主键或 None, 数据)]，返回通过检查的项"""
+        owners = {}
+        for name in self.messages:
+            values = {data[name] for _, _, data in entries if data.get(name) is not None}
+            owners[name] = dict(
+                User.objects.all_with_deleted()
+                .filter(**{f"{name}__in": values})
+                .values_list(name, "pk")
+            ) if values else {}
+
+        passed = []
+        for index, pk, data in entries:
+            errors = {}
+            for name, message in self.messages.items():
+                value = data.get(name)
+                if value is None:
+                    continue
+                owner = owners[name].get(value, pk)
+                if owner != pk or self.seen[name].get(value, index) != index:
+                    errors[name] = [message]
+            if errors:
+                report.fail(index, errors)
+                continue
+            for name in self.messages:
+                if data.get(name) is not None:
+                    self.seen[name][data[name]] = index
+            passed.append((index, pk, data))
+        return passed
+
+
+def hash_passwords(entries, report):
+    """并行哈希 entries 中的密码，执行器繁忙时这些项记为失败并返回 None"""
+    raw = [data["password"] for _, _, data in entries if data.get("password")]
+    try:
+        hashes = iter(hashing_executor.make_passwords(raw))
+    except ServiceUnavailableError as exc:
+        for index, _, _ in entries:
+            report.fail(index, exc.detail["message"])
+        return None
+    return [next(hashes) if data.get("password") else None for _, _, data in entries]
+
+
+def save_chunk(write, users, indexes, report, status):
+    """整块写入；违反约束时逐项重试，定位失败的项"""
+    try:
+        with transaction.atomic():
+            write(users)
+    except IntegrityError:
+        for user, index in zip(users, indexes):
+            try:
+                with transaction.atomic():
+                    write([user])
+            except IntegrityError:
+                report.fail(index, "数据完整性错误")
+            else:
+                report.success(index, status, user.pk)
+        return
+    for user, index in zip(users, indexes):
+        report.success(index, status, user.pk)
+
+
+def bulk_create_users(items):
+    """批量注册用户"""
+    conf = get_bulk_settings()
+    report = BulkReport(len(items))
+    checker = UniqueChecker(BulkUserSerializer().unique_messages)
+
+    for start, chunk in chunked(items, conf["CHUNK_SIZE"]):
+        entries = []
+        for index, item in enumerate(chunk, start):
+            if not isinstance(item, dict):
+                report.fail(index, "每一项必须是对象")
+                continue
+            missing = [name for name in CREATE_REQUIRED_FIELDS if name not in item]
+            if missing:
+                report.fail(index, f"缺少必需参数: {', '.join(missing)}")
+                continue
+            serializer = BulkUserSerializer(data=item)
+            if not serializer.is_valid():
+                report.fail(index, serializer.errors)
+                continue
+            entries.append((index, None, serializer.validated_data))
+
+        entries = checker.check(entries, report)
+        hashes = hash_passwords(entries, report) if entries else None
+        if not hashes:
+            continue
+
+        users = []
+        for (_, _, data), encoded in zip(entries, hashes):
+            user = User(**{name: value for name, value in data.items() if name != "password"})
+            user.password = encoded
+            users.append(user)
+        save_chunk(
+            lambda objs: User.objects.bulk_create(objs, batch_size=conf["BATCH_SIZE"]),
+            users, [index for index, _, _ in entries], report, "created",
+        )
+
+    if report.changed:
+        invalidate_users(report.changed_ids())
+    return report
+
+
+def bulk_update_users(items):
+    """批量更新用户信息，每项需包含 id，其余字段与 PATCH 相同；修改密码的用户其 token 全部失效"""
+    conf = get_bulk_settings()
+    report = BulkReport(len(items))
+    checker = UniqueChecker(BulkUserSerializer().unique_messages)
+    seen_ids = set()
+    password_changed = []
+
+    for start, chunk in chunked(items, conf["CHUNK_SIZE"]):
+        ids = [item.get("id") for item in chunk if isinstance(item, dict)]
+        users = User.objects.in_bulk([pk for pk in ids if is_id(pk)])
+
+        entries = []
+        for index, item in enumerate(chunk, start):
+            if not isinstance(item, dict) or not is_id(item.get("id")):
+                report.fail(index, "每一项必须是包含 id 的对象")
+                continue
+            pk = item["id"]
+            if pk in seen_ids:
+                report.fail(index, "重复的 id")
+                continue
+            seen_ids.add(pk)
+            if pk not in users:
+                report.fail(index, "资源不存在")
+                continue
+            data = {name: value for name, value in item.items() if name != "id"}
+            serializer = BulkUserSerializer(users[pk], data=data, partial=True)
+            if not serializer.is_valid():
+                report.fail(index, serializer.errors)
+                continue
+            entries.append((index, pk, serializer.validated_data))
+
+        entries = checker.check(entries, report)
+        hashes = hash_passwords(entries, report) if entries else None
+        if not hashes:
+            continue
+
+        now = timezone.now()
+        fields = {"updated_at"}
+        changed = []
+        for (_, pk, data), encoded in zip(entries, hashes):
+            user = users[pk]
+            for name, value in data.items():
+                if name != "password":
+                    setattr(user, name, value)
+                    fields.add(name)
+            if encoded:
+                user.password = encoded
+                fields.add("password")
+                password_changed.append(pk)
+            user.updated_at = now
+            changed.append(user)
+        save_chunk(
+            lambda objs: User.objects.bulk_update(objs, sorted(fields), batch_size=conf["BATCH_SIZE"]),
+            changed, [index for index, _, _ in entries], report, "updated",
+        )
+
+    if password_changed:
+        revoke_tokens(password_changed)
+    if report.changed:
+        invalidate_users(report.changed_ids())
+    return report
+
+
+def bulk_deactivate_users(items, current_user=None):
+    """批量停用用户（每项为 id 或 {"id": ...}），被停用用户的 token 全部失效"""
+    conf = get_bulk_settings()
+    report = BulkReport(len(items))
+    seen_ids = set()
+
+    for start, chunk in chunked(items, conf["CHUNK_SIZE"]):
+        ids = {}
+        for index, item in enumerate(chunk, start):
+            pk = item.get("id") if isinstance(item, dict) else item
+            if not is_id(pk):
+                report.fail(index, "每一项必须是 id 或包含 id 的对象")
+            elif pk in seen_ids:
+                report.fail(index, "重复的 id")
+            elif current_user is not None and pk == current_user.pk:
+                report.fail(index, "不能停用当前用户")
+            else:
+                seen_ids.add(pk)
+                ids[pk] = index
+
+        states = dict(User.objects.filter(pk__in=ids).values_list("pk", "is_active"))
+        active = [pk for pk, is_active in states.items() if is_active]
+        if active:
+            with transaction.atomic():
+                User.objects.filter(pk__in=active).update(is_active=False, updated_at=timezone.now())
+                revoke_tokens(active)
+        for pk, index in ids.items():
+            if pk not in states:
+                report.fail(index, "资源不存在")
+            else:
+                report.success(index, "deactivated" if states[pk] else "unchanged", pk)
+
+    if report.changed:
+        invalidate_users(report.changed_ids())
+    return report
+
+
+def invalidate_users(user_ids):
+    """事务提交后清除这些用户的缓存对象，并使用户相关的响应缓存失效"""
+    user_ids = list(user_ids)
+
+    def invalidate():
+        token_cache.invalidate_users(user_ids)
+        invalidate_model(User)
+
+    transaction.on_commit(invalidate)
+
+
+def revoke_tokens(user_ids):
+    """使这些用户的会话全部失效，已签发的访问令牌同时失效"""
+    sessions.revoke_users(user_ids)
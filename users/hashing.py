@@ -0,0 +1,200 @@
+"""
+密码哈希执行器
+
+PBKDF2 等密码哈希在独立的进程池中执行，避免登录高峰占满 gunicorn 工作线程。
+同时在执行中与排队中的任务总数有上限：排队等待超过 QUEUE_TIMEOUT 时直接返回 503，
+单个任务超过 TIMEOUT 未完成同样返回 503。
+
+EXECUTOR 可选：
+- process：进程池（默认）
+- thread：线程池，仅限制并发
+- inline：在当前线程直接执行，不做限制
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.exceptions import ServiceUnavailableError
+from libs.logging import logger
+from . import hashing_tasks
+
+
+class HashingExecutor:
+    """有界的密码哈希执行器"""
+
+    def __init__(self, **overrides):
+        self.configure(**overrides)
+
+    def configure(self, **overrides):
+        """根据 settings.PASSWORD_HASHING 重新配置，可传入覆盖项"""
+        conf = {**settings.PASSWORD_HASHING, **overrides}
+        self.mode = conf["EXECUTOR"]
+        self.max_workers = conf["MAX_WORKERS"]
+        self.queue_size = conf["QUEUE_SIZE"]
+        self.queue_timeout = conf["QUEUE_TIMEOUT"]
+        self.timeout = conf["TIMEOUT"]
+        self.start_method = conf.get("START_METHOD", "forkserver")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _get_pool(self):
+        # gunicorn 预加载后 fork 出的 worker 需要各自创建进程池
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    if self.mode == "process":
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context(self.start_method),
+                            initializer=hashing_tasks.init_worker,
+                            initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"),),
+                        )
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="hashing"
+                        )
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def submit(self, func, *args):
+        """提交任务并等待结果，排队已满或超时抛出 ServiceUnavailableError"""
+        if self.mode == "inline":
+            return func(*args)
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            logger.warning("密码哈希队列已满，拒绝请求")
+            raise ServiceUnavailableError("服务繁忙，请稍后再试")
+        try:
+            future = self._get_pool().submit(func, *args)
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning("密码哈希超时")
+            raise ServiceUnavailableError("服务繁忙，请稍后再试")
+        except BrokenProcessPool:
+            logger.error("密码哈希进程池异常，已重建")
+            self._reset_pool()
+            raise ServiceUnavailableError("服务繁忙，请稍后再试")
+        finally:
+            self._slots.release()
+
+    async def asubmit(self, func, *args):
+        """submit 的异步版本：等待进程池结果时不占用事件循环与线程"""
+        if self.mode != "process":
+            return await sync_to_async(self.submit, thread_sensitive=False)(func, *args)
+
+        acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            acquired = await sync_to_async(self._slots.acquire, thread_sensitive=False)(
+                timeout=self.queue_timeout
+            )
+        if not acquired:
+            logger.warning("密码哈希队列已满，拒绝请求")
+            raise ServiceUnavailableError("服务繁忙，请稍后再试")
+        try:
+            future = self._get_pool().submit(func, *args)
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("密码哈希超时")
+            raise ServiceUnavailableError("服务繁忙，请稍后再试")
+        except BrokenProcessPool:
+            logger.error("密码哈希进程池异常，已重建")
+            self._reset_pool()
+            raise ServiceUnavailableError("服务繁忙，请稍后再试")
+        finally:
+            self._slots.release()
+
+    def map(self, func, items):
+        """
+        并行执行 func(item) 并按顺序返回结果（批量接口使用）
+        每轮最多占用 max_workers 个槽位，单次请求（如登录）仍可在轮次之间排队执行
+        """
+        items = list(items)
+        if self.mode == "inline":
+            return [func(item) for item in items]
+
+        results = []
+        for start in range(0, len(items), self.max_workers):
+            batch = items[start:start + self.max_workers]
+            acquired = 0
+            futures = []
+            try:
+                for _ in batch:
+                    if not self._slots.acquire(timeout=self.queue_timeout):
+                        logger.warning("密码哈希队列已满，拒绝批量任务")
+                        raise ServiceUnavailableError("服务繁忙，请稍后再试")
+                    acquired += 1
+                pool = self._get_pool()
+                futures = [pool.submit(func, item) for item in batch]
+                results.extend(future.result(timeout=self.timeout) for future in futures)
+            except FutureTimeoutError:
+                for future in futures:
+                    future.cancel()
+                logger.warning("密码哈希超时")
+                raise ServiceUnavailableError("服务繁忙，请稍后再试")
+            except BrokenProcessPool:
+                logger.error("密码哈希进程池异常，已重建")
+                self._reset_pool()
+                raise ServiceUnavailableError("服务繁忙，请稍后再试")
+            finally:
+                for _ in range(acquired):
+                    self._slots.release()
+        return results
+
+    def make_password(self, raw_password):
+        return self.submit(hashing_tasks.make_password, raw_password)
+
+    def make_passwords(self, raw_passwords):
+        """批量生成密码哈希，保持顺序"""
+        return self.map(hashing_tasks.make_password, raw_passwords)
+
+    def check_password(self, user, raw_password):
+        """校验用户密码，必要时升级哈希算法"""
+        if not user.has_usable_password():
+            return False
+        is_correct, new_encoded = self.submit(
+            hashing_tasks.verify_password, raw_password, user.password
+        )
+        if new_encoded:
+            user.password = new_encoded
+            user.save(update_fields=["password"])
+        return is_correct
+
+    async def acheck_password(self, user, raw_password):
+        """check_password 的异步版本"""
+        if not user.has_usable_password():
+            return False
+        is_correct, new_encoded = await self.asubmit(
+            hashing_tasks.verify_password, raw_password, user.password
+        )
+        if new_encoded:
+            user.password = new_encoded
+            await user.asave(update_fields=["password"])
+        return is_correct
+
+    def set_password(self, user, raw_password):
+        """设置用户密码（不保存）"""
+        user.password = self.make_password(raw_password)
+        user._password = raw_password
+
+    def shutdown(self):
+        self._reset_pool()
+
+
+hashing_executor = HashingExecutor()
@@ -0,0 +1,27 @@
+"""
+在哈希进程池子进程中执行的任务
+子进程通过导入本模块获取任务函数，因此这里只依赖 django.contrib.auth.hashers
+"""
+
+import os
+
+from django.contrib.auth import hashers
+
+
+def init_worker(settings_module):
+    """子进程初始化：加载 Django 配置"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+
+def make_password(raw_password):
+    return hashers.make_password(raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """返回 (是否正确, 需要升级时的新哈希)"""
+    is_correct, must_update = hashers.verify_password(raw_password, encoded)
+    new_encoded = hashers.make_password(raw_password) if is_correct and must_update else None
+    return is_correct, new_encoded
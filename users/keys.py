@@ -0,0 +1,259 @@
+"""
+JWT 签名密钥管理
+
+- HS256：沿用 settings.SECRET_KEY，不发布公钥
+- RS256 / EdDSA：密钥在本地生成，私钥以 PEM 文件存放在 JWT_KEYS_DIR，
+  元数据记录在 keys.json 中；公钥通过 /.well-known/jwks.json 发布，
+  其他服务可据此在本地校验 token
+
+轮换策略：新密钥在启用前 JWT_KEY_PUBLISH_AHEAD 即写入 JWKS，
+旧密钥在被取代后继续保留一个 token 最长有效期用于校验，之后被清理。
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+from core import warmup
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "EdDSA")
+
+META_FILE = "keys.json"
+LOCK_FILE = "keys.lock"
+
+
+class SigningKey:
+    """签名密钥"""
+
+    def __init__(self, kid, alg, private_key, activates_at, retires_at=None):
+        self.kid = kid
+        self.alg = alg
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self.activates_at = activates_at
+        self.retires_at = retires_at
+
+    def to_jwk(self):
+        algorithm = RSAAlgorithm if self.alg == "RS256" else OKPAlgorithm
+        jwk = algorithm.to_jwk(self.public_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.alg, "use": "sig"})
+        return jwk
+
+
+def _generate_private_key(alg):
+    if alg == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if alg == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unsupported JWT algorithm: {alg}")
+
+
+def _now():
+    return datetime.now(timezone.utc).timestamp()
+
+
+class KeyStore:
+    """本地文件密钥库"""
+
+    # keys.json 变更检查间隔（秒）
+    RELOAD_INTERVAL = 5
+
+    def __init__(self):
+        conf = settings.JWT_AUTH
+        self.algorithm = conf.get("JWT_ALGORITHM", "HS256")
+        self.directory = str(conf.get("JWT_KEYS_DIR", settings.BASE_DIR / "keys"))
+        self.rotation_interval = conf["JWT_KEY_ROTATION_INTERVAL"].total_seconds()
+        self.publish_ahead = conf["JWT_KEY_PUBLISH_AHEAD"].total_seconds()
+        self.auto_rotate = conf.get("JWT_KEY_AUTO_ROTATE", False)
+        # 被取代的密钥需要保留到其签发的 token 全部过期
+        self.verify_grace = max(
+            conf["JWT_EXPIRATION_DELTA"], conf["JWT_REFRESH_EXPIRATION_DELTA"]
+        ).total_seconds()
+        self._keys = {}
+        self._mtime = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def is_asymmetric(self):
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._path(META_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write_meta(self, records):
+        tmp_path = self._path(META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+        os.replace(tmp_path, self._path(META_FILE))
+
+    def _load(self):
+        """keys.json 变更时重新加载密钥"""
+        now = time.monotonic()
+        if self._keys and now - self._checked_at < self.RELOAD_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self._path(META_FILE)).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime == self._mtime and self._keys:
+                return
+            keys = {}
+            for record in self._read_meta():
+                with open(self._path(f"{record['kid']}.pem"), "rb") as f:
+                    private_key = serialization.load_pem_private_key(f.read(), password=None)
+                keys[record["kid"]] = SigningKey(
+                    record["kid"],
+                    record["alg"],
+                    private_key,
+                    record["activates_at"],
+                    record.get("retires_at"),
+                )
+            self._keys = keys
+            self._mtime = mtime
+
+    def rotate(self, force=False, algorithm=None):
+        """
+        按计划轮换密钥
+        :param force: 无论是否到期都生成新密钥
+        :return: 新生成的密钥 kid，未轮换时返回 None
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        with open(self._path(LOCK_FILE), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            records = self._read_meta()
+            now = _now()
+
+            # 清理已超过保留期的密钥
+            kept = []
+            for record in records:
+                if record.get("retires_at") and record["retires_at"] + self.verify_grace < now:
+                    try:
+                        os.remove(self._path(f"{record['kid']}.pem"))
+                    except FileNotFoundError:
+                        pass
+                else:
+                    kept.append(record)
+            records = kept
+
+            latest = max(records, key=lambda r: r["activates_at"], default=None)
+            due = latest is None or (
+                latest["activates_at"] + self.rotation_interval - self.publish_ahead <= now
+            )
+            kid = None
+            if force or due:
+                alg = algorithm or self.algorithm
+                private_key = _generate_private_key(alg)
+                kid = uuid.uuid4().hex
+                pem_path = self._path(f"{kid}.pem")
+                fd = os.open(pem_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(
+                        private_key.private_bytes(
+                            serialization.Encoding.PEM,
+                            serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption(),
+                        )
+                    )
+                # 首个密钥立即启用，后续密钥先发布再启用
+                activates_at = now if latest is None or force else now + self.publish_ahead
+                if latest is not None:
+                    latest["retires_at"] = activates_at
+                records.append(
+                    {"kid": kid, "alg": alg, "activates_at": activates_at, "retires_at": None}
+                )
+
+            self._write_meta(records)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self._checked_at = 0
+        return kid
+
+    def signing_key(self):
+        """当前用于签名的密钥"""
+        self._load()
+        if not self._keys or (self.auto_rotate and self._rotation_due(_now())):
+            self.rotate()
+            self._load()
+        now = _now()
+        active = [key for key in self._keys.values() if key.activates_at <= now]
+        return max(active, key=lambda key: key.activates_at)
+
+    def _rotation_due(self, now):
+        latest = max(self._keys.values(), key=lambda key: key.activates_at)
+        return latest.activates_at + self.rotation_interval - self.publish_ahead <= now
+
+    def verification_key(self, kid):
+        """根据 kid 获取校验密钥"""
+        self._load()
+        key = self._keys.get(kid)
+        if key is None:
+            # 可能是其他进程刚刚轮换，强制重新加载一次
+            self._checked_at = 0
+            self._load()
+            key = self._keys.get(kid)
+        if key is None:
+            return None
+        if key.retires_at and key.retires_at + self.verify_grace < _now():
+            return None
+        return key
+
+    def jwks(self):
+        """JWKS 格式的公钥集合"""
+        if not self.is_asymmetric:
+            return {"keys": []}
+        self._load()
+        if not self._keys:
+            self.rotate()
+            self._load()
+        now = _now()
+        return {
+            "keys": [
+                key.to_jwk()
+                for key in sorted(self._keys.values(), key=lambda k: k.activates_at)
+                if not (key.retires_at and key.retires_at + self.verify_grace < now)
+            ]
+        }
+
+
+key_store = KeyStore()
+# 启动预热时加载密钥（非对称算法且密钥缺失时生成）
+warmup.register(key_store.jwks)
+
+
+def encode_token(payload):
+    """签发 JWT"""
+    if not key_store.is_asymmetric:
+        return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+    key = key_store.signing_key()
+    return jwt.encode(payload, key.private_key, algorithm=key.alg, headers={"kid": key.kid})
+
+
+def decode_token(token):
+    """校验并解析 JWT，失败时抛出 jwt.InvalidTokenError"""
+    if not key_store.is_asymmetric:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = key_store.verification_key(kid) if kid else None
+    if key is None:
+        raise jwt.InvalidTokenError("Unknown signing key")
+    return jwt.decode(token, key.public_key, algorithms=[key.alg])
@@ -0,0 +1,311 @@
+"""
+UserToken 生命周期管理
+
+- 分批清理过期 / 已失效的 token 记录，以及过期 / 已吊销的会话（UserSession）。
+  会话记录清理后，其令牌与未清理前的吊销状态一样被拒绝
+- 可选：PostgreSQL 按 expires 月份声明式分区，过期分区整体删除
+- 记录每次清理的行数与耗时，累计值经 /metrics 导出（token_purge_*）
+"""
+
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from libs.logging import logger
+from libs.metrics import register_collector
+from .models import UserSession, UserToken
+
+STATS_CACHE_KEY = "token_lifecycle:last_run"
+TOTAL_KEY = "token_lifecycle:total:{}"
+# 累计值（耗时以毫秒计，便于原子自增）
+TOTAL_FIELDS = ("runs", "rows_purged", "partitions_dropped", "partition_rows_dropped", "duration_ms")
+
+TABLE = UserToken._meta.db_table
+LEGACY_TABLE = f"{TABLE}_legacy"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+@dataclass
+class PurgeStats:
+    """单次清理的统计信息"""
+
+    rows_purged: int = 0
+    batches: int = 0
+    partitions_dropped: int = 0
+    partition_rows_dropped: int = 0
+    duration: float = 0.0
+    finished_at: str = ""
+
+
+def get_lifecycle_settings():
+    return settings.TOKEN_LIFECYCLE
+
+
+def purgeable_q(now=None, grace=None):
+    """可清理记录：过期超过宽限期，或失效超过宽限期"""
+    now = now or timezone.now()
+    if grace is None:
+        grace = timedelta(days=get_lifecycle_settings()["PURGE_GRACE_DAYS"])
+    cutoff = now - grace
+    return Q(expires__lt=cutoff) | Q(is_active=False, updated_at__lt=cutoff)
+
+
+def purge_rows(stats, batch_size, max_batches=None, now=None, grace=None, model=UserToken):
+    """按主键分批删除可清理记录，每批单独提交"""
+    queryset = model._base_manager.filter(purgeable_q(now, grace))
+    while max_batches is None or stats.batches < max_batches:
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        with transaction.atomic():
+            deleted, _ = model._base_manager.filter(pk__in=pks).delete()
+        stats.rows_purged += deleted
+        stats.batches += 1
+
+
+def purge_tokens(batch_size=None, max_batches=None, partitions=False, now=None, grace=None):
+    """
+    清理 token 表
+    :param partitions: 同时维护分区（创建未来分区、删除过期分区）
+    :return: PurgeStats
+    """
+    conf = get_lifecycle_settings()
+    batch_size = batch_size or conf["BATCH_SIZE"]
+    stats = PurgeStats()
+    start = time.perf_counter()
+
+    if partitions:
+        partitioner = TokenPartitioner()
+        if partitioner.is_partitioned():
+            partitioner.ensure_partitions(conf["PARTITION_MONTHS_AHEAD"])
+            partitioner.drop_expired_partitions(stats, now=now, grace=grace)
+
+    for model in (UserToken, UserSession):
+        purge_rows(stats, batch_size, max_batches, now=now, grace=grace, model=model)
+
+    stats.duration = round(time.perf_counter() - start, 3)
+    stats.finished_at = timezone.now().isoformat()
+    record_stats(stats)
+    return stats
+
+
+def record_stats(stats):
+    """记录清理指标"""
+    logger.info(
+        f"Token清理完成 - 删除行数: {stats.rows_purged}, 批次: {stats.batches}, "
+        f"删除分区: {stats.partitions_dropped}（{stats.partition_rows_dropped} 行）, "
+        f"耗时: {stats.duration:.3f}s"
+    )
+    cache = get_stats_cache()
+    cache.set(STATS_CACHE_KEY, asdict(stats), None)
+    increments = {
+        "runs": 1,
+        "rows_purged": stats.rows_purged,
+        "partitions_dropped": stats.partitions_dropped,
+        "partition_rows_dropped": stats.partition_rows_dropped,
+        "duration_ms": round(stats.duration * 1000),
+    }
+    for field, value in increments.items():
+        key = TOTAL_KEY.format(field)
+        cache.add(key, 0, None)
+        if value:
+            cache.incr(key, value)
+
+
+def get_stats_cache():
+    """清理命令与 web worker 通常不在同一进程，统计写入共享缓存（不经过进程内 L1）"""
+    return caches["shared"]
+
+
+def get_last_stats():
+    """最近一次清理的统计信息"""
+    return get_stats_cache().get(STATS_CACHE_KEY)
+
+
+def get_totals():
+    """历次清理的累计值"""
+    values = get_stats_cache().get_many([TOTAL_KEY.format(field) for field in TOTAL_FIELDS])
+    return {field: values.get(TOTAL_KEY.format(field), 0) for field in TOTAL_FIELDS}
+
+
+@register_collector
+def collect():
+    """token 清理统计的 Prometheus 文本行，尚未运行过清理时为空"""
+    last = get_last_stats()
+    if last is None:
+        return []
+    totals = get_totals()
+    finished_at = datetime.fromisoformat(last["finished_at"]).timestamp()
+    return [
+        "# HELP token_purge_runs_total Completed purge_tokens runs",
+        "# TYPE token_purge_runs_total counter",
+        f"token_purge_runs_total {totals['runs']}",
+        "# HELP token_purge_rows_total Token and session rows purged, by batched delete or dropped partitions",
+        "# TYPE token_purge_rows_total counter",
+        f'token_purge_rows_total{{method="batch"}} {totals["rows_purged"]}',
+        f'token_purge_rows_total{{method="partition"}} {totals["partition_rows_dropped"]}',
+        "# HELP token_purge_partitions_dropped_total Expired token partitions dropped",
+        "# TYPE token_purge_partitions_dropped_total counter",
+        f"token_purge_partitions_dropped_total {totals['partitions_dropped']}",
+        "# HELP token_purge_duration_seconds_total Time spent in purge_tokens runs",
+        "# TYPE token_purge_duration_seconds_total counter",
+        f"token_purge_duration_seconds_total {totals['duration_ms'] / 1000:.3f}",
+        "# HELP token_purge_last_duration_seconds Duration of the last purge_tokens run",
+        "# TYPE token_purge_last_duration_seconds gauge",
+        f"token_purge_last_duration_seconds {last['duration']:.3f}",
+        "# HELP token_purge_last_run_timestamp_seconds Finish time of the last purge_tokens run",
+        "# TYPE token_purge_last_run_timestamp_seconds gauge",
+        f"token_purge_last_run_timestamp_seconds {finished_at:.0f}",
+    ]
+
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class TokenPartitioner:
+    """UserToken 表按 expires 月份分区（仅 PostgreSQL）"""
+
+    def __init__(self):
+        self.supported = connection.vendor == "postgresql"
+
+    def is_partitioned(self):
+        if not self.supported:
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def partition_name(month):
+        return f"{TABLE}_p{month:%Y%m}"
+
+    def create_partition(self, cursor, month):
+        upper = _next_month(month)
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{self.partition_name(month)}" '
+            f'PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+            [month, upper],
+        )
+
+    def ensure_partitions(self, months_ahead):
+        """创建当前月及未来若干个月的分区"""
+        month = _month_start(timezone.now())
+        with connection.cursor() as cursor:
+            for _ in range(months_ahead + 1):
+                self.create_partition(cursor, month)
+                month = _next_month(month)
+
+    def list_partitions(self):
+        """返回 [(分区名, 月份起始时间)]，不含默认分区"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = %s",
+                [TABLE],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        prefix = f"{TABLE}_p"
+        partitions = []
+        for name in names:
+            if not name.startswith(prefix):
+                continue
+            month = datetime.strptime(name[len(prefix):], "%Y%m")
+            partitions.append((name, month.replace(tzinfo=dt_timezone.utc)))
+        return sorted(partitions, key=lambda item: item[1])
+
+    def drop_expired_partitions(self, stats, now=None, grace=None):
+        """整月都已过期（含宽限期）的分区直接删除"""
+        now = now or timezone.now()
+        if grace is None:
+            grace = timedelta(days=get_lifecycle_settings()["PURGE_GRACE_DAYS"])
+        cutoff = now - grace
+        for name, month in self.list_partitions():
+            if _next_month(month) > cutoff:
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM "{name}"')
+                rows = cursor.fetchone()[0]
+                cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+                cursor.execute(f'DROP TABLE "{name}"')
+            stats.partitions_dropped += 1
+            stats.partition_rows_dropped += rows
+
+    def convert(self, months_ahead=None, keep_legacy=False):
+        """
+        一次性将现有表转换为分区表
+        仅复制未过期（含宽限期）的记录，建议在维护窗口执行
+        """
+        if not self.supported:
+            raise RuntimeError("分区仅支持 PostgreSQL")
+        if self.is_partitioned():
+            return 0
+        conf = get_lifecycle_settings()
+        if months_ahead is None:
+            months_ahead = conf["PARTITION_MONTHS_AHEAD"]
+        cutoff = timezone.now() - timedelta(days=conf["PURGE_GRACE_DAYS"])
+        user_table = UserToken._meta.get_field("user").related_model._meta.db_table
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"')
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY_TABLE}" '
+                f"INCLUDING DEFAULTS INCLUDING IDENTITY) PARTITION BY RANGE (expires)"
+            )
+            # 分区表的主键必须包含分区键
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, expires)')
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_user_id_fk" '
+                f'FOREIGN KEY (user_id) REFERENCES "{user_table}" (id) '
+                f"DEFERRABLE INITIALLY DEFERRED"
+            )
+            cursor.execute(f'CREATE INDEX "{TABLE}_p_user_id" ON "{TABLE}" (user_id)')
+            for index in UserToken._meta.indexes:
+                cursor.execute(
+                    f'ALTER INDEX IF EXISTS "{index.name}" RENAME TO "{index.name}_legacy"'
+                )
+                with connection.schema_editor(atomic=False) as editor:
+                    cursor.execute(str(index.create_sql(UserToken, editor)))
+            cursor.execute(
+                f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT'
+            )
+
+            month = _month_start(cutoff)
+            last = _next_month(_month_start(timezone.now()))
+            for _ in range(months_ahead):
+                last = _next_month(last)
+            while month < last:
+                self.create_partition(cursor, month)
+                month = _next_month(month)
+
+            cursor.execute(
+                f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY_TABLE}" WHERE expires >= %s',
+                [cutoff],
+            )
+            copied = cursor.rowcount
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                f'(SELECT COALESCE(MAX(id), 0) + 1 FROM "{LEGACY_TABLE}"), false)',
+                [TABLE],
+            )
+            if not keep_legacy:
+                cursor.execute(f'DROP TABLE "{LEGACY_TABLE}"')
+        return copied
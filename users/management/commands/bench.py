@@ -0,0 +1,222 @@
+import json
+import logging
+import platform
+import random
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+
+from libs.benchmark import compare, summarize
+from libs.query_budget import track_queries
+from users.models import User
+from users.views import UserViewSet
+
+USER_PREFIX = "bench_user_"
+PASSWORD = "bench-Password-123"
+SCENARIOS = ("login", "profile", "list", "retrieve")
+
+
+class Command(BaseCommand):
+    help = "UserViewSet 基准测试：并发客户端驱动 login / profile / list / retrieve，输出吞吐量、延迟分位数与查询数"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenarios", default=",".join(SCENARIOS), help=f"逗号分隔，可选 {', '.join(SCENARIOS)}"
+        )
+        parser.add_argument("--concurrency", type=int, default=4, help="并发客户端数")
+        parser.add_argument("--duration", type=float, default=5, help="每个场景的测试时长（秒）")
+        parser.add_argument("--warmup", type=int, default=10, help="每个客户端的预热请求数")
+        parser.add_argument("--users", type=int, default=1000, help="预置的用户数")
+        parser.add_argument("--page-size", type=int, default=20, help="list 场景的分页大小")
+        parser.add_argument("--seed", type=int, default=42, help="随机数种子")
+        parser.add_argument("--output", default="benchmarks/latest.json", help="结果文件")
+        parser.add_argument("--baseline", default="benchmarks/baseline.json", help="基线文件")
+        parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+        parser.add_argument(
+            "--latency-threshold", type=float, default=20.0, help="p95 延迟允许增长的百分比"
+        )
+        parser.add_argument(
+            "--throughput-threshold", type=float, default=15.0, help="吞吐量允许下降的百分比"
+        )
+        parser.add_argument(
+            "--queries-threshold", type=float, default=0.0, help="每请求查询数允许增加的数量"
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"未知场景: {', '.join(sorted(unknown))}")
+
+        random.seed(options["seed"])
+        self.user_ids = self.seed_users(max(options["users"], options["concurrency"]))
+        self.page_size = options["page_size"]
+        self.pages = max(1, min(len(self.user_ids) // self.page_size, 50))
+
+        # 基准测试期间关闭 DRF 限流与查询预算检查，请求日志只保留警告
+        throttle_classes = UserViewSet.throttle_classes
+        UserViewSet.throttle_classes = []
+        query_budget_mode = settings.QUERY_BUDGET["MODE"]
+        settings.QUERY_BUDGET["MODE"] = "off"
+        request_logger = logging.getLogger("request")
+        log_level = request_logger.level
+        request_logger.setLevel(logging.WARNING)
+        try:
+            results = {}
+            for name in scenarios:
+                results[name] = self.run_scenario(name, options)
+                self.print_result(name, results[name])
+        finally:
+            UserViewSet.throttle_classes = throttle_classes
+            settings.QUERY_BUDGET["MODE"] = query_budget_mode
+            request_logger.setLevel(log_level)
+
+        report = {"meta": self.meta(options), "results": results}
+        self.write_json(options["output"], report)
+        self.stdout.write(f"结果已保存到 {options['output']}")
+
+        baseline_path = Path(options["baseline"])
+        if options["save_baseline"]:
+            self.write_json(baseline_path, report)
+            self.stdout.write(f"基线已保存到 {baseline_path}")
+        elif baseline_path.exists():
+            self.compare_baseline(results, baseline_path, options)
+
+    def seed_users(self, count):
+        """预置基准测试用户，所有用户共用同一个密码哈希"""
+        existing = set(
+            User.objects.filter(username__startswith=USER_PREFIX).values_list("username", flat=True)
+        )
+        missing = [f"{USER_PREFIX}{i}" for i in range(count) if f"{USER_PREFIX}{i}" not in existing]
+        if missing:
+            password = make_password(PASSWORD)
+            User.objects.bulk_create(
+                [User(username=name, email=f"{name}@example.com", password=password) for name in missing],
+                batch_size=1000,
+            )
+            self.stdout.write(f"已创建 {len(missing)} 个基准测试用户")
+        return list(
+            User.objects.filter(username__startswith=USER_PREFIX)
+            .order_by("id")
+            .values_list("id", flat=True)[:count]
+        )
+
+    def login(self, client, index):
+        return client.post(
+            "/api/users/login/",
+            {"username": f"{USER_PREFIX}{index}", "password": PASSWORD},
+            content_type="application/json",
+        )
+
+    def request(self, name, client, index, token):
+        if name == "login":
+            return self.login(client, index)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        if name == "profile":
+            return client.get("/api/users/profile/", **headers)
+        if name == "list":
+            page = random.randint(1, self.pages)
+            return client.get(f"/api/users/?page={page}&page_size={self.page_size}", **headers)
+        return client.get(f"/api/users/{random.choice(self.user_ids)}/", **headers)
+
+    def run_scenario(self, name, options):
+        concurrency = options["concurrency"]
+        ready = threading.Barrier(concurrency + 1)
+        start = threading.Event()
+        deadline = [0.0]
+        outcomes = [None] * concurrency
+
+        def worker(index):
+            client = Client()
+            latencies = []
+            errors = queries = 0
+            try:
+                token = None
+                if name != "login":
+                    token = self.login(client, index).json()["data"]["token"]
+                for _ in range(options["warmup"]):
+                    self.request(name, client, index, token)
+                ready.wait()
+                start.wait()
+                while time.perf_counter() < deadline[0]:
+                    began = time.perf_counter()
+                    with track_queries() as tracker:
+                        response = self.request(name, client, index, token)
+                    latencies.append(time.perf_counter() - began)
+                    queries += tracker.count
+                    if response.status_code >= 400:
+                        errors += 1
+            finally:
+                connections.close_all()
+            outcomes[index] = (latencies, errors, queries)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        began = time.perf_counter()
+        deadline[0] = began + options["duration"]
+        start.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        latencies = [value for outcome in outcomes for value in outcome[0]]
+        errors = sum(outcome[1] for outcome in outcomes)
+        queries = sum(outcome[2] for outcome in outcomes)
+        return summarize(latencies, elapsed, errors, queries)
+
+    def print_result(self, name, result):
+        self.stdout.write(
+            f"{name:<10} {result['throughput']:>9.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+            f"p99 {result['p99_ms']:>8.2f}ms  queries {result['queries_per_request']:>5.2f}  "
+            f"errors {result['errors']}/{result['requests']}"
+        )
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=5,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            commit = ""
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "concurrency": options["concurrency"],
+            "duration": options["duration"],
+            "users": len(self.user_ids),
+            "page_size": self.page_size,
+        }
+
+    def write_json(self, path, data):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def compare_baseline(self, results, path, options):
+        baseline = json.loads(path.read_text(encoding="utf-8"))
+        rows, regressions = compare(
+            results,
+            baseline["results"],
+            latency_pct=options["latency_threshold"],
+            throughput_pct=options["throughput_threshold"],
+            queries_delta=options["queries_threshold"],
+        )
+        self.stdout.write(f"与基线对比（{baseline['meta'].get('commit') or path}）:")
+        for name, metric, before, after, change, regressed in rows:
+            flag = "  退化" if regressed else ""
+            self.stdout.write(f"  {name:<10} {metric:<20} {before:>10} -> {after:<10} {change:+6.1f}%{flag}")
+        if regressions:
+            raise CommandError("性能退化:\n" + "\n".join(regressions))
@@ -0,0 +1,137 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+
+from libs.benchmark import percentile
+from users.hashing import hashing_executor
+from users.models import User
+from users.views import UserViewSet
+
+BENCH_USERNAME = "bench_login_user"
+BENCH_PASSWORD = "bench-Password-123"
+
+
+class Command(BaseCommand):
+    help = "登录风暴基准测试：测量登录吞吐量以及同时进行的 profile 请求延迟"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration", type=float, default=10, help="测试时长（秒）")
+        parser.add_argument(
+            "--threads", type=int, default=16, help="模拟的服务端线程数（workers x threads）"
+        )
+        parser.add_argument("--storm", type=int, default=64, help="并发登录客户端数")
+        parser.add_argument(
+            "--profile-interval", type=float, default=0.05, help="profile 探测请求间隔（秒）"
+        )
+        parser.add_argument(
+            "--executor",
+            choices=["process", "thread", "inline"],
+            help="覆盖 PASSWORD_HASHING.EXECUTOR",
+        )
+        parser.add_argument("--max-workers", type=int, help="覆盖 PASSWORD_HASHING.MAX_WORKERS")
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options["executor"]:
+            overrides["EXECUTOR"] = options["executor"]
+        if options["max_workers"]:
+            overrides["MAX_WORKERS"] = options["max_workers"]
+        if overrides:
+            hashing_executor.configure(**overrides)
+
+        # 登录会使同一用户的旧 token 失效，profile 探测使用单独的用户
+        probe_username = f"{BENCH_USERNAME}_probe"
+        for username in (BENCH_USERNAME, probe_username):
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                user = User(username=username, email=f"{username}@example.com")
+            user.set_password(BENCH_PASSWORD)
+            user.save()
+
+        token = Client().post(
+            "/api/users/login/",
+            {"username": probe_username, "password": BENCH_PASSWORD},
+            content_type="application/json",
+        ).json()["data"]["token"]
+
+        # 用线程池模拟 gunicorn 的工作线程，请求在池中排队
+        server = ThreadPoolExecutor(max_workers=options["threads"])
+        local = threading.local()
+        stop = threading.Event()
+        results = {}
+        profile_latencies = []
+        lock = threading.Lock()
+
+        def client():
+            if not hasattr(local, "client"):
+                local.client = Client()
+            return local.client
+
+        def do_login():
+            try:
+                response = client().post(
+                    "/api/users/login/",
+                    {"username": BENCH_USERNAME, "password": BENCH_PASSWORD},
+                    content_type="application/json",
+                )
+            finally:
+                connections.close_all()
+            with lock:
+                results[response.status_code] = results.get(response.status_code, 0) + 1
+
+        def do_profile():
+            try:
+                return client().get(
+                    "/api/users/profile/", HTTP_AUTHORIZATION=f"Bearer {token}"
+                ).status_code
+            finally:
+                connections.close_all()
+
+        def storm_client():
+            while not stop.is_set():
+                server.submit(do_login).result()
+
+        def prober():
+            while not stop.is_set():
+                start = time.perf_counter()
+                server.submit(do_profile).result()
+                profile_latencies.append(time.perf_counter() - start)
+                time.sleep(options["profile_interval"])
+
+        # 基准测试期间关闭 DRF 限流，避免 429 干扰吞吐量统计
+        throttle_classes = UserViewSet.throttle_classes
+        UserViewSet.throttle_classes = []
+
+        clients = [threading.Thread(target=storm_client) for _ in range(options["storm"])]
+        probe = threading.Thread(target=prober)
+        started = time.perf_counter()
+        for thread in clients + [probe]:
+            thread.start()
+        time.sleep(options["duration"])
+        stop.set()
+        for thread in clients + [probe]:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        hashing_executor.shutdown()
+        UserViewSet.throttle_classes = throttle_classes
+
+        self.stdout.write(
+            f"executor: {hashing_executor.mode}, max_workers: {hashing_executor.max_workers}"
+        )
+        self.stdout.write(
+            f"login: {results.get(200, 0) / elapsed:.1f} req/s 成功, "
+            f"{results.get(503, 0)} 次拒绝(503), 状态码分布 {results}"
+        )
+        ms = [value * 1000 for value in profile_latencies]
+        self.stdout.write(
+            f"profile: {len(ms)} 次, p50 {percentile(ms, 50):.1f}ms, "
+            f"p99 {percentile(ms, 99):.1f}ms, max {max(ms, default=0):.1f}ms"
+        )
+        if ms:
+            self.stdout.write(f"profile mean: {statistics.mean(ms):.1f}ms")
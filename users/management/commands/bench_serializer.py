@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import CommandError
+
+from libs import fastjson
+from users.models import User
+from users.serializers import UserSerializer
+from users.views import UserViewSet
+from .bench import Command as BenchCommand
+
+
+class LegacyUserSerializer(UserSerializer):
+    """未启用 compiled_read 的 UserSerializer，即 DRF ModelSerializer 的默认读路径"""
+
+    compiled_read = False
+
+
+class Command(BenchCommand):
+    help = "列表序列化基准测试：对比 DRF 默认读路径与 compiled_read（模型实例 / values_list 元组）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000", help="逗号分隔的列表长度")
+        parser.add_argument("--seconds", type=float, default=1.0, help="每项测试的时长（秒）")
+
+    def measure(self, func):
+        func()
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < self.seconds:
+            func()
+            count += 1
+        return (time.perf_counter() - started) / count * 1e6
+
+    def handle(self, *args, **options):
+        self.seconds = options["seconds"]
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        self.seed_users(max(sizes))
+
+        plan = UserSerializer.get_read_plan()
+        if plan is None:
+            raise CommandError("UserSerializer 无法编译读路径")
+        # 与列表接口相同的查询：默认排序，附带游标分页需要的列
+        queryset = User.objects.all()
+        columns = UserViewSet().get_read_columns(plan, queryset)
+
+        for size in sizes:
+            # 每次重新查询，计入模型实例化 / 元组构造的开销
+            def legacy():
+                return LegacyUserSerializer(list(queryset[:size]), many=True).data
+
+            def instances():
+                return UserSerializer(list(queryset[:size]), many=True).data
+
+            def rows():
+                page = queryset.values_list(*columns, named=True)[:size]
+                return UserSerializer(list(page), many=True).data
+
+            expected = fastjson.dumps(legacy())
+            if fastjson.dumps(instances()) != expected or fastjson.dumps(rows()) != expected:
+                raise CommandError(f"size={size} 时输出与 DRF 默认实现不一致")
+
+            before = self.measure(legacy)
+            compiled = self.measure(instances)
+            from_rows = self.measure(rows)
+            self.stdout.write(
+                f"size={size:<6} 默认 {before:>10.1f}us  编译(实例) {compiled:>10.1f}us "
+                f"({before / compiled:>4.2f}x)  编译(values) {from_rows:>10.1f}us ({before / from_rows:>4.2f}x)"
+            )
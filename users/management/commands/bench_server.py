@@ -0,0 +1,196 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from libs.benchmark import summarize, tree_rss
+from users import sessions
+from users.models import User
+
+BENCH_USERNAME = "bench_server_user"
+BENCH_PASSWORD = "bench-Password-123"
+MODES = ("wsgi", "asgi")
+SCENARIOS = ("profile", "login")
+
+
+class HTTPConnection:
+    """最小化的 HTTP/1.1 keep-alive 客户端，每个实例对应一个 TCP 连接"""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+    async def request(self, method, path, headers=None, body=b""):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: 127.0.0.1:{self.port}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        status_line = await self.reader.readline()
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        await self.reader.readexactly(length)
+        return int(status_line.split()[1])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "WSGI（gunicorn gthread）与 ASGI（gunicorn + uvicorn worker）部署对比："
+        "在不同并发连接数下测量吞吐量、延迟以及每个连接占用的内存"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default=",".join(MODES), help=f"逗号分隔，可选 {', '.join(MODES)}")
+        parser.add_argument("--scenario", choices=SCENARIOS, default="profile")
+        parser.add_argument("--connections", default="16,64,256", help="逗号分隔的并发连接数")
+        parser.add_argument("--duration", type=float, default=5, help="每轮测试时长（秒）")
+        parser.add_argument("--workers", type=int, default=1, help="gunicorn worker 数")
+        parser.add_argument("--threads", type=int, default=4, help="WSGI 模式下每个 worker 的线程数")
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        modes = [name.strip() for name in options["modes"].split(",") if name.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"未知模式: {', '.join(sorted(unknown))}")
+        levels = [int(value) for value in options["connections"].split(",") if value.strip()]
+
+        user = User.objects.filter(username=BENCH_USERNAME).first()
+        if user is None:
+            user = User(username=BENCH_USERNAME, email=f"{BENCH_USERNAME}@example.com")
+        user.set_password(BENCH_PASSWORD)
+        user.save()
+        self.token = sessions.start(user).token
+
+        for mode in modes:
+            server = self.start_server(mode, options)
+            try:
+                idle = tree_rss(server.pid)
+                self.stdout.write(
+                    f"[{mode}] {self.describe(mode, options)}，空闲内存 {idle / 2**20:.1f} MiB"
+                )
+                for connections in levels:
+                    result = asyncio.run(self.run_level(options, connections, server.pid))
+                    per_connection = max(result["peak_rss"] - idle, 0) / connections
+                    self.stdout.write(
+                        f"  {connections:>5} 连接  {result['throughput']:>9.1f} req/s  "
+                        f"p50 {result['p50_ms']:>8.2f}ms  p99 {result['p99_ms']:>9.2f}ms  "
+                        f"峰值内存 {result['peak_rss'] / 2**20:>7.1f} MiB  "
+                        f"每连接 {per_connection / 1024:>7.1f} KiB  "
+                        f"errors {result['errors']}/{result['requests'] + result['errors']}"
+                    )
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    def describe(self, mode, options):
+        if mode == "wsgi":
+            return f"gthread {options['workers']} worker x {options['threads']} 线程"
+        return f"uvicorn {options['workers']} worker"
+
+    def start_server(self, mode, options):
+        """以子进程启动 gunicorn，关闭限流、查询预算与请求日志，等待端口可用"""
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"),
+            THROTTLE_ANON_RATE="1000000000/day",
+            THROTTLE_USER_RATE="1000000000/day",
+            QUERY_BUDGET_MODE="off",
+            REQUEST_LOG_ENABLED="False",
+            ASYNC_VIEWS="True" if mode == "asgi" else "False",
+        )
+        command = [
+            sys.executable, "-m", "gunicorn",
+            "--bind", f"127.0.0.1:{options['port']}",
+            "--workers", str(options["workers"]),
+            "--log-level", "warning",
+        ]
+        if mode == "wsgi":
+            command += ["--worker-class", "gthread", "--threads", str(options["threads"]),
+                        "--worker-connections", "10000", "config.wsgi:application"]
+        else:
+            command += ["--worker-class", "uvicorn.workers.UvicornWorker", "config.asgi:application"]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"{mode} 服务启动失败，退出码 {server.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", options["port"]), timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            server.terminate()
+            raise CommandError(f"{mode} 服务启动超时")
+        # 预热：触发 URL 解析、认证与序列化的首次加载
+        asyncio.run(self.run_level(dict(options, duration=1), 1, server.pid))
+        return server
+
+    def build_request(self, scenario):
+        if scenario == "login":
+            body = (
+                f'{{"username": "{BENCH_USERNAME}", "password": "{BENCH_PASSWORD}"}}'
+            ).encode()
+            return "POST", "/api/users/login/", {"Content-Type": "application/json"}, body
+        return "GET", "/api/users/profile/", {"Authorization": f"Bearer {self.token}"}, b""
+
+    async def run_level(self, options, connections, pid):
+        """在 connections 个 keep-alive 连接上持续发送请求，同时采样服务端进程树内存"""
+        method, path, headers, body = self.build_request(options["scenario"])
+        latencies = []
+        errors = 0
+        peak_rss = 0
+        stop = asyncio.Event()
+
+        async def client():
+            nonlocal errors
+            connection = HTTPConnection(options["port"])
+            try:
+                await connection.open()
+                while not stop.is_set():
+                    began = time.perf_counter()
+                    status_code = await connection.request(method, path, headers, body)
+                    if status_code >= 400:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - began)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                errors += 1
+            finally:
+                connection.close()
+
+        async def sampler():
+            nonlocal peak_rss
+            while not stop.is_set():
+                peak_rss = max(peak_rss, tree_rss(pid))
+                await asyncio.sleep(0.2)
+
+        tasks = [asyncio.create_task(client()) for _ in range(connections)]
+        tasks.append(asyncio.create_task(sampler()))
+        began = time.perf_counter()
+        await asyncio.sleep(options["duration"])
+        stop.set()
+        await asyncio.gather(*tasks)
+        result = summarize(latencies, time.perf_counter() - began, errors)
+        result["peak_rss"] = peak_rss
+        return result
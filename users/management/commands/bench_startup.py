@@ -0,0 +1,133 @@
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from libs.benchmark import percentile, tree_pss, tree_rss
+from users import sessions
+from users.models import User
+from .bench_server import BENCH_USERNAME, HTTPConnection
+
+VARIANTS = ("baseline", "profile")
+
+
+class Command(BaseCommand):
+    help = (
+        "gunicorn 冷启动基准测试：对比原启动命令（baseline）与 gunicorn.conf.py（profile），"
+        "测量启动到首个响应的耗时、首批请求延迟、稳态延迟与内存"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--variants", default=",".join(VARIANTS), help=f"逗号分隔，可选 {', '.join(VARIANTS)}"
+        )
+        parser.add_argument("--runs", type=int, default=3, help="每种配置的启动次数")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=200, help="稳态阶段的请求数")
+        parser.add_argument("--port", type=int, default=8766)
+
+    def handle(self, *args, **options):
+        variants = [name.strip() for name in options["variants"].split(",") if name.strip()]
+        unknown = set(variants) - set(VARIANTS)
+        if unknown:
+            raise CommandError(f"未知配置: {', '.join(sorted(unknown))}")
+
+        user = User.objects.filter(username=BENCH_USERNAME).first()
+        if user is None:
+            user = User.objects.create(username=BENCH_USERNAME, email=f"{BENCH_USERNAME}@example.com")
+        self.token = sessions.start(user).token
+
+        self.stdout.write(
+            f"{options['workers']} worker x {options['threads']} 线程，每种配置启动 {options['runs']} 次（取中位数）"
+        )
+        for variant in variants:
+            runs = [self.run_once(variant, options) for _ in range(options["runs"])]
+            result = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            self.stdout.write(
+                f"{variant:<9} 首个响应 {result['ready_ms']:>7.0f}ms（该请求 {result['first_ms']:>6.1f}ms）  "
+                f"首批 p50 {result['wave_p50_ms']:>6.1f}ms max {result['wave_max_ms']:>6.1f}ms  "
+                f"稳态 p50 {result['steady_p50_ms']:>5.2f}ms  "
+                f"RSS {result['rss'] / 2**20:>6.1f} MiB  PSS {result['pss'] / 2**20:>6.1f} MiB"
+            )
+
+    def command(self, variant, options):
+        if variant == "profile":
+            return [sys.executable, "-m", "gunicorn", "-c", str(settings.BASE_DIR / "gunicorn.conf.py")]
+        # 原 Dockerfile 中的启动命令；在根目录启动再 --chdir，避免自动加载当前目录的 gunicorn.conf.py
+        return [
+            sys.executable, "-m", "gunicorn", "--chdir", str(settings.BASE_DIR),
+            "--bind", f"127.0.0.1:{options['port']}",
+            "--workers", str(options["workers"]), "--threads", str(options["threads"]),
+            "config.wsgi:application",
+        ]
+
+    def run_once(self, variant, options):
+        env = dict(
+            os.environ,
+            GUNICORN_BIND=f"127.0.0.1:{options['port']}",
+            GUNICORN_WORKERS=str(options["workers"]),
+            GUNICORN_THREADS=str(options["threads"]),
+            GUNICORN_LOG_LEVEL="warning",
+            THROTTLE_ANON_RATE="1000000000/day",
+            THROTTLE_USER_RATE="1000000000/day",
+            QUERY_BUDGET_MODE="off",
+            REQUEST_LOG_ENABLED="False",
+        )
+        started = time.perf_counter()
+        cwd = settings.BASE_DIR if variant == "profile" else "/"
+        server = subprocess.Popen(self.command(variant, options), cwd=cwd, env=env)
+        try:
+            return asyncio.run(self.measure(server, started, options))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    async def request(self, options):
+        connection = HTTPConnection(options["port"])
+        try:
+            await connection.open()
+            began = time.perf_counter()
+            status_code = await connection.request(
+                "GET", "/api/users/profile/", {"Authorization": f"Bearer {self.token}"}
+            )
+            if status_code != 200:
+                raise CommandError(f"请求失败，状态码 {status_code}")
+            return time.perf_counter() - began
+        finally:
+            connection.close()
+
+    async def measure(self, server, started, options):
+        # 端口可连接后立即发出第一个请求，直到成功
+        deadline = time.monotonic() + 60
+        while True:
+            if server.poll() is not None:
+                raise CommandError(f"gunicorn 启动失败，退出码 {server.returncode}")
+            if time.monotonic() > deadline:
+                raise CommandError("gunicorn 启动超时")
+            try:
+                first = await self.request(options)
+                break
+            except (OSError, asyncio.IncompleteReadError):
+                await asyncio.sleep(0.01)
+        ready = time.perf_counter() - started
+
+        # 首批：每个线程一个新连接同时请求，覆盖尚未处理过请求的 worker
+        wave = await asyncio.gather(
+            *(self.request(options) for _ in range(options["workers"] * options["threads"]))
+        )
+        steady = [await self.request(options) for _ in range(options["requests"])]
+        return {
+            "ready_ms": ready * 1000,
+            "first_ms": first * 1000,
+            "wave_p50_ms": percentile(wave, 50) * 1000,
+            "wave_max_ms": max(wave) * 1000,
+            "steady_p50_ms": percentile(steady, 50) * 1000,
+            "rss": tree_rss(server.pid),
+            "pss": tree_pss(server.pid),
+        }
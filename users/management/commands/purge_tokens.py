@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from users.lifecycle import TokenPartitioner, purge_tokens
+
+
+class Command(BaseCommand):
+    help = "分批清理过期/失效的用户Token与会话，可选维护 PostgreSQL 按月分区"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="每批删除的行数")
+        parser.add_argument("--max-batches", type=int, help="单次运行最多执行的批次数")
+        parser.add_argument(
+            "--partitions", action="store_true", help="创建未来分区并删除已过期分区"
+        )
+        parser.add_argument(
+            "--convert-partitions",
+            action="store_true",
+            help="一次性将 token 表转换为按月分区表（仅 PostgreSQL，需在维护窗口执行）",
+        )
+        parser.add_argument(
+            "--keep-legacy", action="store_true", help="转换分区后保留原表"
+        )
+        parser.add_argument(
+            "--interval", type=int, help="以调度模式运行，每隔 N 秒执行一次"
+        )
+
+    def handle(self, *args, **options):
+        if options["convert_partitions"]:
+            partitioner = TokenPartitioner()
+            if not partitioner.supported:
+                raise CommandError("分区仅支持 PostgreSQL")
+            copied = partitioner.convert(keep_legacy=options["keep_legacy"])
+            self.stdout.write(self.style.SUCCESS(f"分区表已就绪，复制 {copied} 行"))
+
+        while True:
+            stats = purge_tokens(
+                batch_size=options["batch_size"],
+                max_batches=options["max_batches"],
+                partitions=options["partitions"],
+            )
+            self.stdout.write(
+                f"删除 {stats.rows_purged} 行（{stats.batches} 批），"
+                f"删除 {stats.partitions_dropped} 个分区（{stats.partition_rows_dropped} 行），"
+                f"耗时 {stats.duration:.3f}s"
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from users.keys import key_store, ASYMMETRIC_ALGORITHMS
+
+
+class Command(BaseCommand):
+    help = "按计划轮换JWT签名密钥（建议通过 cron 定期执行）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="立即生成并启用新密钥")
+        parser.add_argument(
+            "--algorithm", choices=ASYMMETRIC_ALGORITHMS, help="新密钥使用的算法"
+        )
+
+    def handle(self, *args, **options):
+        if not key_store.is_asymmetric and not options["algorithm"]:
+            raise CommandError("JWT_ALGORITHM 为 HS256，无需轮换密钥")
+
+        kid = key_store.rotate(force=options["force"], algorithm=options["algorithm"])
+        if kid:
+            self.stdout.write(self.style.SUCCESS(f"已生成新密钥: {kid}"))
+        else:
+            self.stdout.write("密钥未到轮换时间")
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        # 先以可空列加入，待回填完成后再改为非空
+        migrations.AddField(
+            model_name='usertoken',
+            name='token_digest',
+            field=models.CharField(editable=False, max_length=64, null=True, verbose_name='Token摘要'),
+        ),
+    ]
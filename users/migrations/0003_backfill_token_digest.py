@@ -0,0 +1,39 @@
+import hashlib
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+def backfill_token_digest(apps, schema_editor):
+    """按主键分批回填 token_digest，每批单独提交，避免长时间锁表"""
+    UserToken = apps.get_model('users', 'UserToken')
+    db_alias = schema_editor.connection.alias
+    last_pk = 0
+    while True:
+        batch = list(
+            UserToken.objects.using(db_alias)
+            .filter(pk__gt=last_pk, token_digest__isnull=True)
+            .order_by('pk')
+            .only('pk', 'token')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for row in batch:
+            row.token_digest = hashlib.sha256(row.token.encode('utf-8')).hexdigest()
+        with transaction.atomic(using=db_alias):
+            UserToken.objects.using(db_alias).bulk_update(batch, ['token_digest'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_usertoken_token_digest'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_token_digest, migrations.RunPython.noop),
+    ]
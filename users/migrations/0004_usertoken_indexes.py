@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+from libs.migrations import AddIndexConcurrently, SetNotNull
+
+
+class Migration(migrations.Migration):
+
+    # PostgreSQL 上不阻塞写入：CHECK NOT VALID + VALIDATE 后再 SET NOT NULL，索引并发创建
+    atomic = False
+
+    dependencies = [
+        ('users', '0003_backfill_token_digest'),
+    ]
+
+    operations = [
+        SetNotNull(
+            model_name='usertoken',
+            name='token_digest',
+            field=models.CharField(editable=False, max_length=64, verbose_name='Token摘要'),
+        ),
+        AddIndexConcurrently(
+            model_name='usertoken',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['token_digest'], name='usertoken_active_digest_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usertoken',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', 'token_type'], name='usertoken_active_user_type_idx'),
+        ),
+    ]
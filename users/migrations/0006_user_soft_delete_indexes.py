@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-18 19:29
+
+import users.models
+from django.db import migrations, models
+
+from libs.migrations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0005_user_date_joined_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.UserManager()),
+            ],
+        ),
+        RemoveIndexConcurrently(
+            model_name='user',
+            name='user_date_joined_id_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['date_joined', 'id'], name='user_live_date_joined_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at'], name='user_live_created_at_idx'),
+        ),
+    ]
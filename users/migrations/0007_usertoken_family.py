@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+from libs.migrations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # 索引在 PostgreSQL 上并发创建，不阻塞 token 表的写入
+    atomic = False
+
+    dependencies = [
+        ('users', '0006_user_soft_delete_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertoken',
+            name='family',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='会话'),
+        ),
+        AddIndexConcurrently(
+            model_name='usertoken',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['family'], name='usertoken_active_family_idx'),
+        ),
+    ]
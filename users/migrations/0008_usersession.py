@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 1000
+
+
+def backfill_sessions(apps, schema_editor):
+    """为仍有有效刷新令牌的会话创建 UserSession，分批提交；之前的访问令牌不中断"""
+    UserToken = apps.get_model('users', 'UserToken')
+    UserSession = apps.get_model('users', 'UserSession')
+    db_alias = schema_editor.connection.alias
+    last_pk = 0
+    while True:
+        batch = list(
+            UserToken.objects.using(db_alias)
+            .filter(pk__gt=last_pk, is_active=True, token_type='refresh')
+            .exclude(family='')
+            .order_by('pk')
+            .only('pk', 'user_id', 'family', 'expires')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        with transaction.atomic(using=db_alias):
+            UserSession.objects.using(db_alias).bulk_create(
+                [UserSession(sid=row.family, user_id=row.user_id, expires=row.expires) for row in batch],
+                ignore_conflicts=True,
+            )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # 回填按批提交
+    atomic = False
+
+    dependencies = [
+        ('users', '0007_usertoken_family'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='是否删除')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='删除时间')),
+                ('sid', models.CharField(max_length=32, unique=True, verbose_name='会话标识')),
+                ('expires', models.DateTimeField(verbose_name='过期时间')),
+                ('is_active', models.BooleanField(default=True, verbose_name='是否有效')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '登录会话',
+                'verbose_name_plural': '登录会话',
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['user'], name='usersession_active_user_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_sessions, migrations.RunPython.noop),
+    ]
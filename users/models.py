@@ -1,7 +1,12 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as AuthUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from core.models import BaseModel
+from core.models import BaseModel, SoftDeleteManager
+from .token_cache import token_digest
+
+
+class UserManager(SoftDeleteManager, AuthUserManager):
+    """用户管理器：排除已软删除的用户（登录、认证均查不到），保留 create_user 等方法"""
 
 
 class User(AbstractUser, BaseModel):
@@ -31,15 +36,58 @@ class User(AbstractUser, BaseModel):
         null=True, blank=True, verbose_name="最后登录IP"
     )
 
+    objects = UserManager()
+
     class Meta:
         verbose_name = "用户"
         verbose_name_plural = verbose_name
         ordering = ["-date_joined"]
+        indexes = [
+            # 列表 / 游标分页：WHERE NOT is_deleted ORDER BY date_joined, id
+            models.Index(
+                fields=["date_joined", "id"],
+                condition=models.Q(is_deleted=False),
+                name="user_live_date_joined_id_idx",
+            ),
+            # 导出：WHERE NOT is_deleted AND created_at 范围
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_deleted=False),
+                name="user_live_created_at_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.username or self.phone or self.email
 
 
+class UserSession(BaseModel):
+    """登录会话：吊销状态的持久记录（刷新时加锁检查；访问令牌认证在进程内缓存未命中时经共享缓存读取，见 users/token_cache.py）"""
+
+    sid = models.CharField(max_length=32, unique=True, verbose_name="会话标识")
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="sessions", verbose_name="用户"
+    )
+    # 最后一个令牌的过期时间，每次刷新顺延
+    expires = models.DateTimeField(verbose_name="过期时间")
+    is_active = models.BooleanField(default=True, verbose_name="是否有效")
+
+    class Meta:
+        verbose_name = "登录会话"
+        verbose_name_plural = verbose_name
+        indexes = [
+            # 吊销用户的全部会话：WHERE user_id IN (...) AND is_active
+            models.Index(
+                fields=["user"],
+                condition=models.Q(is_active=True),
+                name="usersession_active_user_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.sid}"
+
+
 class UserToken(BaseModel):
     """用户Token"""
 
@@ -52,12 +100,16 @@ class UserToken(BaseModel):
         User, on_delete=models.CASCADE, related_name="tokens", verbose_name="用户"
     )
     token = models.CharField(max_length=500, verbose_name="Token")
+    # token 的 SHA-256 摘要，所有查询均基于该列
+    token_digest = models.CharField(max_length=64, editable=False, verbose_name="Token摘要")
     token_type = models.CharField(
         max_length=10,
         choices=TOKEN_TYPE_CHOICES,
         default="access",
         verbose_name="Token类型",
     )
+    # 会话标识：同一次登录轮换出的刷新令牌属于同一会话，与访问令牌中的 sid 相同
+    family = models.CharField(max_length=32, blank=True, default="", verbose_name="会话")
     expires = models.DateTimeField(verbose_name="过期时间")
     is_active = models.BooleanField(default=True, verbose_name="是否有效")
     device = models.CharField(
@@ -72,14 +124,31 @@ class UserToken(BaseModel):
         verbose_name = "用户Token"
         verbose_name_plural = verbose_name
         ordering = ["-created_at"]
+        indexes = [
+            # 刷新：按摘要定位当前刷新令牌，WHERE token_digest = ? AND is_active
+            models.Index(
+                fields=["token_digest"],
+                condition=models.Q(is_active=True),
+                name="usertoken_active_digest_idx",
+            ),
+            # 吊销用户的全部会话（修改密码、停用用户）：WHERE user_id IN (...) AND is_active
+            models.Index(
+                fields=["user", "token_type"],
+                condition=models.Q(is_active=True),
+                name="usertoken_active_user_type_idx",
+            ),
+            # 登出 / 重放检测吊销单个会话：WHERE family IN (...) AND is_active
+            models.Index(
+                fields=["family"],
+                condition=models.Q(is_active=True),
+                name="usertoken_active_family_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.token_type} - {self.expires}"
 
     def save(self, *args, **kwargs):
-        if not self.pk:  # 如果是新创建的token
-            # 使相同类型的旧token失效
-            UserToken.objects.filter(
-                user=self.user, token_type=self.token_type, is_active=True
-            ).update(is_active=False)
+        # 使旧令牌失效由 users/sessions.py 负责（登录时吊销用户的其他会话）
+        self.token_digest = token_digest(self.token)
         super().save(*args, **kwargs)
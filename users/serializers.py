@@ -1,21 +1,35 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from core.serializers import BaseModelSerializer
 from .models import User, UserToken
+from .hashing import hashing_executor
 
 
 class UserSerializer(BaseModelSerializer):
     """用户序列化器"""
     password = serializers.CharField(write_only=True)
+    compiled_read = True
 
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'phone', 'password', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['is_active']
 
+    def get_fields(self):
+        """唯一性校验包含已软删除的用户，与数据库的唯一约束一致（默认管理器查不到已删除的用户）"""
+        fields = super().get_fields()
+        for field in fields.values():
+            field.validators = [
+                UniqueValidator(User.objects.all_with_deleted(), validator.message, validator.lookup)
+                if isinstance(validator, UniqueValidator) else validator
+                for validator in field.validators
+            ]
+        return fields
+
     def create(self, validated_data):
         password = validated_data.pop('password')
         user = User(**validated_data)
-        user.set_password(password)
+        hashing_executor.set_password(user, password)
         user.save()
         return user
 
@@ -29,12 +43,35 @@ class UserSerializer(BaseModelSerializer):
 
         # 如有密码则加密
         if password:
-            instance.set_password(password)
+            hashing_executor.set_password(instance, password)
 
         instance.save()
         return instance
 
 
+class BulkUserSerializer(UserSerializer):
+    """
+    批量写入使用的用户序列化器
+    唯一性由 users.bulk 按块统一查询检查，这里去掉逐条查询的 UniqueValidator，错误信息保留在 unique_messages
+    """
+
+    @property
+    def unique_messages(self):
+        """{字段名: 唯一性校验失败时的错误信息}"""
+        self.fields
+        return self._unique_messages
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self._unique_messages = {}
+        for name, field in fields.items():
+            unique = [v for v in field.validators if isinstance(v, UniqueValidator)]
+            if unique:
+                self._unique_messages[name] = str(unique[0].message)
+                field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+        return fields
+
+
 class LoginSerializer(serializers.Serializer):
     """登录序列化器"""
     username = serializers.CharField()
@@ -43,6 +80,8 @@ class LoginSerializer(serializers.Serializer):
 
 class TokenSerializer(BaseModelSerializer):
     """Token序列化器"""
+    compiled_read = True
+
     class Meta:
         model = UserToken
         fields = ['token', 'expires', 'is_active', 'created_at'] 
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+登录会话：短期访问令牌 + 轮换的刷新令牌
+
+- 一次登录为一个会话（UserSession，两种令牌都带有会话标识 sid），吊销状态持久保存在数据库中
+- 访问令牌有效期短（JWT_EXPIRATION_DELTA），认证时只校验签名与有效期。已校验的令牌在进程内缓存到 exp，
+  命中时不再检查会话状态；未命中时经共享缓存读取会话状态，仍未命中才查询 UserSession
+  （见 JWTAuthentication、users/token_cache.py）
+- 刷新令牌保存在 UserToken（token_type=refresh，family 为会话标识）。刷新时锁定会话行，
+  按摘要（usertoken_active_digest_idx）定位当前刷新令牌，使其失效并签发新的一对令牌（轮换）。
+  会话仍有效时出现已轮换的旧刷新令牌，说明令牌可能被盗用，吊销整个会话
+- 登录时用户的其他会话失效；登出吊销当前会话；修改密码、停用用户吊销用户的全部会话。
+  刷新令牌立即失效；此前签发的访问令牌在执行吊销的进程中立即失效，
+  其他进程已缓存的访问令牌最迟在过期（JWT_EXPIRATION_DELTA）后失效
+- 关闭 JWT_ALLOW_REFRESH 时只签发访问令牌
+"""
+
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+import jwt
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core import db_router
+from core.exceptions import AuthenticationError, PermissionError
+from libs.logging import logger
+from .authentication import ACCESS, REFRESH, decode
+from .keys import encode_token
+from .models import UserSession, UserToken
+from .token_cache import token_cache, token_digest
+
+INVALID_REFRESH = "刷新令牌无效或已过期"
+
+
+@dataclass
+class TokenPair:
+    token: str
+    expires: datetime
+    refresh_token: str = None
+    refresh_expires: datetime = None
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def build_token(user, token_type, session, lifetime):
+    """签发JWT（不写数据库），返回 (token, 过期时间)"""
+    now = timezone.now()
+    expires = now + lifetime
+    payload = {
+        "user_id": user.id,
+        "username": user.username,
+        "type": token_type,
+        "sid": session,
+        "iat": now.timestamp(),
+        "exp": expires.timestamp(),
+    }
+    if token_type == REFRESH:
+        # 同一会话内的刷新令牌互不相同
+        payload["jti"] = uuid.uuid4().hex
+    return encode_token(payload), expires
+
+
+def _issue(user, session):
+    """签发一对令牌，返回 (TokenPair, 待保存的刷新令牌记录)"""
+    conf = settings.JWT_AUTH
+    token, expires = build_token(user, ACCESS, session, conf["JWT_EXPIRATION_DELTA"])
+    if not conf["JWT_ALLOW_REFRESH"]:
+        return TokenPair(token, expires), None
+    refresh_token, refresh_expires = build_token(
+        user, REFRESH, session, conf["JWT_REFRESH_EXPIRATION_DELTA"]
+    )
+    record = UserToken(
+        user=user, token=refresh_token, token_type=REFRESH, family=session, expires=refresh_expires
+    )
+    return TokenPair(token, expires, refresh_token, refresh_expires), record
+
+
+def start(user):
+    """登录：开始新会话，用户的其他会话失效"""
+    session = uuid.uuid4().hex
+    pair, record = _issue(user, session)
+    with transaction.atomic():
+        revoke_users([user.pk])
+        UserSession.objects.create(
+            sid=session, user=user, expires=pair.refresh_expires or pair.expires
+        )
+        if record is not None:
+            record.save()
+    return pair
+
+
+# 会话与令牌写入需要事务，在线程中执行同步版本
+astart = sync_to_async(start)
+
+
+def rotate(refresh_token):
+    """刷新：轮换刷新令牌并签发新的访问令牌"""
+    if not settings.JWT_AUTH["JWT_ALLOW_REFRESH"]:
+        raise PermissionError("未启用令牌刷新")
+    try:
+        payload = decode(refresh_token, REFRESH)
+    except jwt.InvalidTokenError:
+        raise AuthenticationError(INVALID_REFRESH)
+    user_id, session = payload["user_id"], payload["sid"]
+    # 请求结束后该用户在一段时间内读主库（读己之写）
+    db_router.set_request_user(user_id)
+
+    digest = token_digest(refresh_token)
+    with transaction.atomic():
+        # 只锁定会话行：同一会话的并发刷新在此串行
+        record = (
+            UserSession.objects.select_for_update(of=("self",))
+            .select_related("user")
+            .filter(sid=session, user_id=user_id, is_active=True, user__is_active=True)
+            .first()
+        )
+        if record is None:
+            raise AuthenticationError(INVALID_REFRESH)
+        current = UserToken.objects.filter(token_digest=digest, is_active=True).first()
+        if current is None or current.family != session:
+            # 签名有效、会话仍有效，却不是当前刷新令牌：已轮换的旧令牌被重复使用
+            _revoke([session])
+            reused = True
+        else:
+            reused = False
+            UserToken.objects.filter(pk=current.pk).update(is_active=False, updated_at=timezone.now())
+            pair, token = _issue(record.user, session)
+            token.save()
+            record.expires = pair.refresh_expires
+            record.save(update_fields=["expires", "updated_at"])
+
+    if reused:
+        logger.warning(f"刷新令牌被重复使用，已吊销用户 {user_id} 的会话 {session}")
+        raise AuthenticationError(INVALID_REFRESH)
+    return pair
+
+
+def end(access_token):
+    """登出：吊销访问令牌所属的会话"""
+    _revoke([decode(access_token, ACCESS)["sid"]])
+
+
+aend = sync_to_async(end)
+
+
+def revoke_users(user_ids):
+    """修改密码、停用用户：吊销这些用户的全部会话"""
+    sessions = list(
+        UserSession.objects.filter(user_id__in=user_ids, is_active=True).values_list("sid", flat=True)
+    )
+    _revoke(sessions, user_ids)
+
+
+def _revoke(sessions, user_ids=None):
+    """
+    在数据库中吊销会话并使其刷新令牌失效，事务提交后写入共享缓存
+    :param user_ids: 吊销的是这些用户的全部会话时传入，刷新令牌按用户更新
+    """
+    if not sessions:
+        return
+    now = timezone.now()
+    UserSession.objects.filter(sid__in=sessions, is_active=True).update(is_active=False, updated_at=now)
+    tokens = UserToken.objects.filter(is_active=True)
+    if user_ids is not None:
+        tokens = tokens.filter(user_id__in=user_ids)
+    else:
+        tokens = tokens.filter(family__in=sessions)
+    tokens.update(is_active=False, updated_at=now)
+    transaction.on_commit(lambda: token_cache.revoke_sessions(sessions))
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.token_cache import token_cache
+
+PASSWORD = "S3cure-pass-x"
+
+
+def reset_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    token_cache.clear_local()
+
+
+class UserAPITestCase(TransactionTestCase):
+    """用户接口测试基类：以 bob 登录、刷新与访问（事务提交后才写入缓存，使用 TransactionTestCase）"""
+
+    def setUp(self):
+        reset_caches()
+        self.user = User.objects.create_user("bob", "bob@example.com", PASSWORD)
+
+    def login(self, username="bob", password=PASSWORD):
+        response = APIClient().post(
+            "/api/users/login/", {"username": username, "password": password}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["data"]
+
+    def refresh(self, refresh_token):
+        return APIClient().post("/api/users/refresh/", {"refresh_token": refresh_token}, format="json")
+
+    def get(self, url, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client.get(url)
+
+    def assertAccepted(self, token):
+        self.assertEqual(self.get("/api/users/profile/", token).status_code, 200)
+
+    def assertRejected(self, token):
+        self.assertNotEqual(self.get("/api/users/profile/", token).status_code, 200)
@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users import bulk
+from users.models import User
+from users.tests.base import PASSWORD, UserAPITestCase
+
+SMALL_CHUNKS = {**settings.BULK_USERS, "CHUNK_SIZE": 3, "BATCH_SIZE": 1}
+
+
+def new_user(username, **extra):
+    return {"username": username, "password": PASSWORD, "email": f"{username}@example.com", **extra}
+
+
+def statuses(report):
+    return [result["status"] for result in report.results]
+
+
+@override_settings(BULK_USERS=SMALL_CHUNKS)
+class BulkCreateTests(TestCase):
+    def test_per_item_results(self):
+        User.objects.create_user("taken", "taken@example.com", PASSWORD)
+        User.objects.create_user("deleted", "deleted@example.com", PASSWORD).delete()
+        items = [
+            new_user("alice"),
+            "not-an-object",
+            {"username": "nopass", "email": "nopass@example.com"},
+            new_user("bademail", email="not-an-email"),
+            new_user("taken"),
+            new_user("deleted"),
+            new_user("alice", email="alice2@example.com"),
+            new_user("carol"),
+        ]
+        report = bulk.bulk_create_users(items)
+
+        self.assertEqual(
+            statuses(report),
+            ["created", "error", "error", "error", "error", "error", "error", "created"],
+        )
+        self.assertIn("email", report.results[3]["errors"])
+        self.assertIn("username", report.results[4]["errors"])
+        # 已软删除的用户名同样占用
+        self.assertIn("username", report.results[5]["errors"])
+        # 同一请求内的重复值
+        self.assertIn("username", report.results[6]["errors"])
+        self.assertEqual(report.as_dict()["succeeded"], 2)
+        self.assertTrue(User.objects.get(username="carol").check_password(PASSWORD))
+
+    def test_failed_chunk_is_rolled_back_and_retried_per_item(self):
+        original = bulk.hash_passwords
+
+        def hash_passwords(entries, report):
+            # 唯一性检查之后、写入之前有并发请求注册了 bob5
+            if any(data["username"] == "bob5" for _, _, data in entries):
+                User.objects.create_user("bob5", "other@example.com", PASSWORD)
+            return original(entries, report)
+
+        items = [new_user(f"bob{index}") for index in range(6)]
+        with mock.patch.object(bulk, "hash_passwords", hash_passwords):
+            report = bulk.bulk_create_users(items)
+
+        self.assertEqual(statuses(report), ["created"] * 5 + ["error"])
+        self.assertEqual(report.results[5]["errors"], {"non_field_errors": ["数据完整性错误"]})
+        # 每行单独插入（BATCH_SIZE=1）：先写入的 bob3、bob4 随整块回滚，逐项重试后各只有一条
+        for index in range(6):
+            self.assertEqual(User.objects.filter(username=f"bob{index}").count(), 1)
+        self.assertEqual(User.objects.get(username="bob5").email, "other@example.com")
+
+
+@override_settings(BULK_USERS=SMALL_CHUNKS)
+class BulkUpdateTests(TestCase):
+    def test_per_item_results(self):
+        first = User.objects.create_user("first", "first@example.com", PASSWORD)
+        second = User.objects.create_user("second", "second@example.com", PASSWORD)
+        items = [
+            {"id": first.pk, "email": "first@example.org"},
+            {"id": first.pk, "email": "again@example.org"},
+            {"id": 999999, "email": "missing@example.org"},
+            {"email": "noid@example.org"},
+            {"id": second.pk, "email": "first@example.org"},
+            {"id": second.pk, "phone": "13800000000"},
+        ]
+        report = bulk.bulk_update_users(items)
+
+        self.assertEqual(statuses(report), ["updated", "error", "error", "error", "error", "error"])
+        self.assertEqual(report.results[1]["errors"], {"non_field_errors": ["重复的 id"]})
+        self.assertEqual(report.results[2]["errors"], {"non_field_errors": ["资源不存在"]})
+        self.assertIn("email", report.results[4]["errors"])
+        self.assertEqual(report.results[5]["errors"], {"non_field_errors": ["重复的 id"]})
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.email, "first@example.org")
+        self.assertEqual(second.email, "second@example.com")
+
+
+class BulkDeactivateTests(UserAPITestCase):
+    def test_per_item_results(self):
+        admin = User.objects.create_superuser("root", "root@example.com", PASSWORD)
+        inactive = User.objects.create_user("inactive", "inactive@example.com", PASSWORD, is_active=False)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login('root')['token']}")
+
+        response = client.post(
+            "/api/users/bulk_deactivate/",
+            [self.user.pk, {"id": inactive.pk}, admin.pk, 999999, "x", self.user.pk],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(
+            [result["status"] for result in data["results"]],
+            ["deactivated", "unchanged", "error", "error", "error", "error"],
+        )
+        self.assertEqual((data["succeeded"], data["failed"]), (2, 4))
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+        self.assertTrue(User.objects.get(pk=admin.pk).is_active)
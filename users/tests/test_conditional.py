@@ -0,0 +1,65 @@
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.tests.base import PASSWORD, UserAPITestCase
+
+
+class ConditionalRequestTests(UserAPITestCase):
+    """ETag / Last-Modified：未修改时返回 304，数据变更后 ETag 随之变化"""
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user("alice", "alice@example.com", PASSWORD)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['token']}")
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def assertChangedAfterUpdate(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertNotModified(url, etag)
+
+        patched = self.client.patch(f"/api/users/{self.other.pk}/", {"email": "alice@example.org"}, format="json")
+        self.assertEqual(patched.status_code, 200)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotModified(url, response["ETag"])
+
+    def test_detail(self):
+        url = f"/api/users/{self.other.pk}/"
+        self.assertChangedAfterUpdate(url)
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304
+        )
+
+    def test_page_number_list(self):
+        self.assertChangedAfterUpdate("/api/users/")
+
+    def test_cursor_list(self):
+        self.assertChangedAfterUpdate("/api/users/?pagination=cursor&count=none")
+
+    def test_list_etag_changes_on_insert_and_delete(self):
+        etag = self.client.get("/api/users/")["ETag"]
+        User.objects.create_user("carol", "carol@example.com", PASSWORD)
+        inserted = self.client.get("/api/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(inserted.status_code, 200)
+
+        User.objects.get(username="carol").delete()
+        deleted = self.client.get("/api/users/", HTTP_IF_NONE_MATCH=inserted["ETag"])
+        self.assertEqual(deleted.status_code, 200)
+        self.assertEqual(len(deleted.json()["data"]["results"]), 2)
+
+    def test_profile(self):
+        response = self.client.get("/api/users/profile/")
+        self.assertNotModified("/api/users/profile/", response["ETag"])
+        self.assertEqual(set(response["Cache-Control"].split(", ")), {"private", "no-cache"})
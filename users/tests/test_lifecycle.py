@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+
+from libs.metrics import render_metrics
+from users import lifecycle
+from users.models import User, UserToken
+
+
+class PurgeTokensTests(TestCase):
+    def setUp(self):
+        caches["shared"].clear()
+        self.user = User.objects.create_user("bob", "bob@example.com", "S3cure-pass-x")
+        now = timezone.now()
+        for index in range(5):
+            UserToken.objects.create(
+                user=self.user, token=f"expired-{index}", token_type="refresh", expires=now - timedelta(days=30)
+            )
+        UserToken.objects.create(user=self.user, token="live", token_type="refresh", expires=now + timedelta(days=1))
+
+    def test_purges_in_batches(self):
+        stats = lifecycle.purge_tokens(batch_size=2)
+        self.assertEqual(stats.rows_purged, 5)
+        self.assertEqual(stats.batches, 3)
+        self.assertEqual(list(UserToken.objects.values_list("token", flat=True)), ["live"])
+
+    def test_metrics(self):
+        self.assertNotIn("token_purge_", render_metrics())
+        lifecycle.purge_tokens(batch_size=2)
+        lifecycle.purge_tokens(batch_size=2)
+
+        text = render_metrics()
+        self.assertIn("token_purge_runs_total 2\n", text)
+        self.assertIn('token_purge_rows_total{method="batch"} 5\n', text)
+        self.assertIn("token_purge_last_duration_seconds ", text)
+        self.assertEqual(lifecycle.get_last_stats()["rows_purged"], 0)
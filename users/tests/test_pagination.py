@@ -0,0 +1,89 @@
+import json
+
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.tests.base import PASSWORD, UserAPITestCase
+
+CURSOR_URL = "/api/users/?pagination=cursor&page_size=3"
+
+
+class CursorPaginationTests(UserAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(7):
+            User.objects.create_user(f"user{index}", f"user{index}@example.com", PASSWORD)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['token']}")
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["data"]
+
+    def ids(self, page):
+        return [item["id"] for item in page["results"]]
+
+    def ordered_ids(self):
+        return list(User.objects.order_by("-date_joined", "-id").values_list("id", flat=True))
+
+    def test_walks_every_row_once(self):
+        expected = self.ordered_ids()
+        seen, url = [], CURSOR_URL
+        while url:
+            page = self.page(url)
+            seen.extend(self.ids(page))
+            url = page["links"]["next"]
+        self.assertEqual(seen, expected)
+
+    def test_cursor_is_stable_across_inserts(self):
+        expected = self.ordered_ids()
+        first = self.page(CURSOR_URL)
+        self.assertEqual(self.ids(first), expected[:3])
+        self.assertIsNone(first["links"]["previous"])
+
+        # 新插入的行排在最前，不影响已取得的游标之后的页
+        User.objects.create_user("late0", "late0@example.com", PASSWORD)
+        User.objects.create_user("late1", "late1@example.com", PASSWORD)
+        second = self.page(first["links"]["next"])
+        self.assertEqual(self.ids(second), expected[3:6])
+
+        previous = self.page(second["links"]["previous"])
+        self.assertEqual(self.ids(previous), expected[:3])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(CURSOR_URL + "&cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "无效的游标")
+
+    def test_invalid_count_mode(self):
+        response = self.client.get(CURSOR_URL + "&count=fast")
+        self.assertEqual(response.status_code, 400)
+
+    def test_count_modes(self):
+        self.assertEqual(self.page(CURSOR_URL + "&count=exact")["total"], 8)
+        self.assertIsNone(self.page(CURSOR_URL + "&count=none")["total"])
+        page = self.page(CURSOR_URL)
+        self.assertEqual(page["total"], 8)
+        self.assertTrue(page["total_is_approximate"])
+
+
+class ListStreamTests(UserAPITestCase):
+    def test_stream_returns_every_row(self):
+        for index in range(4):
+            User.objects.create_user(f"user{index}", f"user{index}@example.com", PASSWORD)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['token']}")
+
+        response = client.get("/api/users/?stream=true")
+        self.assertTrue(response.streaming)
+        body = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(body["status"], "success")
+        self.assertEqual(
+            [item["id"] for item in body["data"]],
+            list(User.objects.order_by("-date_joined", "-id").values_list("id", flat=True)),
+        )
+        # 与分页接口的行数据一致
+        page = client.get("/api/users/?page_size=100").json()["data"]["results"]
+        self.assertEqual(body["data"], page)
+
@@ -0,0 +1,53 @@
+from django.conf import settings
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.tests.base import PASSWORD, UserAPITestCase, reset_caches
+
+
+class QueryBudgetTests(UserAPITestCase):
+    """
+    测试中 QUERY_BUDGET MODE 为 raise：超出 UserViewSet.query_budgets 或出现 N+1 时请求直接抛出异常。
+    每个请求前清空缓存，按缓存未命中（查询最多）的情况检查
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.assertEqual(settings.QUERY_BUDGET["MODE"], "raise")
+        for index in range(12):
+            User.objects.create_user(f"user{index}", f"user{index}@example.com", PASSWORD)
+        self.tokens = self.login()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['token']}")
+
+    def request(self, method, url, data=None):
+        reset_caches()
+        response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 300, response.content)
+        return response
+
+    def test_read_actions(self):
+        self.request("get", "/api/users/profile/")
+        self.request("get", "/api/users/")
+        self.request("get", "/api/users/?page=2")
+        self.request("get", "/api/users/?pagination=cursor")
+        self.request("get", f"/api/users/{self.user.pk}/")
+
+    def test_write_actions(self):
+        self.request("patch", f"/api/users/{self.user.pk}/", {"introduction": "hi"})
+        other = User.objects.get(username="user0")
+        self.request("delete", f"/api/users/{other.pk}/")
+
+    def test_session_actions(self):
+        # 再次登录会吊销已有会话，查询最多
+        self.login()
+        tokens = self.login()
+        reset_caches()
+        self.assertEqual(self.refresh(tokens["refresh_token"]).status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['token']}")
+        response = self.request(
+            "post", "/api/users/change_password/", {"old_password": PASSWORD, "new_password": "N3w-pass-xyz"}
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['data']['token']}")
+        self.request("post", "/api/users/logout/")
@@ -0,0 +1,96 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from users.models import User, UserSession, UserToken
+from users.tests.base import PASSWORD, UserAPITestCase, reset_caches
+
+
+class RefreshRotationTests(UserAPITestCase):
+    def test_refresh_rotates_token(self):
+        tokens = self.login()
+        response = self.refresh(tokens["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()["data"]
+
+        self.assertNotEqual(rotated["refresh_token"], tokens["refresh_token"])
+        self.assertAccepted(rotated["token"])
+        # 轮换只影响刷新令牌，已签发的访问令牌在有效期内仍可用
+        self.assertAccepted(tokens["token"])
+        self.assertEqual(
+            UserToken.objects.filter(user=self.user, token_type="refresh", is_active=True).count(), 1
+        )
+
+    def test_reused_refresh_token_revokes_session(self):
+        tokens = self.login()
+        rotated = self.refresh(tokens["refresh_token"]).json()["data"]
+
+        response = self.refresh(tokens["refresh_token"])
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(UserSession.objects.get(user=self.user).is_active)
+        # 整个会话被吊销：新刷新令牌与两个访问令牌均失效
+        self.assertEqual(self.refresh(rotated["refresh_token"]).status_code, 401)
+        self.assertRejected(tokens["token"])
+        self.assertRejected(rotated["token"])
+
+    def test_rotate_looks_up_token_by_digest(self):
+        tokens = self.login()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.refresh(tokens["refresh_token"]).status_code, 200)
+        lookups = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "users_usertoken"')
+        ]
+        self.assertEqual(len(lookups), 1)
+        where = lookups[0].split(" WHERE ", 1)[1]
+        self.assertIn('"token_digest" =', where)
+        self.assertNotIn('"family"', where)
+
+    def test_access_token_cannot_refresh(self):
+        tokens = self.login()
+        self.assertEqual(self.refresh(tokens["token"]).status_code, 401)
+        self.assertRejected(tokens["refresh_token"])
+
+
+class RevocationTests(UserAPITestCase):
+    def test_logout_revokes_session(self):
+        tokens = self.login()
+        self.assertAccepted(tokens["token"])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['token']}")
+        self.assertEqual(client.post("/api/users/logout/").status_code, 200)
+
+        self.assertRejected(tokens["token"])
+        self.assertEqual(self.refresh(tokens["refresh_token"]).status_code, 401)
+
+    def test_revocation_survives_cache_loss(self):
+        tokens = self.login()
+        self.assertAccepted(tokens["token"])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['token']}")
+        client.post("/api/users/logout/")
+
+        # 缓存丢失不代表未吊销：以数据库为准
+        reset_caches()
+        self.assertRejected(tokens["token"])
+
+    def test_login_revokes_other_sessions(self):
+        first = self.login()
+        second = self.login()
+        self.assertRejected(first["token"])
+        self.assertAccepted(second["token"])
+        self.assertEqual(UserSession.objects.filter(user=self.user, is_active=True).count(), 1)
+
+    def test_deactivated_user_is_rejected(self):
+        tokens = self.login()
+        self.assertAccepted(tokens["token"])
+        admin = User.objects.create_superuser("root", "root@example.com", PASSWORD)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login('root')['token']}")
+        response = client.post("/api/users/bulk_deactivate/", [self.user.pk], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["results"][0]["status"], "deactivated")
+
+        self.assertRejected(tokens["token"])
+        self.assertEqual(self.refresh(tokens["refresh_token"]).status_code, 401)
+        self.assertTrue(User.objects.filter(pk=admin.pk, is_active=True).exists())
@@ -0,0 +1,67 @@
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from users.models import UserSession
+from users.tests.base import UserAPITestCase
+from users.token_cache import REVOKED, token_cache
+
+
+class TokenCacheTests(UserAPITestCase):
+    """进程内 L1、共享缓存与负缓存"""
+
+    def clear_shared(self):
+        caches[token_cache.alias].clear()
+
+    def test_local_hit_skips_shared_cache_and_database(self):
+        tokens = self.login()
+        self.assertAccepted(tokens["token"])
+
+        self.clear_shared()
+        with self.assertNumQueries(0):
+            response = self.get("/api/users/profile/", tokens["token"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["username"], "bob")
+
+    def test_local_miss_reads_session_from_database(self):
+        tokens = self.login()
+        self.assertAccepted(tokens["token"])
+
+        token_cache.clear_local()
+        self.clear_shared()
+        self.assertAccepted(tokens["token"])
+        self.assertEqual(len(token_cache.local), 1)
+
+    def test_revocation_in_another_process(self):
+        tokens = self.login()
+        self.assertAccepted(tokens["token"])
+
+        # 模拟其他 worker 吊销：数据库与共享缓存已更新，本进程的 L1 未失效
+        session = UserSession.objects.get(user=self.user)
+        UserSession.objects.filter(pk=session.pk).update(is_active=False)
+        token_cache.shared.set(token_cache.SESSION_KEY.format(session.sid), REVOKED)
+        self.assertAccepted(tokens["token"])
+
+        # L1 未命中（其他进程或令牌过期后）立即生效
+        token_cache.local.clear()
+        self.assertRejected(tokens["token"])
+
+    def test_revoked_session_is_cached_negatively(self):
+        tokens = self.login()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['token']}")
+        self.assertEqual(client.post("/api/users/logout/").status_code, 200)
+
+        self.clear_shared()
+        with self.assertNumQueries(0):
+            self.assertRejected(tokens["token"])
+
+    def test_user_update_evicts_local_entry(self):
+        tokens = self.login()
+        self.assertAccepted(tokens["token"])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['token']}")
+        response = client.patch(f"/api/users/{self.user.pk}/", {"email": "bob@example.org"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get("/api/users/profile/", tokens["token"])
+        self.assertEqual(response.json()["data"]["email"], "bob@example.org")
@@ -0,0 +1,208 @@
+"""
+访问令牌校验缓存
+
+访问令牌是无状态的（见 users/sessions.py），认证时需要会话状态与用户对象：
+- L1：进程内 LRU，按 token 摘要缓存已校验的令牌（用户、会话），过期时间为令牌的 exp。
+  命中时不访问共享缓存与数据库
+- L2：共享缓存，会话状态与用户对象。会话状态以数据库中的 UserSession 为准，缓存只是其副本：
+  未命中时查询数据库并写回（有效状态保留 TOKEN_CACHE_TIMEOUT，吊销状态保留一个访问令牌有效期），
+  缓存丢失不会使已吊销的会话恢复有效
+- 负缓存：进程内记录已吊销的会话，直到其令牌过期
+
+吊销在执行吊销的进程与 L1 未命中的请求中立即生效；其他进程 L1 中的令牌在 exp 前仍被接受，
+延迟不超过访问令牌有效期（JWT_EXPIRATION_DELTA），刷新令牌则立即失效。
+关闭缓存时每次请求查询数据库。
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+# 缓存中的会话状态
+ACTIVE = 1
+REVOKED = 0
+
+
+def token_digest(token):
+    """计算 token 的 SHA-256 摘要"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class LocalLRUCache:
+    """带过期时间的线程安全 LRU 缓存"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """删除所有满足条件的条目，仅用于低频的失效操作"""
+        with self._lock:
+            for key in [k for k, (v, _) in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TokenCache:
+    """已校验令牌的两级缓存（会话状态与用户对象）及已吊销会话的负缓存"""
+
+    SESSION_KEY = "jwt:session:{}"
+    USER_KEY = "jwt:user:{}"
+
+    def __init__(self):
+        conf = settings.JWT_AUTH
+        self.enabled = conf.get("TOKEN_CACHE_ENABLED", True)
+        self.alias = conf.get("TOKEN_CACHE_ALIAS", "default")
+        self.timeout = conf.get("TOKEN_CACHE_TIMEOUT", 300)
+        # 吊销状态保留到此前签发的访问令牌全部过期
+        self.revocation_timeout = int(conf["JWT_EXPIRATION_DELTA"].total_seconds()) + 1
+        max_entries = conf.get("TOKEN_CACHE_LOCAL_MAX_ENTRIES", 10000)
+        # L1 条目为 (用户, 会话)
+        self.local = LocalLRUCache(max_entries)
+        self.local_revoked = LocalLRUCache(max_entries)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get(self, token, payload):
+        """
+        查询缓存，payload 为已校验的访问令牌内容
+        :return: (会话状态, 用户)，会话状态为 ACTIVE / REVOKED，未命中时为 None
+        """
+        digest = token_digest(token)
+        cached = self._get_local(digest, payload)
+        if cached is not None:
+            return cached
+        keys = self._keys(payload)
+        return self._resolve(digest, payload, keys, self.shared.get_many(keys))
+
+    async def aget(self, token, payload):
+        """get 的异步版本，L1 命中时不切换线程"""
+        digest = token_digest(token)
+        cached = self._get_local(digest, payload)
+        if cached is not None:
+            return cached
+        keys = self._keys(payload)
+        return self._resolve(digest, payload, keys, await sync_to_async(self.shared.get_many)(keys))
+
+    def _get_local(self, digest, payload):
+        if not self.enabled:
+            return None, None
+        if self.local_revoked.get(payload["sid"]) is not None:
+            return REVOKED, None
+        entry = self.local.get(digest)
+        if entry is not None:
+            return ACTIVE, copy.copy(entry[0])
+        return None
+
+    def _keys(self, payload):
+        return [self.SESSION_KEY.format(payload["sid"]), self.USER_KEY.format(payload["user_id"])]
+
+    def _resolve(self, digest, payload, keys, values):
+        state = values.get(keys[0])
+        if state == REVOKED:
+            self.remember_revoked(payload)
+            return REVOKED, None
+        user = values.get(keys[1])
+        if user is not None and user.pk != payload["user_id"]:
+            user = None
+        if state != ACTIVE:
+            return None, user
+        if user is not None:
+            self._set_local(digest, user, payload)
+            user = copy.copy(user)
+        return ACTIVE, user
+
+    def remember_revoked(self, payload):
+        """在本进程中记录令牌所属的会话已吊销，直到令牌过期"""
+        self.local_revoked.set(payload["sid"], True, payload["exp"])
+
+    def _set_local(self, digest, user, payload):
+        self.local.set(digest, (user, payload["sid"]), payload["exp"])
+
+    def set(self, token, payload, user):
+        """缓存从数据库读取的有效会话与用户"""
+        if self.enabled:
+            self._set_local(token_digest(token), user, payload)
+            self._set(payload, user)
+
+    async def aset(self, token, payload, user):
+        """set 的异步版本"""
+        if self.enabled:
+            self._set_local(token_digest(token), user, payload)
+            await sync_to_async(self._set)(payload, user)
+
+    def _set(self, payload, user):
+        # add：不覆盖并发写入的吊销状态
+        self.shared.add(self.SESSION_KEY.format(payload["sid"]), ACTIVE, self.timeout)
+        self.shared.set(self.USER_KEY.format(user.pk), user, self.timeout)
+
+    def revoke_sessions(self, sessions):
+        """数据库中已吊销的会话写入缓存，这些会话签发的访问令牌立即失效（其他进程的 L1 除外）"""
+        sessions = {session for session in sessions if session}
+        if not sessions or not self.enabled:
+            return
+        self.local.delete_where(lambda entry: entry[1] in sessions)
+        now = time.time()
+        for session in sessions:
+            self.local_revoked.set(session, True, now + self.revocation_timeout)
+        self.shared.set_many(
+            {self.SESSION_KEY.format(session): REVOKED for session in sessions}, self.revocation_timeout
+        )
+
+    def invalidate_user(self, user_id):
+        """用户信息变更后丢弃缓存的用户对象"""
+        self.invalidate_users([user_id])
+
+    def invalidate_users(self, user_ids):
+        """invalidate_user 的批量版本（批量写入不触发 post_save）"""
+        user_ids = set(user_ids)
+        if not self.enabled or not user_ids:
+            return
+        self.local.delete_where(lambda entry: entry[0].pk in user_ids)
+        self.shared.delete_many([self.USER_KEY.format(pk) for pk in user_ids])
+
+    def clear_local(self):
+        """清空进程内缓存"""
+        self.local.clear()
+        self.local_revoked.clear()
+
+
+token_cache = TokenCache()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
@@ -7,6 +8,19 @@ app_name = 'users'
 router = DefaultRouter()
 router.register('', views.UserViewSet)
 
-urlpatterns = [
+urlpatterns = []
+
+# ASGI 部署时热点接口使用异步视图，需放在视图集路由之前
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    urlpatterns += [
+        path('profile/', async_views.profile, name='user-profile-async'),
+        path('login/', async_views.login, name='user-login-async'),
+        path('refresh/', async_views.refresh, name='user-refresh-async'),
+        path('logout/', async_views.logout, name='user-logout-async'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
-] 
\ No newline at end of file
+]
@@ -1,12 +1,44 @@
+import datetime
+
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from core import conditional, db_router
+from core.exceptions import BusinessException
+from core.export import FORMATS, accepts_gzip, stream_export
+from core.parsers import NDJSONParser
 from core.views import BaseViewSet
-from .models import User, UserToken
+from .models import User
 from .serializers import UserSerializer, LoginSerializer, TokenSerializer
-from .authentication import generate_token
-from libs.decorators import api_log, validate_body_params
+from .keys import key_store
+from .hashing import hashing_executor
+from . import bulk, sessions
+from libs.decorators import api_log, cache_response, rate_limit, validate_body_params
+
+
+def parse_datetime_param(request, name):
+    """解析时间查询参数，支持 ISO 8601 日期时间或日期，未带时区时按当前时区处理"""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.datetime.combine(day, datetime.time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise BusinessException(f"{name} 参数格式错误", "invalid_parameter")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
 
 class UserViewSet(BaseViewSet):
@@ -15,13 +47,41 @@ class UserViewSet(BaseViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    # token 缓存未命中时认证需要 1 次查询（会话与用户），已计入预算；
+    # 登录、刷新、修改密码的事务在 SQLite 上另有 BEGIN / COMMIT 两次
+    query_budgets = {
+        "create": 5,
+        "login": 8,
+        "refresh": 7,
+        "logout": 3,
+        "profile": 1,
+        "list": 3,
+        "retrieve": 2,
+        "update": 5,
+        "partial_update": 5,
+        "destroy": 3,
+        "change_password": 9,
+        "export": 2,
+    }
+    # 批量接口按块查询，查询数随数据量增长
+    query_budget_exempt = {"bulk_create", "bulk_update", "bulk_deactivate"}
+    stream_list = True
 
     def get_permissions(self):
         """根据不同的action设置不同的权限"""
-        if self.action in ["create", "login"]:
+        if self.action in ["create", "login", "refresh"]:
             return [AllowAny()]
         return super().get_permissions()
 
+    # 缓存按用户区分，User 变更（含批量接口）后失效
+    @cache_response(timeout=60, key_prefix="user_list", stale_ttl=30, tags=[User])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(timeout=60, key_prefix="user_detail", stale_ttl=30, tags=[User])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @api_log
     @validate_body_params(["username", "password", "email"])
     def create(self, request, *args, **kwargs):
@@ -40,39 +100,111 @@ class UserViewSet(BaseViewSet):
         user = User.objects.filter(
             username=serializer.validated_data["username"]
         ).first()
-        if not user or not user.check_password(serializer.validated_data["password"]):
+        if not user or not hashing_executor.check_password(
+            user, serializer.validated_data["password"]
+        ):
             return self.get_error_response(
                 "用户名或密码错误", status.HTTP_401_UNAUTHORIZED
             )
 
-        # 生成token
-        token, expires = generate_token(user)
+        # 生成访问令牌与刷新令牌；请求结束后该用户在一段时间内读主库（读己之写）
+        db_router.set_request_user(user.id)
+        tokens = sessions.start(user)
 
         # 返回用户信息和token
         user_data = UserSerializer(user).data
-        user_data["token"] = token
-        user_data["expires"] = expires
+        user_data.update(tokens.as_dict())
 
         return self.get_success_response(user_data, "登录成功")
 
+    @api_log
+    @action(detail=False, methods=["post"], authentication_classes=[], permission_classes=[AllowAny])
+    @validate_body_params(["refresh_token"])
+    def refresh(self, request):
+        """刷新令牌：轮换刷新令牌并签发新的访问令牌"""
+        tokens = sessions.rotate(request.data["refresh_token"])
+        return self.get_success_response(tokens.as_dict(), "刷新成功")
+
     @api_log
     @action(detail=False, methods=["post"])
     def logout(self, request):
-        """登出"""
-        # 获取当前token
-        auth_header = request.headers.get("Authorization")
-        if auth_header:
-            auth_type, token = auth_header.split(" ")
-            # 使token失效
-            UserToken.objects.filter(token=token).update(is_active=False)
-
+        """登出：吊销当前会话的刷新令牌与访问令牌"""
+        sessions.end(request.auth)
         return self.get_success_response(message="登出成功")
 
     @api_log
     @action(detail=False, methods=["get"])
     def profile(self, request):
-        """获取个人信息"""
-        return self.get_success_response(UserSerializer(request.user).data)
+        """获取个人信息，支持条件请求（未修改时返回 304）"""
+        return conditional.respond(
+            request,
+            conditional.for_object(request.user, request.accepted_media_type),
+            lambda: self.get_success_response(UserSerializer(request.user).data),
+        )
+
+    @api_log
+    @action(detail=False, methods=["get"])
+    @rate_limit("user_export", limit=10, period=60, key="user")
+    def export(self, request):
+        """
+        流式导出用户
+        ?output=ndjson|csv（默认 ndjson）
+        ?fields=id,username 导出的字段，默认全部可读字段
+        ?created_after= / ?created_before= 创建时间范围 [after, before)，ISO 8601 日期或日期时间
+        客户端声明 Accept-Encoding: gzip 时压缩输出，?gzip=0 关闭
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in FORMATS:
+            raise BusinessException(f"output 参数只能是 {'、'.join(FORMATS)}", "invalid_parameter")
+
+        serializer_fields = {
+            name: field for name, field in self.get_serializer().fields.items() if not field.write_only
+        }
+        fields = serializer_fields.keys()
+        if request.query_params.get("fields"):
+            fields = [name.strip() for name in request.query_params["fields"].split(",") if name.strip()]
+            unknown = [name for name in fields if name not in serializer_fields]
+            if not fields:
+                raise BusinessException("fields 参数不能为空", "invalid_parameter")
+            if unknown:
+                raise BusinessException(f"不支持导出的字段: {', '.join(unknown)}", "invalid_parameter")
+        fields = list(dict.fromkeys(fields))
+
+        queryset = User.objects.all()
+        created_after = parse_datetime_param(request, "created_after")
+        created_before = parse_datetime_param(request, "created_before")
+        if created_after:
+            queryset = queryset.filter(created_at__gte=created_after)
+        if created_before:
+            queryset = queryset.filter(created_at__lt=created_before)
+
+        # 与接口返回的格式保持一致，例如 DateTimeField 的 DATETIME_FORMAT
+        converters = {name: serializer_fields[name].to_representation for name in fields}
+        gzip = request.query_params.get("gzip") != "0" and accepts_gzip(request)
+        return stream_export(
+            queryset.order_by("id"), fields, output, converters, gzip=gzip, filename="users"
+        )
+
+    @api_log
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser], parser_classes=[JSONParser, NDJSONParser])
+    def bulk_create(self, request):
+        """批量注册（管理员），请求体为用户数组或 NDJSON，返回逐项结果"""
+        report = bulk.bulk_create_users(bulk.read_items(request))
+        return self.get_success_response(report.as_dict(), "批量注册完成")
+
+    @api_log
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser], parser_classes=[JSONParser, NDJSONParser])
+    def bulk_update(self, request):
+        """批量更新（管理员），每项需包含 id"""
+        report = bulk.bulk_update_users(bulk.read_items(request))
+        return self.get_success_response(report.as_dict(), "批量更新完成")
+
+    @api_log
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser], parser_classes=[JSONParser, NDJSONParser])
+    def bulk_deactivate(self, request):
+        """批量停用（管理员），每项为 id 或 {"id": ...}"""
+        report = bulk.bulk_deactivate_users(bulk.read_items(request), current_user=request.user)
+        return self.get_success_response(report.as_dict(), "批量停用完成")
 
     @api_log
     @action(detail=False, methods=["post"])
@@ -80,18 +212,21 @@ class UserViewSet(BaseViewSet):
     def change_password(self, request):
         """修改密码"""
         user = request.user
-        if not user.check_password(request.data["old_password"]):
+        if not hashing_executor.check_password(user, request.data["old_password"]):
             return self.get_error_response("原密码错误", status.HTTP_400_BAD_REQUEST)
 
-        user.set_password(request.data["new_password"])
+        hashing_executor.set_password(user, request.data["new_password"])
         user.save()
 
-        # 使所有token失效
-        UserToken.objects.filter(user=user).update(is_active=False)
+        # 开始新会话，用户的其他会话全部失效
+        tokens = sessions.start(user)
 
-        # 生成新token
-        token, expires = generate_token(user)
+        return self.get_success_response(tokens.as_dict(), "密码修改成功")
 
-        return self.get_success_response(
-            {"token": token, "expires": expires}, "密码修改成功"
-        )
+
+@require_GET
+def jwks(request):
+    """公开的JWT签名公钥（JWKS）"""
+    response = JsonResponse(key_store.jwks())
+    response["Cache-Control"] = "public, max-age=300"
+    return response